@@ -1,10 +1,14 @@
 import asyncio
+import json
+import time
 import uvicorn
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response, Query
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
 import pickle
 import os
-from typing import List, Dict
+from typing import Any, List, Dict, Optional
 from dotenv import load_dotenv
 import importlib
 import sys
@@ -16,19 +20,186 @@ load_dotenv()
 # Add parent directory (contoso_internet) to the python path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 agent_module_path = os.getenv("AGENT_MODULE")
-agent_module = importlib.import_module(agent_module_path)
-Agent = getattr(agent_module, "Agent")
 
+from autogen.state_store import create_state_store
+from autogen.state_snapshot import StateSnapshotter
+from autogen.chat_history import delete_history, read_history, read_meta
+from autogen.turn_scheduler import TurnAbandonedError, TurnAbortedError, TurnRejectedError, TurnScheduler
+from autogen.jobs import TERMINAL, JobContext, JobManager, JobQueueFullError
+from autogen import batch_eval
+from autogen.tracing import setup_tracing, shutdown_tracing, tracer
+from autogen.warmup import Readiness, warm_up
+from autogen import metrics
+from opentelemetry import propagate, trace
 
-# In-memory session store (use Redis/DB for production)
-SESSION_STORE = {}
+_agent_class = None
 
-app = FastAPI()
+
+def get_agent_class():
+    """
+    The Agent class of AGENT_MODULE. Importing it loads AutoGen and the
+    OpenAI/MCP clients, so it happens on first use (the warm-up, in a
+    thread, or the first request with WARMUP=off) instead of at import:
+    the worker answers /healthz before the agent stack is loaded.
+    """
+    global _agent_class
+    if _agent_class is None:
+        _agent_class = importlib.import_module(agent_module_path).Agent
+    return _agent_class
+
+
+# Export spans to Jaeger/OTLP when TRACING=on
+setup_tracing("agentic-backend")
+
+# Session store selected by STATE_STORE_BACKEND (memory / sqlite / redis)
+SESSION_STORE = create_state_store()
+
+# Max messages returned by one /history call
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "200"))
+
+# How often a running /chat checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = float(os.getenv("DISCONNECT_POLL_SECONDS", "0.5"))
+
+# How often /jobs/{id}/events checks for job progress
+JOB_EVENTS_POLL_SECONDS = float(os.getenv("JOB_EVENTS_POLL_SECONDS", "0.5"))
+
+# Warm-up at startup (tool catalog, template team, model connection); /readyz reports it
+WARMUP = os.getenv("WARMUP", "on").lower() == "on"
+READINESS = Readiness()
+
+# Serializes turns per session (across workers with a durable SESSION_STORE) and bounds concurrent turns in this worker (SCHEDULER_*)
+SCHEDULER = TurnScheduler.from_env(agent_module_path, store=SESSION_STORE)
+
+# Operational metrics served at /metrics, all labelled with AGENT_MODULE
+ACTIVE_SESSIONS = metrics.ActiveSessions(float(os.getenv("METRICS_ACTIVE_SESSION_SECONDS", "900")))
+HTTP_REQUESTS = metrics.REGISTRY.counter(
+    "agent_http_requests_total", "HTTP requests handled", ("agent_module", "method", "path", "status")
+)
+HTTP_LATENCY = metrics.REGISTRY.histogram(
+    "agent_http_request_duration_seconds", "HTTP request handling time", ("agent_module", "method", "path")
+)
+AGENT_SETUP = metrics.REGISTRY.histogram(
+    "agent_setup_seconds", "Time to build the Agent for a request (state and history load)", ("agent_module",)
+)
+metrics.REGISTRY.gauge(
+    "agent_active_sessions", "Sessions with a turn in the last METRICS_ACTIVE_SESSION_SECONDS", ("agent_module",),
+    callback=lambda: {(agent_module_path,): ACTIVE_SESSIONS.count()},
+)
+metrics.REGISTRY.gauge(
+    "agent_scheduler_running_turns", "Turns holding a run slot", ("agent_module",),
+    callback=lambda: {(agent_module_path,): SCHEDULER.running},
+)
+metrics.REGISTRY.gauge(
+    "agent_scheduler_queued_turns", "Turns waiting for their session or a run slot", ("agent_module",),
+    callback=lambda: {(agent_module_path,): SCHEDULER.queued},
+)
+
+
+def session_store_entries():
+    # Redis has no cheap count; the gauge is left out for it
+    try:
+        return {(agent_module_path,): len(SESSION_STORE)}
+    except TypeError:
+        return {}
+
+
+metrics.REGISTRY.gauge(
+    "agent_session_store_entries", "Entries in SESSION_STORE (state and chat history keys)", ("agent_module",),
+    callback=session_store_entries,
+)
+
+metrics.REGISTRY.gauge(
+    "agent_ready", "1 once the worker is warmed up and not draining", ("agent_module",),
+    callback=lambda: {(agent_module_path,): int(READINESS.ready)},
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background: the worker is live at once and ready when warm
+    warmup = None
+    if WARMUP:
+        warmup = asyncio.create_task(
+            warm_up(
+                get_agent_class,
+                READINESS,
+                timeout=float(os.getenv("WARMUP_TIMEOUT_SECONDS", "60")),
+                retry_seconds=float(os.getenv("WARMUP_RETRY_SECONDS", "10")),
+                agent_module=agent_module_path,
+            )
+        )
+    else:
+        READINESS.mark_ready()
+    # Picks up jobs and batches a previous process left queued or running
+    await JOBS.start()
+    await BATCHES.start()
+    try:
+        yield
+    finally:
+        READINESS.draining = True
+        if warmup is not None:
+            warmup.cancel()
+            await asyncio.gather(warmup, return_exceptions=True)
+        await JOBS.stop()
+        await BATCHES.stop()
+        if "autogen.model_clients" in sys.modules:
+            await sys.modules["autogen.model_clients"].close_shared_model_clients()
+        # Flush buffered writes so durable backends don't lose the last turns
+        SESSION_STORE.close()
+        shutdown_tracing()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+class RequestObservabilityMiddleware:
+    """
+    Trace span and metrics for every HTTP request. Plain ASGI rather than
+    @app.middleware("http"), which hides client disconnects from /chat.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        request = Request(scope)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        # Continue the caller's trace (traceparent header) if there is one
+        with tracer.start_as_current_span(
+            f"{request.method} {request.url.path}",
+            context=propagate.extract(request.headers),
+            kind=trace.SpanKind.SERVER,
+        ) as span:
+            span.set_attribute("http.request.method", request.method)
+            span.set_attribute("url.path", request.url.path)
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                span.set_attribute("http.response.status_code", status)
+                # Label by route template (/history/{session_id}), not the raw path
+                path = getattr(scope.get("route"), "path", "unmatched")
+                HTTP_LATENCY.observe(time.perf_counter() - start, agent_module=agent_module_path, method=request.method, path=path)
+                HTTP_REQUESTS.inc(agent_module=agent_module_path, method=request.method, path=path, status=str(status))
+
+
+app.add_middleware(RequestObservabilityMiddleware)
 
 
 class ChatRequest(BaseModel):
     session_id: str
     prompt: str
+    # Whose long-term memory (/memories) the agents read; defaults to the session
+    user_id: Optional[str] = None
 
 
 class ChatResponse(BaseModel):
@@ -38,36 +209,455 @@ class ChatResponse(BaseModel):
 class ConversationHistoryResponse(BaseModel):
     session_id: str
     history: List[Dict[str, str]]
+    since: int = 0
+    next_index: int = 0
+    total: int = 0
+    # Changes when the session is reset; version grows with every turn of a generation
+    generation: str = ""
+    version: int = 0
 
 
 class SessionResetRequest(BaseModel):
     session_id: str
 
 
+async def watch_disconnect(request: Request, on_disconnect) -> None:
+    # Stop spending tokens on a run whose client has gone away (tab closed, frontend timeout)
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+    on_disconnect()
+
+
 @app.post("/chat", response_model=ChatResponse)
-async def chat(req: ChatRequest):
-    # Lookup or create agent for this session
-    agent = Agent(SESSION_STORE, req.session_id)
-    # Run chat
-    answer = await agent.chat_async(req.prompt)
+async def chat(req: ChatRequest, request: Request):
+    agent = None
+    client_gone = asyncio.Event()
+
+    def on_disconnect():
+        # A queued turn leaves the queue; a running turn is aborted so the
+        # session state stays consistent.
+        client_gone.set()
+        if agent is not None:
+            agent.abort_turn("client_disconnected")
+
+    watcher = asyncio.create_task(watch_disconnect(request, on_disconnect))
+    try:
+        # One turn per session at a time, bounded turns per worker
+        async with SCHEDULER.turn(req.session_id, abandoned=client_gone):
+            # Lookup or create agent for this session (after the previous turn saved its state)
+            ACTIVE_SESSIONS.touch(req.session_id)
+            with tracer.start_as_current_span("agent.setup") as span:
+                span.set_attribute("session.id", req.session_id)
+                start = time.perf_counter()
+                agent = get_agent_class()(SESSION_STORE, req.session_id)
+                agent.user_id = req.user_id or req.session_id
+                agent.guard_turn(SCHEDULER.lease(req.session_id))
+                AGENT_SETUP.observe(time.perf_counter() - start, agent_module=agent_module_path)
+            # Run chat
+            with tracer.start_as_current_span("agent.chat") as span:
+                span.set_attribute("agent.module", agent_module_path)
+                try:
+                    answer = await agent.chat_async(req.prompt)
+                except TurnAbortedError:
+                    pass
+    except TurnRejectedError as exc:
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": str(exc.retry_after)})
+    except TurnAbandonedError:
+        return Response(status_code=499)
+    finally:
+        watcher.cancel()
+    # Aborted turns leave the session at its previous state (nothing is saved);
+    # modules that catch errors return an apology, which is not sent either.
+    if agent.last_turn_aborted == "deadline":
+        raise HTTPException(status_code=504, detail="The agent did not finish within TURN_DEADLINE_SECONDS.")
+    if agent.last_turn_aborted == "session_lock_lost":
+        raise HTTPException(status_code=409, detail="Another worker took over this session during the turn; nothing was saved, retry.")
+    if agent.last_turn_aborted:
+        # Nobody is listening any more; 499 is what proxies log for this
+        return Response(status_code=499)
 
     return ChatResponse(response=answer)
 
 
+async def run_background_turn(ctx: JobContext, session_id: str, prompt: str, deadline: float, on_message=None):
+    """One agent turn of a job or batch; returns the agent and its answer."""
+    cancelled = asyncio.Event()
+    ctx.on_cancel(cancelled.set)
+    while True:
+        try:
+            # Background turns take turns with /chat requests of the same session
+            async with SCHEDULER.turn(session_id, abandoned=cancelled):
+                agent = get_agent_class()(SESSION_STORE, session_id)
+                agent.guard_turn(SCHEDULER.lease(session_id))
+                agent.turn_deadline_seconds = deadline
+                agent.on_message = on_message
+                # Jobs and batches queue behind /chat for the model deployment
+                agent.llm_priority = "background"
+                ctx.on_cancel(lambda: agent.abort_turn("cancelled"))
+                try:
+                    answer = await agent.chat_async(prompt)
+                except TurnAbortedError:
+                    if agent.last_turn_aborted != "session_lock_lost":
+                        raise
+                if agent.last_turn_aborted != "session_lock_lost":
+                    return agent, answer
+            # Another worker took the session over mid-turn and nothing was saved: run the turn again
+            ctx.progress(state="waiting", retry_in=1)
+            await asyncio.sleep(1)
+        except TurnRejectedError as exc:
+            # Saturated by interactive traffic: back off rather than fail
+            ctx.progress(state="waiting", retry_in=exc.retry_after)
+            await asyncio.sleep(exc.retry_after)
+
+
+async def run_job(ctx: JobContext) -> str:
+    job = ctx.job
+    agent, answer = await run_background_turn(
+        ctx,
+        job["session_id"],
+        job["prompt"],
+        JOB_TURN_DEADLINE_SECONDS,
+        on_message=lambda message: ctx.progress(
+            state="running",
+            messages=ctx.job["progress"].get("messages", 0) + 1,
+            last_source=message.source,
+            last_message=message.to_text()[:200],
+        ),
+    )
+    if agent.last_turn_aborted:
+        raise TurnAbortedError(agent.last_turn_aborted)
+    return answer
+
+
+# Background jobs for long analyses (JOB_*); persisted in SESSION_STORE and shared by the workers when it is durable
+JOB_TURN_DEADLINE_SECONDS = float(os.getenv("JOB_TURN_DEADLINE_SECONDS", "900"))
+JOBS = JobManager(
+    SESSION_STORE,
+    run_job,
+    workers=int(os.getenv("JOB_WORKERS", "2")),
+    max_queued=int(os.getenv("JOB_MAX_QUEUED", "100")),
+    agent_module=agent_module_path,
+)
+
+
+
+class JobRequest(BaseModel):
+    session_id: str
+    prompt: str
+
+
+class JobResponse(BaseModel):
+    id: str
+    session_id: str
+    prompt: str
+    status: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    attempts: int = 0
+    progress: Dict[str, Any] = {}
+    result: Optional[str] = None
+    error: Optional[str] = None
+
+
+def get_job_or_404(job_id: str) -> Dict[str, Any]:
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job
+
+
+@app.post("/jobs", response_model=JobResponse, status_code=202)
+async def submit_job(req: JobRequest, response: Response):
+    try:
+        job = JOBS.submit(session_id=req.session_id, prompt=req.prompt)
+    except JobQueueFullError as exc:
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": "30"})
+    response.headers["Location"] = f"/jobs/{job['id']}"
+    return job
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    return get_job_or_404(job_id)
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job(job_id: str):
+    # Server-sent events: the job record whenever it changes, until it finishes
+    get_job_or_404(job_id)
+
+    async def events():
+        last = None
+        while True:
+            job = JOBS.get(job_id)
+            data = json.dumps(job, ensure_ascii=False)
+            if data != last:
+                last = data
+                yield f"data: {data}\n\n"
+            if job is None or job["status"] in TERMINAL:
+                return
+            await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.delete("/jobs/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    get_job_or_404(job_id)
+    return await JOBS.cancel(job_id)
+
+
+async def run_batch_job(ctx: JobContext) -> Dict[str, Any]:
+    batch = ctx.job
+
+    async def run_turn(session_id: str, prompt: str, timeout: float):
+        return await run_background_turn(ctx, session_id, prompt, timeout)
+
+    def on_record(record: Dict[str, Any]) -> None:
+        progress = ctx.job["progress"]
+        ctx.progress(
+            state="running",
+            done=progress.get("done", 0) + 1,
+            **{record["status"]: progress.get(record["status"], 0) + 1},
+        )
+
+    cancelled = asyncio.Event()
+    ctx.on_cancel(cancelled.set)
+    ctx.progress(state="running", total=len(batch["items"]))
+    # A batch re-queued after a restart resumes from its results file
+    return await batch_eval.run_batch(
+        batch["items"],
+        run_turn,
+        BATCH_RESULTS_DIR / f"{batch['id']}.jsonl",
+        concurrency=batch["concurrency"],
+        item_timeout=batch["item_timeout"],
+        session_prefix=f"batch:{batch['id']}:",
+        cancelled=cancelled,
+        on_record=on_record,
+        agent_module=agent_module_path,
+        store=SESSION_STORE,
+    )
+
+
+# Batch evaluation runs (BATCH_*); results are appended to BATCH_RESULTS_DIR/<id>.jsonl
+BATCH_RESULTS_DIR = Path(os.getenv("BATCH_RESULTS_DIR", "batch_results"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_ITEM_TIMEOUT_SECONDS = float(os.getenv("BATCH_ITEM_TIMEOUT_SECONDS", "120"))
+BATCHES = JobManager(
+    SESSION_STORE,
+    run_batch_job,
+    workers=1,
+    max_queued=int(os.getenv("BATCH_MAX_QUEUED", "10")),
+    agent_module=agent_module_path,
+    kind="batch",
+)
+metrics.REGISTRY.gauge(
+    "agent_jobs_queued", "Jobs and batches waiting for a worker", ("agent_module", "kind"),
+    callback=lambda: {(agent_module_path, "job"): JOBS.queued, (agent_module_path, "batch"): BATCHES.queued},
+)
+metrics.REGISTRY.gauge(
+    "agent_jobs_running", "Jobs and batches being run", ("agent_module", "kind"),
+    callback=lambda: {(agent_module_path, "job"): JOBS.running, (agent_module_path, "batch"): BATCHES.running},
+)
+
+
+class BatchResponse(BaseModel):
+    id: str
+    status: str
+    items: int
+    concurrency: int
+    item_timeout: float
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    attempts: int = 0
+    progress: Dict[str, Any] = {}
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+def batch_response(batch: Dict[str, Any]) -> BatchResponse:
+    return BatchResponse(**{**batch, "items": len(batch["items"])})
+
+
+def get_batch_or_404(batch_id: str) -> Dict[str, Any]:
+    batch = BATCHES.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail=f"Unknown batch {batch_id}")
+    return batch
+
+
+@app.post("/batches", response_model=BatchResponse, status_code=202)
+async def submit_batch(
+    request: Request,
+    response: Response,
+    concurrency: int = Query(BATCH_CONCURRENCY, ge=1, le=64),
+    item_timeout: float = Query(BATCH_ITEM_TIMEOUT_SECONDS, gt=0),
+):
+    # Body: JSONL of {"session_id": ..., "prompt": ...} scenarios (curl --data-binary @evals.jsonl)
+    try:
+        items = batch_eval.parse_items((await request.body()).decode("utf-8").splitlines())
+    except (UnicodeDecodeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid JSONL: {exc}")
+    if not items:
+        raise HTTPException(status_code=400, detail="No scenarios in the request body")
+    try:
+        batch = BATCHES.submit(items=items, concurrency=concurrency, item_timeout=item_timeout)
+    except JobQueueFullError as exc:
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": "60"})
+    response.headers["Location"] = f"/batches/{batch['id']}"
+    return batch_response(batch)
+
+
+@app.get("/batches/{batch_id}", response_model=BatchResponse)
+async def get_batch(batch_id: str):
+    # progress: done/ok/error/timeout counts; result: the summary once finished
+    return batch_response(get_batch_or_404(batch_id))
+
+
+@app.get("/batches/{batch_id}/results")
+async def get_batch_results(batch_id: str):
+    # The records written so far, one JSON object per line
+    get_batch_or_404(batch_id)
+    path = BATCH_RESULTS_DIR / f"{batch_id}.jsonl"
+    if not path.exists():
+        return Response(b"", media_type="application/x-ndjson")
+    return FileResponse(path, media_type="application/x-ndjson")
+
+
+@app.delete("/batches/{batch_id}", response_model=BatchResponse)
+async def cancel_batch(batch_id: str):
+    # Items in flight are aborted; finished results are kept
+    get_batch_or_404(batch_id)
+    return batch_response(await BATCHES.cancel(batch_id))
+
+
 @app.post("/reset_session")
 async def reset_session(req: SessionResetRequest):
-    # Reset the session by removing the chat history from SESSION_STORE
-    if req.session_id in SESSION_STORE:
-        del SESSION_STORE[req.session_id]
-    if f"{req.session_id}_chat_history" in SESSION_STORE:
-        del SESSION_STORE[f"{req.session_id}_chat_history"]
+    # Imported on first use like the agent module (AutoGen)
+    from autogen.tool_results import delete_tool_results
+
+    try:
+        # Under the session's turn lock, so a running turn cannot save over the reset
+        async with SCHEDULER.turn(req.session_id):
+            # Reset the session by removing the agent state (with its snapshot parts), chat history
+            # and kept tool result rows from SESSION_STORE
+            StateSnapshotter().delete(SESSION_STORE, req.session_id)
+            delete_history(SESSION_STORE, req.session_id)
+            delete_tool_results(SESSION_STORE, req.session_id)
+    except TurnRejectedError as exc:
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": str(exc.retry_after)})
+
+
+class MemoryAddRequest(BaseModel):
+    contents: List[str]
+    metadata: Optional[Dict[str, Any]] = None
+
+
+class MemoryItem(BaseModel):
+    content: str
+    metadata: Dict[str, Any] = {}
+
+
+class MemoryResponse(BaseModel):
+    user_id: str
+    total: int
+    results: List[MemoryItem] = []
+
+
+def get_user_memory_or_404(user_id: str):
+    # Imported on first use like the agent module (NumPy, AutoGen)
+    from autogen.vector_memory import get_user_memory
+
+    memory = get_user_memory(user_id)
+    if memory is None:
+        raise HTTPException(status_code=404, detail="User memory is disabled (USER_MEMORY=off).")
+    return memory
+
+
+@app.post("/memories/{user_id}", response_model=MemoryResponse)
+async def add_memories(user_id: str, req: MemoryAddRequest):
+    # Batch insert: one embedding call and one index write for all contents
+    from autogen_core.memory import MemoryContent, MemoryMimeType
+
+    memory = get_user_memory_or_404(user_id)
+    await memory.add_many([MemoryContent(content=c, mime_type=MemoryMimeType.TEXT, metadata=req.metadata) for c in req.contents])
+    return MemoryResponse(user_id=user_id, total=len(memory.index))
+
+
+@app.get("/memories/{user_id}", response_model=MemoryResponse)
+async def query_memories(
+    user_id: str,
+    q: str = Query(..., description="Text to find the most similar memories for"),
+    top_k: Optional[int] = Query(None, ge=1, le=100, description="Max memories (default MEMORY_TOP_K)"),
+):
+    memory = get_user_memory_or_404(user_id)
+    result = await memory.query(q, **({"top_k": top_k} if top_k else {}))
+    return MemoryResponse(
+        user_id=user_id,
+        total=len(memory.index),
+        results=[MemoryItem(content=str(m.content), metadata=m.metadata or {}) for m in result.results],
+    )
+
+
+@app.delete("/memories/{user_id}", response_model=MemoryResponse)
+async def clear_memories(user_id: str):
+    memory = get_user_memory_or_404(user_id)
+    await memory.clear()
+    return MemoryResponse(user_id=user_id, total=0)
+
+
+def history_etag(meta: Dict[str, Any], since: int, limit: int) -> str:
+    # The session's history version (see autogen.chat_history) and the requested page
+    return 'W/"{}-{}-{}-{}"'.format(meta["generation"], meta["version"], since, limit)
 
 
 @app.get("/history/{session_id}", response_model=ConversationHistoryResponse)
-async def get_conversation_history(session_id: str):
-    # Retrieve chat history list from SESSION_STORE using the correct key
-    history = SESSION_STORE.get(f"{session_id}_chat_history", [])
-    return ConversationHistoryResponse(session_id=session_id, history=history)
+async def get_conversation_history(
+    session_id: str,
+    request: Request,
+    response: Response,
+    since: int = Query(0, ge=0, description="Index of the first message to return"),
+    limit: Optional[int] = Query(None, ge=1, description="Max messages to return (capped at HISTORY_PAGE_SIZE)"),
+):
+    limit = min(limit or HISTORY_PAGE_SIZE, HISTORY_PAGE_SIZE)
+    # An unchanged history costs a read of its small meta record, not of the history
+    meta = read_meta(SESSION_STORE, session_id) or {"generation": "", "version": 0, "length": 0}
+    etag = history_etag(meta, since, limit)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    # Only the history chunks covering the page are read
+    page = read_history(SESSION_STORE, session_id, since, limit, meta=meta)
+    response.headers["ETag"] = etag
+    return ConversationHistoryResponse(
+        session_id=session_id,
+        history=page,
+        since=since,
+        next_index=since + len(page),
+        total=meta["length"],
+        generation=meta["generation"],
+        version=meta["version"],
+    )
+
+
+@app.get("/healthz")
+async def liveness():
+    # The process is up and serving; restart it only if this fails
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readiness():
+    # Route traffic here only when warmed up (503 while warming up or draining)
+    return JSONResponse(READINESS.as_dict(), status_code=200 if READINESS.ready else 503)
+
+
+@app.get("/metrics")
+async def get_metrics():
+    # Prometheus text exposition format
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,96 @@
+"""
+Batch evaluation: run a JSONL file of scenarios through an agent module.
+
+Each input line is ``{"session_id": ..., "prompt": ...}`` (optional ``id``
+and any extra fields such as ``expected``). Sessions run concurrently, the
+turns of one session in file order, each turn bounded by ``--timeout``.
+Every finished item is appended to the output JSONL with its status
+(ok | error | timeout), answer, latency, LLM calls, tokens and tool calls;
+running the same command again resumes after an interruption (sessions
+the store no longer has, as with the default in-memory store, replay their
+finished turns first; set STATE_STORE_BACKEND=sqlite to keep them). The same
+runner backs ``POST /batches`` in backend.py.
+
+Usage (from agentic_ai/):
+    python applications/batch_eval.py evals.jsonl --output batch_results/nightly.jsonl --concurrency 8
+    python applications/batch_eval.py evals.jsonl --module autogen.multi_agent.reflection_agent --retry-failed
+    python applications/batch_eval.py evals.jsonl --offline   # scripted model + fake tools, no network
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from autogen.batch_eval import direct_turn_runner, read_items, run_batch
+from autogen.chat_history import delete_history
+from autogen.state_snapshot import StateSnapshotter
+from autogen.state_store import create_state_store
+from autogen.tool_results import delete_tool_results
+
+
+async def main(args: argparse.Namespace) -> int:
+    items = read_items(args.input)
+    agent_cls = importlib.import_module(args.module).Agent
+    if args.offline:
+        sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+        from offline import offline_agent_class
+
+        agent_cls = offline_agent_class(agent_cls, args.llm_latency)
+
+    output = Path(args.output or Path(os.getenv("BATCH_RESULTS_DIR", "batch_results")) / f"{Path(args.input).stem}.jsonl")
+    # Sessions are namespaced by the output file, so a resumed run continues its own conversations
+    session_prefix = f"batch:{output.stem}:"
+    store = create_state_store()
+    if args.restart:
+        output.unlink(missing_ok=True)
+        for session_id in {item["session_id"] for item in items}:
+            StateSnapshotter().delete(store, session_prefix + session_id)
+            delete_history(store, session_prefix + session_id)
+            delete_tool_results(store, session_prefix + session_id)
+    try:
+        summary = await run_batch(
+            items,
+            direct_turn_runner(agent_cls, store),
+            output,
+            concurrency=args.concurrency,
+            item_timeout=args.timeout,
+            session_prefix=session_prefix,
+            retry_failed=args.retry_failed,
+            agent_module=args.module,
+            store=store,
+        )
+    finally:
+        store.close()
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    print(f"results written to {output}", file=sys.stderr)
+    return 0 if summary["ok"] == summary["items"] and not summary["pending"] else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL file of scenarios")
+    parser.add_argument("--output", help="result JSONL (default: $BATCH_RESULTS_DIR/<input name>.jsonl)")
+    parser.add_argument("--module", default=os.getenv("AGENT_MODULE"), help="agent module (default: $AGENT_MODULE)")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("BATCH_CONCURRENCY", "4")), help="sessions run at once")
+    parser.add_argument("--timeout", type=float, default=float(os.getenv("BATCH_ITEM_TIMEOUT_SECONDS", "120")), help="seconds per turn")
+    parser.add_argument("--retry-failed", action="store_true", help="run items recorded as error/timeout again")
+    parser.add_argument("--restart", action="store_true", help="discard earlier results in --output")
+    parser.add_argument("--offline", action="store_true", help="use the scripted model and fake tools of benchmarks/offline.py")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds added to every scripted LLM call (--offline)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    if not args.module:
+        parser.error("--module or AGENT_MODULE is required")
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    sys.exit(asyncio.run(main(args)))
@@ -6,6 +6,40 @@ CHAT_URL = f"{BASE_BACKEND_URL}/chat"
 HISTORY_URL = f"{BASE_BACKEND_URL}/history"
 SESSION_RESET_URL = f"{BASE_BACKEND_URL}/reset_session"
 
+
+@st.cache_resource
+def setup_tracing():
+    """Tracer for the chat requests when TRACING=on; the backend continues the trace."""
+    if os.getenv("TRACING", "off").lower() != "on":
+        return None
+    try:
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        return None
+    endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4317")
+    provider = TracerProvider(resource=Resource({"service.name": "agentic-frontend"}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint, insecure=endpoint.startswith("http://"))))
+    trace.set_tracer_provider(provider)
+    return trace.get_tracer("agentic_frontend")
+
+
+tracer = setup_tracing()
+
+
+def post_chat(payload):
+    if tracer is None:
+        return requests.post(CHAT_URL, json=payload)
+    from opentelemetry import propagate
+
+    with tracer.start_as_current_span("frontend.chat"):
+        headers = {}
+        propagate.inject(headers)
+        return requests.post(CHAT_URL, json=payload, headers=headers)
+
 # ───────────────── Sidebar ──────────────────
 with st.sidebar:
     st.title("⚙️  Controls")
@@ -14,6 +48,9 @@ with st.sidebar:
             SESSION_RESET_URL,
             json={"session_id": st.session_state["session_id"]},
         )
+        st.session_state["history"] = []
+        st.session_state["history_etag"] = None
+        st.session_state["history_version"] = None
 
 # ───────────────── Page title ────────────────
 st.markdown(
@@ -24,12 +61,47 @@ st.markdown(
 # ───────────── Load or initialize session ────────────────
 if "session_id" not in st.session_state:
     st.session_state["session_id"] = str(uuid.uuid4())
-conversation_history = []
-# Fetch existing history from backend
-response = requests.get(f"{HISTORY_URL}/{st.session_state['session_id']}")
-if response.status_code == 200:
-    history_data = response.json()
-    conversation_history = history_data.get("history", [])
+if "history" not in st.session_state:
+    st.session_state["history"] = []
+    st.session_state["history_etag"] = None
+    st.session_state["history_version"] = None
+
+
+def sync_history():
+    """Fetch only the messages we don't have yet; an unchanged history costs a 304."""
+    local = st.session_state["history"]
+    etag = st.session_state["history_etag"]
+    while True:
+        headers = {"If-None-Match": etag} if etag else {}
+        response = requests.get(
+            f"{HISTORY_URL}/{st.session_state['session_id']}",
+            params={"since": len(local)},
+            headers=headers,
+        )
+        if response.status_code != 200:
+            return
+        history_data = response.json()
+        known = st.session_state.get("history_version") or ("", 0)
+        version = (history_data["generation"], history_data["version"])
+        if history_data["since"] and (
+            history_data["total"] < len(local) or version[0] != known[0] or version[1] < known[1]
+        ):
+            # Session was reset (or its history replaced) elsewhere: start over from the beginning
+            local.clear()
+            etag = None
+            continue
+        local.extend(history_data["history"])
+        st.session_state["history_etag"] = response.headers.get("ETag")
+        st.session_state["history_version"] = version
+        # Keep paging without If-None-Match until we have caught up
+        etag = None
+        if history_data["next_index"] >= history_data["total"]:
+            return
+
+
+# Fetch new history from backend
+sync_history()
+conversation_history = st.session_state["history"]
 
 # ───────────────── Chat history ─────────────
 for msg in conversation_history:
@@ -43,12 +115,21 @@ if prompt:
         st.markdown(prompt)
 
     with st.spinner("Assistant is thinking..."):
-        r = requests.post(
-            CHAT_URL,
-            json={"session_id": st.session_state["session_id"], "prompt": prompt},
-        )
+        r = post_chat({"session_id": st.session_state["session_id"], "prompt": prompt})
+
+    if r.status_code == 429:
+        # Busy (session or worker queue full, see SCHEDULER_*): ask the user to retry
+        when = f"in {r.headers['Retry-After']} s" if "Retry-After" in r.headers else "shortly"
+        st.warning(f"The assistant is busy, please try again {when}. ({r.json().get('detail', '')})")
+    elif r.status_code == 504:
+        st.warning("The assistant did not finish in time; try a narrower question.")
+    elif r.status_code == 499:
+        st.warning("The request was cancelled before the assistant answered.")
+    elif r.status_code == 409:
+        st.warning("Another server took over this conversation while answering; nothing was saved, please send it again.")
+    else:
         r.raise_for_status()
         answer = r.json()["response"]
 
-    with st.chat_message("assistant"):
-        st.markdown(answer)
+        with st.chat_message("assistant"):
+            st.markdown(answer)
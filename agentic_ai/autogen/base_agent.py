@@ -1,10 +1,31 @@
 import os  
+import time  
+import asyncio  
 import logging  
-from typing import Any, Dict, List, Optional  
+from typing import Any, Callable, Dict, List, Optional, Tuple  
 from dotenv import load_dotenv  
   
+from autogen_agentchat.base import TaskResult  
+from autogen_core import CancellationToken  
+from autogen_core.model_context import ChatCompletionContext  
+  
+from autogen.model_clients import LlmUsage, UsageTrackingChatCompletionClient, get_shared_model_client, role_deployments_from_env  
+from autogen.state_store import StateStore, StoreLease  
+from autogen.state_snapshot import StateSnapshotter  
+from autogen.chat_history import append_history, read_history  
+from autogen.model_context import create_model_context  
+from autogen.turn_stats import TurnStats  
+from autogen.turn_scheduler import TurnAbortedError  
+from autogen.tool_selection import select_tools  
+from autogen.tool_cache import create_tool_cache, memoize_tools  
+from autogen.tool_catalog import get_tool_catalog  
+from autogen.team_template import get_team_template  
+from autogen import metrics  
+from autogen.cancellation import CancellableChatCompletionClient, cancellable_tools  
+  
 load_dotenv()  # Load environment variables from .env file if needed  
   
+  
 class BaseAgent:  
     """  
     Base class for all agents.  
@@ -12,7 +33,19 @@ class BaseAgent:
     Handles environment variables, state store, and chat history.  
     """  
   
-    def __init__(self, state_store: Dict[str, Any], session_id: str) -> None:  
+    # Declarative per-agent tool subsets: agent name -> MCP tool domains  
+    # ("billing", "catalog", "social"). Agents not listed get every tool.  
+    agent_tool_domains: Dict[str, List[str]] = {}  
+  
+    # Per-role model tiers: agent role ("selector", "coordinator", "critic")  
+    # -> "deployment[:model]", for roles doing short routing or review work  
+    # that a smaller deployment handles. AGENT_ROLE_DEPLOYMENTS overrides;  
+    # roles not listed use AZURE_OPENAI_CHAT_DEPLOYMENT.  
+    role_deployments: Dict[str, str] = {}  
+  
+    def __init__(self, state_store: StateStore, session_id: str) -> None:  
+        from autogen.tool_results import create_tool_result_shaper  
+  
         self.azure_deployment = os.getenv("AZURE_OPENAI_CHAT_DEPLOYMENT")  
         self.azure_openai_key = os.getenv("AZURE_OPENAI_API_KEY")  
         self.azure_openai_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")  
@@ -22,17 +55,277 @@ class BaseAgent:
   
         self.session_id = session_id  
         self.state_store = state_store  
+        # Whose long-term memory the agents read (the backend sets it from the request; defaults to the session)  
+        self.user_id = session_id  
+        # Per-process immutable parts of the team shared by all sessions (None = TEAM_TEMPLATES=off)  
+        self.template = get_team_template(type(self).__module__)  
   
-        self.chat_history: List[Dict[str, str]] = self.state_store.get(f"{session_id}_chat_history", [])  
-        self.state: Optional[Any] = self.state_store.get(session_id, None) 
+        self.chat_history: List[Dict[str, str]] = read_history(self.state_store, session_id)  
+        # Team state is persisted as a compressed checkpoint + per-turn deltas  
+        self._snapshotter = StateSnapshotter.from_env()  
+        self._state_head: Optional[Any]  
+        self.state: Optional[Any]  
+        self._state_head, self.state = self._snapshotter.load(self.state_store, session_id)  
         logging.debug(f"Chat history for session {session_id}: {self.chat_history}")  
   
+        self._model_contexts: List[ChatCompletionContext] = []  
+        self.llm_usage = LlmUsage()  
+        self.last_turn_stats: Optional[TurnStats] = None  
+        # Dedupes identical tool calls within a turn (or a session, see TOOL_CACHE_SCOPE)  
+        self.tool_cache = create_tool_cache(session_id)  
+        # Cuts large tool results down to their token budget (TOOL_RESULT_*)  
+        self.tool_results = create_tool_result_shaper(state_store, session_id)  
+        # Cancelled by abort_turn (client gone) or after TURN_DEADLINE_SECONDS  
+        self.cancellation_token = CancellationToken()  
+        self.turn_deadline_seconds = float(os.getenv("TURN_DEADLINE_SECONDS", "0"))  
+        self.last_turn_aborted: Optional[str] = None  
+        # Called with every message/event of a running turn (job progress)  
+        self.on_message: Optional[Callable[[Any], None]] = None  
+        # Queue position of this agent's LLM calls under the worker's rate limit ("background" for jobs and batches)  
+        self.llm_priority = "interactive"  
+        # The session's cross-worker turn lock while a turn runs (see guard_turn)  
+        self.turn_lease: Optional[StoreLease] = None  
+  
+    def guard_turn(self, lease: Optional[StoreLease]) -> None:  
+        """  
+        Tie this agent's turn to ``lease``, the session lock the scheduler  
+        holds for it: losing the lock aborts the turn, and a turn that lost  
+        it saves neither state nor history (another worker may own the  
+        session by then).  
+        """  
+        self.turn_lease = lease  
+        if lease is not None:  
+            lease.on_lost(lambda: self.abort_turn("session_lock_lost"))  
+  
+    def _check_save(self) -> None:  
+        # An aborted turn, or one whose session lock is gone, must leave the session as it was  
+        if self.turn_lease is not None and self.turn_lease.lost:  
+            self.abort_turn("session_lock_lost")  
+        if self.last_turn_aborted:  
+            raise TurnAbortedError(self.last_turn_aborted)  
+  
     def _setstate(self, state: Any) -> None:  
-        self.state_store[self.session_id] = state  
+        self._check_save()  
+        self._state_head, written = self._snapshotter.save(self.state_store, self.session_id, self._state_head, self.state, state)  
+        self.state = state  
+        logging.debug(f"Saved state for session {self.session_id}: {written} bytes this turn, {self._state_head.size_bytes} bytes total")  
   
     def append_to_chat_history(self, messages: List[Dict[str, str]]) -> None:  
+        self._check_save()  
         self.chat_history.extend(messages)  
-        self.state_store[f"{self.session_id}_chat_history"] = self.chat_history  
+        # Writes only the last history chunk and the small meta record /history's ETag is built from  
+        append_history(self.state_store, self.session_id, messages)  
+  
+    async def load_tools(self) -> List[Any]:  
+        """  
+        MCP tool adapters of MCP_SERVER_URI (from the worker's tool catalog),  
+        with every call that reaches the server traced, see ``wrap_tools``.  
+        """  
+        from autogen.tracing import trace_tools, tracer  
+  
+        with tracer.start_as_current_span("agent.load_tools") as span:  
+            start = time.perf_counter()  
+            tools = await get_tool_catalog(self.mcp_server_uri).tools()  
+            metrics.TOOL_DISCOVERY.observe(time.perf_counter() - start, agent_module=type(self).__module__)  
+            span.set_attribute("mcp.tools", len(tools))  
+        return self.wrap_tools(trace_tools(tools))  
+  
+    def wrap_tools(self, tools: List[Any]) -> List[Any]:  
+        """  
+        This session's view of shared tools: cancelled with the turn,  
+        memoized through ``self.tool_cache``, and with results over their  
+        token budget shaped by ``self.tool_results`` (which adds the tool  
+        that pages through the rows left out).  
+        """  
+        from autogen.tool_results import shape_tools  
+  
+        tools = memoize_tools(cancellable_tools(tools, self.cancellation_token), self.tool_cache)  
+        return shape_tools(tools, self.tool_results)  
+  
+    def tools_for(self, agent_name: str, tools: List[Any]) -> List[Any]:  
+        """Subset of ``tools`` declared for ``agent_name`` in ``agent_tool_domains``."""  
+        domains = self.agent_tool_domains.get(agent_name)  
+        if not domains or os.getenv("TOOL_PARTITIONING", "on").lower() != "on":  
+            return tools  
+        if self.template is not None:  
+            return self.template.tools_for(agent_name, tools, domains)  
+        return select_tools(tools, domains, agent_name)  
+  
+    def handoffs(self, *targets: str) -> List[Any]:  
+        """Handoffs to ``targets`` for an AssistantAgent; their tools are shared through the team template."""  
+        if self.template is None:  
+            return list(targets)  
+        return self.template.handoffs(targets)  
+  
+    def memory(self) -> List[Any]:  
+        """  
+        ``memory=`` for the AssistantAgent that receives the user's message:  
+        the memories of ``self.user_id`` most relevant to it, within  
+        MEMORY_TOKEN_BUDGET (empty when USER_MEMORY=off).  
+        """  
+        from autogen.vector_memory import get_user_memory  
+  
+        user_memory = get_user_memory(self.user_id)  
+        return [] if user_memory is None else [user_memory]  
+  
+    def model_for(self, role: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:  
+        """(deployment, model) of agent ``role``, see ``role_deployments``; the default deployment otherwise."""  
+        spec = {**self.role_deployments, **role_deployments_from_env()}.get(role or "")  
+        if not spec:  
+            return self.azure_deployment, self.openai_model_name  
+        deployment, _, model = spec.partition(":")  
+        if deployment == self.azure_deployment:  
+            return deployment, model or self.openai_model_name  
+        return deployment, model or deployment  
+  
+    def create_model_client(self, role: Optional[str] = None) -> UsageTrackingChatCompletionClient:  
+        """  
+        Azure OpenAI client for ``role`` of this agent's team (the default  
+        deployment unless ``model_for`` tiers the role), sharing the worker's  
+        connection pool. Calls are counted in ``self.llm_usage`` so every  
+        turn reports its LLM calls and tokens, traced as ``llm.create`` spans  
+        and cancelled with the turn; LLM_CACHE_MODE=record/replay serves  
+        responses from the local cache. Calls that reach Azure go through  
+        the worker's rate limiter at ``self.llm_priority``, which also owns  
+        the retries (LLM_RATE_LIMIT*).  
+        """  
+        # The openai SDK is the heaviest import of the stack; load it with the first client,  
+        # along with the client wrappers only this path uses  
+        from autogen_ext.models.openai import AzureOpenAIChatCompletionClient  
+        from autogen.llm_cache import create_cached_model_client  
+        from autogen.llm_rate_limiter import get_rate_limiter, rate_limited_model_client  
+        from autogen.tracing import TracingChatCompletionClient  
+  
+        # The rate limiter retries in coordination; the SDK must not retry on its own  
+        deployment, model = self.model_for(role)  
+        retries = {} if get_rate_limiter(deployment or "") is None else {"max_retries": 0}  
+        model_client = create_cached_model_client(  
+            lambda: rate_limited_model_client(  
+                get_shared_model_client(  
+                    (self.azure_openai_endpoint, deployment, self.api_version, model),  
+                    lambda: AzureOpenAIChatCompletionClient(  
+                        api_key=self.azure_openai_key,  
+                        azure_endpoint=self.azure_openai_endpoint,  
+                        api_version=self.api_version,  
+                        azure_deployment=deployment,  
+                        model=model,  
+                        **retries,  
+                    ),  
+                ),  
+                deployment or "",  
+                self.llm_priority,  
+            ),  
+            model=model,  
+        )  
+        return UsageTrackingChatCompletionClient(  
+            CancellableChatCompletionClient(  
+                TracingChatCompletionClient(model_client, model=model), self.cancellation_token  
+            ),  
+            self.llm_usage,  
+        )  
+  
+    def create_model_context(self, model_client: Any = None) -> Optional[ChatCompletionContext]:  
+        """  
+        Model context for one AssistantAgent, per MODEL_CONTEXT_POLICY.  
+        Each agent needs its own instance; None keeps AutoGen's default.  
+        """  
+        model_context = create_model_context(model_client)  
+        if model_context is not None:  
+            self._model_contexts.append(model_context)  
+        return model_context  
+  
+    def _context_usage(self) -> List[int]:  
+        usages = [getattr(c, "usage", None) for c in self._model_contexts]  
+        return [sum(u.tokens_sent for u in usages if u), sum(u.tokens_saved for u in usages if u)]  
+  
+    def abort_turn(self, reason: str = "cancelled") -> None:  
+        """  
+        Cancel this agent's turn: the running LLM and tool calls are cancelled  
+        and ``run_team`` raises TurnAbortedError, so the session state is not  
+        saved and stays at the previous turn.  
+        """  
+        if self.last_turn_aborted is None:  
+            self.last_turn_aborted = reason  
+        self.cancellation_token.cancel()  
+  
+    async def _run(self, team: Any, task: Any, token: CancellationToken) -> TaskResult:  
+        if self.on_message is None:  
+            return await team.run(task=task, cancellation_token=token)  
+        result = None  
+        async for item in team.run_stream(task=task, cancellation_token=token):  
+            if isinstance(item, TaskResult):  
+                result = item  
+            else:  
+                self.on_message(item)  
+        return result  
+  
+    async def run_team(self, team: Any, task: Any, cancellation_token: Optional[CancellationToken] = None) -> Any:  
+        """  
+        Run one turn of ``team`` and record its TurnStats (latency, LLM calls,  
+        tokens, tool calls and the prompt tokens trimmed by the model contexts)  
+        in the log and the /metrics registry. The turn is bounded by  
+        TURN_DEADLINE_SECONDS (0 = no deadline) and can be cut short with  
+        ``abort_turn``.  
+        """  
+        from autogen.tracing import tracer  
+  
+        token = cancellation_token or self.cancellation_token  
+        if token.is_cancelled():  
+            raise TurnAbortedError(self.last_turn_aborted or "cancelled")  
+        deadline = None  
+        if self.turn_deadline_seconds > 0:  
+            deadline = asyncio.get_running_loop().call_later(self.turn_deadline_seconds, self.abort_turn, "deadline")  
+        sent_before, saved_before = self._context_usage()  
+        usage_before = self.llm_usage.snapshot()  
+        if self.tool_cache is not None and self.tool_cache.scope == "run":  
+            self.tool_cache.clear()  
+        hits_before = self.tool_cache.hits if self.tool_cache is not None else 0  
+        shaped_before = self.tool_results.tokens_saved if self.tool_results is not None else 0  
+        with tracer.start_as_current_span("agent.turn") as span:  
+            span.set_attribute("agent.module", type(self).__module__)  
+            span.set_attribute("session.id", self.session_id)  
+            start = time.perf_counter()  
+            try:  
+                result = await self._run(team, task, token)  
+            except asyncio.CancelledError:  
+                task_cancelled = asyncio.current_task().cancelling()  
+                if not token.is_cancelled() or task_cancelled:  
+                    metrics.TURNS.inc(agent_module=type(self).__module__, outcome="error")  
+                    raise  
+                reason = self.last_turn_aborted or "cancelled"  
+                stats = TurnStats(time.perf_counter() - start, [])  
+                stats.add_llm_usage(usage_before, self.llm_usage.snapshot())  
+                self.last_turn_stats = stats  
+                metrics.observe_aborted_turn(type(self).__module__, reason, stats)  
+                span.set_attribute("turn.aborted", reason)  
+                logging.warning(f"[{type(self).__module__}] session {self.session_id} turn aborted ({reason}): {stats.as_dict()}")  
+                raise TurnAbortedError(reason) from None  
+            except BaseException:  
+                metrics.TURNS.inc(agent_module=type(self).__module__, outcome="error")  
+                raise  
+            finally:  
+                if deadline is not None:  
+                    deadline.cancel()  
+            stats = TurnStats(time.perf_counter() - start, result.messages)  
+            stats.add_llm_usage(usage_before, self.llm_usage.snapshot())  
+            stats.tool_cache_hits = (self.tool_cache.hits if self.tool_cache is not None else 0) - hits_before  
+            stats.tool_result_tokens_saved = (self.tool_results.tokens_saved if self.tool_results is not None else 0) - shaped_before  
+            sent_after, saved_after = self._context_usage()  
+            stats.context_tokens_sent = sent_after - sent_before  
+            stats.context_tokens_saved = saved_after - saved_before  
+            span.set_attributes({f"turn.{k}": v for k, v in stats.as_dict().items()})  
+        self.last_turn_stats = stats  
+        metrics.observe_turn(type(self).__module__, stats)  
+        logging.info(f"[{type(self).__module__}] session {self.session_id} turn: {stats.as_dict()}")  
+        return result  
+  
+    async def setup(self) -> None:  
+        """  
+        Build the team (tools, model client, agents) without running a turn;  
+        used to warm up a worker. Override in child class.  
+        """  
+        await self.load_tools()  
+        self.create_model_client()  
   
     async def chat_async(self, prompt: str) -> str:  
         """  
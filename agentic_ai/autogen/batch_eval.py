@@ -0,0 +1,223 @@
+import json
+import math
+import time
+import asyncio
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from autogen import metrics
+from autogen.chat_history import read_meta
+from autogen.state_store import StateStore
+from autogen.turn_scheduler import TurnAbortedError
+
+if TYPE_CHECKING:
+    from autogen.base_agent import BaseAgent
+
+ITEMS = metrics.REGISTRY.counter(
+    "agent_batch_items_total", "Batch evaluation items by outcome (ok | error | timeout)", ("agent_module", "status")
+)
+
+# (session_id, prompt, timeout) -> the agent that ran the turn and its answer
+TurnRunner = Callable[[str, str, float], Awaitable[Tuple["BaseAgent", str]]]
+
+STAT_FIELDS = ("llm_calls", "llm_cached_calls", "prompt_tokens", "completion_tokens", "tool_calls", "messages")
+
+
+def parse_items(lines: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Scenarios from JSONL: one ``{"session_id": ..., "prompt": ...}`` object
+    per line. ``id`` defaults to the line number and ``session_id`` to the
+    id; other fields (e.g. ``expected``) are copied to the result record.
+    Lines sharing a session_id are turns of one conversation, run in order.
+    """
+    items = []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"line {number}: {exc}") from None
+        if not isinstance(item, dict) or not isinstance(item.get("prompt"), str):
+            raise ValueError(f"line {number}: expected an object with a 'prompt' string")
+        item["id"] = str(item.get("id", number))
+        item["session_id"] = str(item.get("session_id", item["id"]))
+        items.append(item)
+    ids = [item["id"] for item in items]
+    if len(set(ids)) != len(ids):
+        raise ValueError("item ids must be unique")
+    return items
+
+
+def read_items(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return parse_items(f)
+
+
+def load_records(path: Path) -> Dict[str, Dict[str, Any]]:
+    """Result records already in ``path`` by item id (the last one wins)."""
+    records: Dict[str, Dict[str, Any]] = {}
+    if not path.exists():
+        return records
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by an interruption
+            records[record["id"]] = record
+    return records
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, math.ceil(q * len(values)) - 1)]
+
+
+def summarize(records: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    latencies = [r["latency_seconds"] for r in records]
+    summary: Dict[str, Any] = {
+        "items": len(records),
+        "ok": sum(1 for r in records if r["status"] == "ok"),
+        "error": sum(1 for r in records if r["status"] == "error"),
+        "timeout": sum(1 for r in records if r["status"] == "timeout"),
+        "wall_seconds": round(wall_seconds, 3),
+        "latency_mean_seconds": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "latency_p50_seconds": round(_percentile(latencies, 0.5), 3),
+        "latency_p95_seconds": round(_percentile(latencies, 0.95), 3),
+        "latency_max_seconds": round(max(latencies, default=0.0), 3),
+    }
+    for field in STAT_FIELDS:
+        summary[f"{field}_total"] = sum(r.get(field, 0) for r in records)
+    return summary
+
+
+def direct_turn_runner(agent_cls: Any, store: StateStore, grace_seconds: float = 5.0) -> TurnRunner:
+    """Runs each turn on a fresh ``agent_cls(store, session_id)`` in this process."""
+
+    async def run(session_id: str, prompt: str, timeout: float) -> Tuple["BaseAgent", str]:
+        agent = agent_cls(store, session_id)
+        agent.turn_deadline_seconds = timeout
+        agent.llm_priority = "background"
+        try:
+            # The deadline only covers team.run; this also bounds tool discovery
+            return agent, await asyncio.wait_for(agent.chat_async(prompt), timeout + grace_seconds)
+        except asyncio.TimeoutError:
+            agent.abort_turn("deadline")
+            return agent, "timed out"
+
+    return run
+
+
+async def run_item(run_turn: TurnRunner, item: Dict[str, Any], session_id: str, timeout: float) -> Dict[str, Any]:
+    """Run one scenario turn and build its result record."""
+    record = dict(item)
+    start = time.perf_counter()
+    agent = None
+    try:
+        agent, answer = await run_turn(session_id, item["prompt"], timeout)
+    except TurnAbortedError as exc:
+        answer, record["error"] = "", str(exc)
+    except Exception as exc:
+        logging.error(f"[batch] item {item['id']} failed: {exc}")
+        answer, record["error"] = "", f"{type(exc).__name__}: {exc}"
+    record["latency_seconds"] = round(time.perf_counter() - start, 3)
+
+    stats = agent.last_turn_stats if agent is not None else None
+    if agent is not None and agent.last_turn_aborted == "deadline":
+        record["status"] = "timeout"
+    elif agent is None or agent.last_turn_aborted or stats is None:
+        # Agent modules catch their errors and answer with an apology; no TurnStats means the turn failed
+        record["status"] = "error"
+        record.setdefault("error", answer)
+    else:
+        record["status"] = "ok"
+    if stats is not None:
+        record.update({field: getattr(stats, field) for field in STAT_FIELDS})
+        record["turn_latency_seconds"] = round(stats.latency_seconds, 3)
+    record["answer"] = answer
+    return record
+
+
+async def run_batch(
+    items: List[Dict[str, Any]],
+    run_turn: TurnRunner,
+    output: Path,
+    concurrency: int = 4,
+    item_timeout: float = 120.0,
+    session_prefix: str = "",
+    retry_failed: bool = False,
+    cancelled: Optional[asyncio.Event] = None,
+    on_record: Optional[Callable[[Dict[str, Any]], None]] = None,
+    agent_module: str = "",
+    store: Optional[StateStore] = None,
+) -> Dict[str, Any]:
+    """
+    Run ``items`` with at most ``concurrency`` sessions in flight, appending
+    one JSON record per item to ``output`` as it finishes. Items already in
+    ``output`` are skipped (failed ones too unless ``retry_failed``), so an
+    interrupted run resumes where it stopped. Sessions are prefixed with
+    ``session_prefix`` to keep them apart from other runs. Setting
+    ``cancelled`` stops the run after the items in flight. Returns the
+    summary of all records of ``items``.
+
+    A resumed session whose conversation is gone from ``store`` (kept by
+    the in-memory store of the interrupted process, or evicted) first
+    replays its finished turns, unrecorded, so its next turn has the same
+    context as in an uninterrupted run.
+    """
+    output.parent.mkdir(parents=True, exist_ok=True)
+    done = load_records(output)
+    finished = {
+        item_id for item_id, record in done.items() if record["status"] == "ok" or not retry_failed
+    }
+    sessions: Dict[str, List[Dict[str, Any]]] = {}
+    for item in items:
+        sessions.setdefault(item["session_id"], []).append(item)
+    queue: "asyncio.Queue[List[Dict[str, Any]]]" = asyncio.Queue()
+    for turns in sessions.values():
+        if any(item["id"] not in finished for item in turns):
+            queue.put_nowait(turns)
+    pending = sum(1 for item in items if item["id"] not in finished)
+    logging.info(f"[batch] {pending} of {len(items)} items to run ({len(items) - pending} already done)")
+
+    start = time.perf_counter()
+    with open(output, "a", encoding="utf-8") as out:
+
+        async def worker() -> None:
+            while not queue.empty():
+                turns = queue.get_nowait()
+                session_id = session_prefix + turns[0]["session_id"]
+                lost = store is not None and read_meta(store, session_id) is None
+                # Turns of one session run in order; earlier ones may be done already
+                for index, item in enumerate(turns):
+                    if cancelled is not None and cancelled.is_set():
+                        return
+                    if item["id"] in finished:
+                        continue
+                    if lost:
+                        lost = False
+                        # Only answered turns changed the conversation
+                        earlier = [t for t in turns[:index] if done[t["id"]]["status"] == "ok"]
+                        if earlier:
+                            logging.warning(f"[batch] session {session_id} lost its state: replaying {len(earlier)} finished turns")
+                            for turn in earlier:
+                                await run_item(run_turn, turn, session_id, item_timeout)
+                    record = await run_item(run_turn, item, session_id, item_timeout)
+                    if cancelled is not None and cancelled.is_set():
+                        return  # cut short by the cancel: not a result
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                    done[item["id"]] = record
+                    ITEMS.inc(agent_module=agent_module, status=record["status"])
+                    if on_record is not None:
+                        on_record(record)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    summary = summarize([done[item["id"]] for item in items if item["id"] in done], time.perf_counter() - start)
+    summary["pending"] = len(items) - summary["items"]
+    return summary
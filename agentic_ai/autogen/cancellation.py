@@ -0,0 +1,100 @@
+import asyncio
+from typing import Any, AsyncGenerator, Awaitable, List, Mapping, Optional, Sequence, TypeVar, Union
+
+from autogen_core import CancellationToken
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage
+from autogen_core.tools import BaseTool, ToolSchema
+from pydantic import BaseModel
+
+from autogen.model_clients import DelegatingChatCompletionClient
+from autogen.tool_catalog import shared_schema
+
+T = TypeVar("T")
+
+# AutoGen only links the token given to ``team.run`` to the team's output
+# queue: participants get fresh tokens per message, so their in-flight LLM and
+# tool calls keep running (and the runtime waits for them) after a cancel.
+# The wrappers below link every call to the agent's turn token instead.
+
+
+async def run_linked(awaitable: Awaitable[T], token: CancellationToken) -> T:
+    """Await ``awaitable``, cancelling it as soon as ``token`` is cancelled."""
+    if token.is_cancelled():
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise asyncio.CancelledError()
+    future = asyncio.ensure_future(awaitable)
+    token.link_future(future)
+    return await future
+
+
+class CancellableChatCompletionClient(DelegatingChatCompletionClient):
+    """Model client whose calls are cancelled together with ``token``."""
+
+    def __init__(self, inner: ChatCompletionClient, token: CancellationToken) -> None:
+        super().__init__(inner)
+        self.token = token
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        cancellation_token: Optional[CancellationToken] = None,
+        **kwargs: Any,
+    ) -> CreateResult:
+        return await run_linked(
+            self.inner.create(messages, cancellation_token=cancellation_token, **kwargs), self.token
+        )
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        cancellation_token: Optional[CancellationToken] = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        stream = self.inner.create_stream(messages, cancellation_token=cancellation_token, **kwargs)
+        while True:
+            try:
+                chunk = await run_linked(stream.__anext__(), self.token)
+            except StopAsyncIteration:
+                return
+            yield chunk
+
+
+class CancellableTool(BaseTool[BaseModel, Any]):
+    """Tool whose calls are cancelled together with ``token``."""
+
+    def __init__(self, tool: BaseTool[Any, Any], token: CancellationToken) -> None:
+        self.tool = tool
+        self.token = token
+        super().__init__(
+            args_type=tool.args_type(),
+            return_type=tool.return_type(),
+            name=tool.name,
+            description=tool.description,
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "tool":
+            raise AttributeError(name)
+        return getattr(self.tool, name)
+
+    @property
+    def schema(self) -> ToolSchema:
+        return shared_schema(self.tool)
+
+    def return_value_as_string(self, value: Any) -> str:
+        return self.tool.return_value_as_string(value)
+
+    async def run(self, args: BaseModel, cancellation_token: CancellationToken) -> Any:
+        return await run_linked(self.tool.run(args, cancellation_token), self.token)
+
+    async def run_json(
+        self, args: Mapping[str, Any], cancellation_token: CancellationToken, call_id: str | None = None
+    ) -> Any:
+        return await run_linked(self.tool.run_json(args, cancellation_token, call_id=call_id), self.token)
+
+
+def cancellable_tools(tools: List[Any], token: CancellationToken) -> List[Any]:
+    return [CancellableTool(tool, token) if isinstance(tool, BaseTool) else tool for tool in tools]
@@ -0,0 +1,67 @@
+"""
+Chat history of a session, kept in a state store as fixed-size chunks
+(``<session>_chat_history:<n>``) plus a small meta record
+(``<session>_chat_meta``) holding its length, so a turn writes only the
+last chunk and a /history page reads only the chunks it covers.
+"""
+import uuid
+from typing import Any, Dict, List, Optional
+
+# Messages per stored chunk. Changing it makes existing histories unreadable.
+CHUNK_SIZE = 50
+
+
+def meta_key(session_id: str) -> str:
+    return f"{session_id}_chat_meta"
+
+
+def chunk_key(session_id: str, n: int) -> str:
+    return f"{session_id}_chat_history:{n}"
+
+
+def read_meta(store: Any, session_id: str) -> Optional[Dict[str, Any]]:
+    """
+    The session's small history record: ``length`` (messages), and the
+    ``generation`` and ``version`` the /history ETag is built from. A reset
+    deletes it, so the next turn starts a new generation. None before the
+    first turn.
+    """
+    return store.get(meta_key(session_id), None)
+
+
+def read_history(store: Any, session_id: str, since: int = 0, limit: Optional[int] = None, meta: Optional[Dict[str, Any]] = None) -> List[Dict[str, str]]:
+    """Messages ``since``..``since + limit`` of the history, read from only the chunks covering them."""
+    meta = meta if meta is not None else read_meta(store, session_id)
+    length = meta["length"] if meta else 0
+    end = length if limit is None else min(length, since + limit)
+    if since >= end:
+        return []
+    first = since // CHUNK_SIZE
+    messages: List[Dict[str, str]] = []
+    for n in range(first, (end - 1) // CHUNK_SIZE + 1):
+        messages.extend(store.get(chunk_key(session_id, n), None) or [])
+    offset = first * CHUNK_SIZE
+    return messages[since - offset : end - offset]
+
+
+def append_history(store: Any, session_id: str, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    """Append ``messages``, rewriting only the last, partly filled chunk; returns the new meta record."""
+    meta = read_meta(store, session_id) or {"generation": uuid.uuid4().hex[:12], "version": 0, "length": 0}
+    length = meta["length"]
+    first = length // CHUNK_SIZE
+    pending = list(messages)
+    if length % CHUNK_SIZE:
+        pending = (store.get(chunk_key(session_id, first), None) or []) + pending
+    for i in range(0, len(pending), CHUNK_SIZE):
+        store.set(chunk_key(session_id, first + i // CHUNK_SIZE), pending[i : i + CHUNK_SIZE], group=session_id)
+    meta = {"generation": meta["generation"], "version": meta["version"] + 1, "length": length + len(messages)}
+    store.set(meta_key(session_id), meta, group=session_id)
+    return meta
+
+
+def delete_history(store: Any, session_id: str) -> None:
+    meta = read_meta(store, session_id)
+    if meta:
+        for n in range(-(-meta["length"] // CHUNK_SIZE)):
+            store.delete(chunk_key(session_id, n))
+    store.delete(meta_key(session_id))
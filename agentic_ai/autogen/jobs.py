@@ -0,0 +1,271 @@
+import time
+import uuid
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from autogen import metrics
+from autogen.state_store import PINNED, StateStore, StoreLease
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+TERMINAL = (SUCCEEDED, FAILED, CANCELLED)
+
+JOBS = metrics.REGISTRY.counter("agent_jobs_total", "Finished jobs by kind and status", ("agent_module", "kind", "status"))
+JOB_QUEUE_WAIT = metrics.REGISTRY.histogram(
+    "agent_job_queue_wait_seconds", "Time from job submission to a worker picking it up", ("agent_module", "kind")
+)
+JOB_DURATION = metrics.REGISTRY.histogram(
+    "agent_job_duration_seconds", "Run time of a job", ("agent_module", "kind"), (1, 5, 10, 30, 60, 120, 240, 480, 900)
+)
+
+
+class JobQueueFullError(Exception):
+    """More than ``max_queued`` jobs are waiting."""
+
+
+class JobContext:
+    """Handed to the job runner: report progress and react to cancellation."""
+
+    def __init__(self, manager: "JobManager", job: Dict[str, Any]) -> None:
+        self.manager = manager
+        self.job = job
+        self.cancelled = False
+        self._on_cancel: List[Callable[[], None]] = []
+
+    def progress(self, **fields: Any) -> None:
+        """Merge ``fields`` into the job's persisted ``progress``."""
+        self.job["progress"].update(fields, updated_at=time.time())
+        self.manager._save(self.job)
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """Call ``callback`` when the job is cancelled (at once if it already was)."""
+        if self.cancelled:
+            callback()
+        else:
+            self._on_cancel.append(callback)
+
+    def _cancel(self) -> None:
+        self.cancelled = True
+        for callback in self._on_cancel:
+            callback()
+
+
+JobRunner = Callable[[JobContext], Awaitable[Any]]
+
+
+class JobManager:
+    """
+    Runs long agent tasks in the background on a bounded pool of workers.
+
+    Jobs and their progress are persisted in a StateStore (``<kind>:<id>``),
+    each unfinished job with its own ``<kind>s:pending:<id>`` key. Several
+    managers (e.g. one per backend worker) can share a durable store: a
+    worker runs a job only while it holds the job's lease
+    (``<kind>:<id>:lease``, a ``StoreLease``), so each job runs once. ``start``
+    and, when idle, a periodic rescan pick up pending jobs nobody holds,
+    which is how jobs left queued or running by a stopped worker are resumed;
+    a job interrupted ``max_attempts`` times fails. Cancelling a job running
+    on another worker leaves a ``<kind>:<id>:cancel`` key for its rescan.
+
+    Unfinished jobs and their keys are pinned in the store; finished
+    records age out with its bounds (STATE_STORE_MAX_ENTRIES/TTL). With the
+    in-memory store jobs are lost on restart, so ``start`` warns when the
+    store is not durable.
+    """
+
+    def __init__(
+        self,
+        store: StateStore,
+        runner: JobRunner,
+        workers: int = 2,
+        max_queued: int = 100,
+        max_attempts: int = 2,
+        agent_module: str = "",
+        kind: str = "job",
+        lease_seconds: float = 30.0,
+        rescan_interval: float = 5.0,
+    ) -> None:
+        self.store = store
+        self.runner = runner
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_attempts = max_attempts
+        self.agent_module = agent_module
+        self.kind = kind
+        self.lease_seconds = lease_seconds
+        self.rescan_interval = rescan_interval
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._queued: Set[str] = set()
+        self._tasks: List["asyncio.Task[None]"] = []
+        self._running: Dict[str, JobContext] = {}
+
+    def _save(self, job: Dict[str, Any]) -> None:
+        self.store.set(f"{self.kind}:{job['id']}", job, group=None if job["status"] in TERMINAL else PINNED)
+
+    def _pending_key(self, job_id: str) -> str:
+        return f"{self.kind}s:pending:{job_id}"
+
+    def _lease(self, job_id: str) -> StoreLease:
+        return StoreLease(self.store, f"{self.kind}:{job_id}:lease", self.lease_seconds)
+
+    def _cancel_key(self, job_id: str) -> str:
+        return f"{self.kind}:{job_id}:cancel"
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(f"{self.kind}:{job_id}")
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def running(self) -> int:
+        return len(self._running)
+
+    async def start(self) -> None:
+        if not self.store.durable:
+            logging.warning(
+                f"[JobManager] {self.kind}s are kept in a non-durable store: they are lost on restart, "
+                "and are not shared between workers (set STATE_STORE_BACKEND=sqlite or redis)"
+            )
+        self._enqueue_pending()
+        self._tasks = [asyncio.create_task(self._work(), name=f"job-worker-{i}") for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._rescan(), name=f"{self.kind}-rescan"))
+
+    async def stop(self) -> None:
+        """Stop the workers. Jobs still running stay ``running`` and are retried by the next worker that picks them up."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _enqueue_pending(self) -> None:
+        """Queue the pending jobs that no worker holds a lease on."""
+        prefix = self._pending_key("")
+        for key in self.store.keys(prefix):
+            job_id = key[len(prefix):]
+            if job_id in self._queued or job_id in self._running:
+                continue
+            if self.store.get(f"{self.kind}:{job_id}:lease") is not None:
+                continue  # running on another worker
+            job = self.get(job_id)
+            if job is None or job["status"] in TERMINAL:
+                self.store.delete(key)
+                continue
+            logging.info(f"[JobManager] picked up pending {self.kind} {job_id} ({job['status']})")
+            self._queued.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def _rescan(self) -> None:
+        while True:
+            await asyncio.sleep(self.rescan_interval)
+            try:
+                for job_id, context in list(self._running.items()):
+                    if not context.cancelled and self.store.get(self._cancel_key(job_id)) is not None:
+                        context._cancel()
+                if self._queue.empty():
+                    self._enqueue_pending()
+            except Exception as exc:
+                logging.warning(f"[JobManager] {self.kind} rescan failed: {exc}")
+
+    def submit(self, **fields: Any) -> Dict[str, Any]:
+        """Queue a job; ``fields`` (e.g. session_id and prompt) are stored in its record for the runner."""
+        if self._queue.qsize() >= self.max_queued:
+            raise JobQueueFullError(f"{self._queue.qsize()} {self.kind}s are already queued")
+        job = {
+            "id": uuid.uuid4().hex,
+            **fields,
+            "status": QUEUED,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "attempts": 0,
+            "progress": {},
+            "result": None,
+            "error": None,
+        }
+        self._save(job)
+        self.store.set(self._pending_key(job["id"]), True, group=PINNED)
+        self._queued.add(job["id"])
+        self._queue.put_nowait(job["id"])
+        return job
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.get(job_id)
+        if job is None or job["status"] in TERMINAL:
+            return job
+        context = self._running.get(job_id)
+        if context is not None:
+            context._cancel()  # the runner aborts its turn; the worker records the outcome
+            return job
+        lease = self._lease(job_id)
+        if lease.try_acquire():
+            # Not running anywhere: the worker that dequeues it skips it
+            try:
+                job = self.get(job_id) or job
+                return job if job["status"] in TERMINAL else self._finish(job, CANCELLED)
+            finally:
+                await lease.release()
+        # Running on another worker: its rescan cancels the runner
+        self.store.set(self._cancel_key(job_id), True, group=PINNED)
+        return job
+
+    def _finish(self, job: Dict[str, Any], status: str, result: Any = None, error: Optional[str] = None) -> Dict[str, Any]:
+        job.update(status=status, result=result, error=error, finished_at=time.time())
+        self._save(job)
+        self.store.delete(self._pending_key(job["id"]))
+        self.store.delete(self._cancel_key(job["id"]))
+        JOBS.inc(agent_module=self.agent_module, kind=self.kind, status=status)
+        if job["started_at"]:
+            JOB_DURATION.observe(job["finished_at"] - job["started_at"], agent_module=self.agent_module, kind=self.kind)
+        return job
+
+    async def _work(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                lease = self._lease(job_id)
+                if not lease.try_acquire():
+                    continue  # claimed by another worker
+                try:
+                    await self._run(job_id)
+                finally:
+                    await lease.release()
+            finally:
+                self._queued.discard(job_id)
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        # Read under the lease: the previous holder flushed its writes when it released it
+        job = self.get(job_id)
+        if job is None or job["status"] in TERMINAL:
+            self.store.delete(self._pending_key(job_id))
+            return
+        if self.store.get(self._cancel_key(job_id)) is not None:
+            self._finish(job, CANCELLED)
+            return
+        if job["status"] == RUNNING:
+            # Its worker stopped or died mid-run
+            if job["attempts"] >= self.max_attempts:
+                self._finish(job, FAILED, error="interrupted by a restart too often")
+                return
+            logging.info(f"[JobManager] retrying interrupted {self.kind} {job_id}")
+        job.update(status=RUNNING, started_at=time.time(), attempts=job["attempts"] + 1)
+        self._save(job)
+        JOB_QUEUE_WAIT.observe(job["started_at"] - job["created_at"], agent_module=self.agent_module, kind=self.kind)
+        context = self._running[job_id] = JobContext(self, job)
+        try:
+            result = await self.runner(context)
+        except asyncio.CancelledError:
+            raise  # worker stopped: the job stays "running" and is retried by the next worker to pick it up
+        except Exception as exc:
+            if context.cancelled:
+                logging.info(f"[JobManager] {self.kind} {job_id} cancelled: {exc}")
+                self._finish(job, CANCELLED, error=str(exc))
+            else:
+                logging.error(f"[JobManager] {self.kind} {job_id} failed: {exc}")
+                self._finish(job, FAILED, error=str(exc))
+        else:
+            self._finish(job, CANCELLED if context.cancelled else SUCCEEDED, result=result)
+        finally:
+            self._running.pop(job_id, None)
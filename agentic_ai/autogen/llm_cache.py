@@ -0,0 +1,313 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, AsyncGenerator, Callable, Mapping, Optional, Sequence, Union
+
+from autogen_core import CancellationToken
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage, ModelInfo, RequestUsage
+from autogen_core.tools import Tool, ToolSchema
+from pydantic import BaseModel
+
+from autogen.model_clients import DelegatingChatCompletionClient
+from autogen.tokens import count_messages_tokens
+
+MODES = ("passthrough", "record", "replay")
+
+# Capabilities assumed when replaying without a live client to ask.
+OFFLINE_MODEL_INFO: ModelInfo = {
+    "vision": False,
+    "function_calling": True,
+    "json_output": True,
+    "structured_output": True,
+    "family": "unknown",
+}
+
+
+class LlmCacheMissError(RuntimeError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+def _tool_schema(tool: Union[Tool, ToolSchema]) -> Mapping[str, Any]:
+    return tool.schema if isinstance(tool, Tool) else tool
+
+
+def request_key(
+    messages: Sequence[LLMMessage],
+    *,
+    tools: Sequence[Union[Tool, ToolSchema]] = (),
+    tool_choice: Any = "auto",
+    json_output: Any = None,
+    extra_create_args: Optional[Mapping[str, Any]] = None,
+    model: Optional[str] = None,
+) -> str:
+    """
+    SHA-256 of the canonical JSON of everything that shapes the completion:
+    messages, tool schemas (sorted by name), tool choice, output format,
+    model and extra create args such as temperature.
+    """
+    if isinstance(json_output, type) and issubclass(json_output, BaseModel):
+        json_output = json_output.model_json_schema()
+    if isinstance(tool_choice, Tool):
+        tool_choice = tool_choice.name
+    payload = {
+        "model": model,
+        "messages": [m.model_dump() for m in messages],
+        "tools": sorted((_tool_schema(t) for t in tools), key=lambda s: s.get("name", "")),
+        "tool_choice": tool_choice,
+        "json_output": json_output,
+        "extra_create_args": dict(extra_create_args or {}),
+    }
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LlmResponseCache:
+    """
+    SQLite file of recorded completions, evicted least-recently-used once
+    the stored responses exceed ``max_bytes``. Several workers on one host
+    can share the file (WAL mode); the total size is kept in the file, so
+    writes update it instead of summing the table. Calls block: async code
+    runs them in a thread.
+    """
+
+    def __init__(self, path: str = "llm_cache.db", max_bytes: int = 256 * 1024 * 1024) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL, last_used_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used_at ON responses(last_used_at)")
+            # Running total of responses.size (summed once for files written before it existed)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS totals (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._conn.execute(
+                "INSERT OR IGNORE INTO totals VALUES ('size', (SELECT COALESCE(SUM(size), 0) FROM responses))"
+            )
+
+    def get(self, key: str) -> Optional[CreateResult]:
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE responses SET last_used_at = ? WHERE key = ?", (time.time(), key))
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        result = CreateResult.model_validate_json(row[0])
+        result.cached = True
+        return result
+
+    def put(self, key: str, result: CreateResult) -> None:
+        value = result.model_dump_json()
+        now = time.time()
+        with self._lock, self._conn:
+            # The first write takes the file's write lock, so the replaced size read next is current
+            self._conn.execute("UPDATE totals SET value = value + ? WHERE name = 'size'", (len(value),))
+            row = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE totals SET value = value - ? WHERE name = 'size'", (row[0],))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, last_used_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now),
+            )
+            self._evict()
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT value FROM totals WHERE name = 'size'").fetchone()[0]
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT value FROM totals WHERE name = 'size'").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        while total > self.max_bytes:
+            rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_used_at LIMIT 64").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                total -= size
+                evicted += 1
+        self._conn.execute("UPDATE totals SET value = ? WHERE name = 'size'", (total,))
+        logging.info(f"[LlmResponseCache] evicted {evicted} responses, {total} bytes remain")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachingChatCompletionClient(DelegatingChatCompletionClient):
+    """
+    Record/replay wrapper for any model client (agent modules get it from
+    ``BaseAgent.create_model_client``; notebooks can wrap their own client).
+
+    - ``record``: serve recorded responses, call the model on a miss and
+      record the result.
+    - ``replay``: serve recorded responses only and raise
+      ``LlmCacheMissError`` on a miss. ``inner`` may be None, so whole
+      conversations replay offline and deterministically.
+    - ``passthrough``: always call the model; the cache is not touched.
+    """
+
+    def __init__(
+        self,
+        inner: Optional[ChatCompletionClient],
+        cache: LlmResponseCache,
+        mode: str = "record",
+        model: Optional[str] = None,
+        model_info: Optional[ModelInfo] = None,
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown cache mode: {mode} (expected one of {', '.join(MODES)})")
+        super().__init__(inner)  # type: ignore[arg-type]
+        self.cache = cache
+        self.mode = mode
+        self.model = model
+        self._model_info = model_info
+        self._usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+
+    def _key(self, messages: Sequence[LLMMessage], kwargs: Mapping[str, Any]) -> str:
+        return request_key(
+            messages,
+            tools=kwargs.get("tools", ()),
+            tool_choice=kwargs.get("tool_choice", "auto"),
+            json_output=kwargs.get("json_output"),
+            extra_create_args=kwargs.get("extra_create_args"),
+            model=self.model,
+        )
+
+    def _lookup(self, key: str) -> Optional[CreateResult]:
+        result = self.cache.get(key)
+        if result is None and self.mode == "replay":
+            raise LlmCacheMissError(f"No recorded response for request {key[:12]} (LLM_CACHE_MODE=replay)")
+        if result is not None:
+            self._usage = RequestUsage(
+                prompt_tokens=self._usage.prompt_tokens + result.usage.prompt_tokens,
+                completion_tokens=self._usage.completion_tokens + result.usage.completion_tokens,
+            )
+        return result
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        cancellation_token: Optional[CancellationToken] = None,
+        **kwargs: Any,
+    ) -> CreateResult:
+        if self.mode == "passthrough":
+            return await self.inner.create(messages, cancellation_token=cancellation_token, **kwargs)
+        key = self._key(messages, kwargs)
+        result = await asyncio.to_thread(self._lookup, key)
+        if result is not None:
+            return result
+        result = await self.inner.create(messages, cancellation_token=cancellation_token, **kwargs)
+        await asyncio.to_thread(self.cache.put, key, result)
+        return result
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        cancellation_token: Optional[CancellationToken] = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        if self.mode == "passthrough":
+            async for chunk in self.inner.create_stream(messages, cancellation_token=cancellation_token, **kwargs):
+                yield chunk
+            return
+        key = self._key(messages, kwargs)
+        result = await asyncio.to_thread(self._lookup, key)
+        if result is not None:
+            if isinstance(result.content, str):
+                yield result.content
+            yield result
+            return
+        async for chunk in self.inner.create_stream(messages, cancellation_token=cancellation_token, **kwargs):
+            if isinstance(chunk, CreateResult):
+                await asyncio.to_thread(self.cache.put, key, chunk)
+            yield chunk
+
+    # Without a live client (offline replay) answer locally.
+    async def close(self) -> None:
+        if self.inner is not None:
+            await self.inner.close()
+
+    def actual_usage(self) -> RequestUsage:
+        return self.inner.actual_usage() if self.inner is not None else self._usage
+
+    def total_usage(self) -> RequestUsage:
+        return self.inner.total_usage() if self.inner is not None else self._usage
+
+    def count_tokens(self, messages: Sequence[LLMMessage], **kwargs: Any) -> int:
+        if self.inner is not None:
+            return self.inner.count_tokens(messages, **kwargs)
+        return count_messages_tokens(messages)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], **kwargs: Any) -> int:
+        if self.inner is not None:
+            return self.inner.remaining_tokens(messages, **kwargs)
+        return 128000 - count_messages_tokens(messages)
+
+    @property
+    def model_info(self) -> ModelInfo:
+        if self.inner is not None:
+            return self.inner.model_info
+        return self._model_info or OFFLINE_MODEL_INFO
+
+
+_caches: dict = {}
+
+
+def get_llm_cache(path: str, max_bytes: int) -> LlmResponseCache:
+    """One cache (and SQLite connection) per file per worker."""
+    cache = _caches.get(path)
+    if cache is None:
+        cache = _caches[path] = LlmResponseCache(path, max_bytes)
+    return cache
+
+
+def create_cached_model_client(
+    create_inner: Callable[[], ChatCompletionClient], model: Optional[str] = None
+) -> ChatCompletionClient:
+    """
+    Model client per LLM_CACHE_MODE (passthrough | record | replay), stored
+    in LLM_CACHE_PATH and capped at LLM_CACHE_MAX_MB. In replay mode a
+    client that cannot be created (no credentials offline) is not needed.
+    """
+    mode = os.getenv("LLM_CACHE_MODE", "passthrough").lower()
+    if mode not in MODES:
+        raise ValueError(f"Unknown LLM_CACHE_MODE: {mode} (expected one of {', '.join(MODES)})")
+    if mode == "passthrough":
+        return create_inner()
+    cache = get_llm_cache(
+        os.getenv("LLM_CACHE_PATH", "llm_cache.db"),
+        int(float(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024),
+    )
+    inner: Optional[ChatCompletionClient]
+    try:
+        inner = create_inner()
+    except Exception as exc:
+        if mode != "replay":
+            raise
+        logging.info(f"[LlmResponseCache] replaying without a live model client: {exc}")
+        inner = None
+    return CachingChatCompletionClient(inner, cache, mode=mode, model=model)
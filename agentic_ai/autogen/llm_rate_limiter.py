@@ -0,0 +1,384 @@
+import os
+import time
+import heapq
+import random
+import asyncio
+import logging
+import itertools
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncGenerator, Dict, List, Optional, Sequence, Tuple, Union
+
+from autogen_core import CancellationToken
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage
+from autogen_core.tools import Tool, ToolSchema
+
+from autogen import metrics
+from autogen.model_clients import DelegatingChatCompletionClient
+from autogen.tokens import count_messages_tokens, count_schema_tokens
+from autogen.tool_catalog import shared_schema
+
+# Lower runs first: /chat turns ahead of jobs and batch evaluation
+PRIORITIES = {"interactive": 0, "background": 1}
+
+LLM_QUEUE_WAIT = metrics.REGISTRY.histogram(
+    "agent_llm_queue_wait_seconds", "Time an LLM call waited for the deployment's rate limit", ("deployment", "priority")
+)
+LLM_THROTTLED = metrics.REGISTRY.counter(
+    "agent_llm_throttled_total", "429 responses from the model deployment", ("deployment",)
+)
+LLM_RETRIES = metrics.REGISTRY.counter(
+    "agent_llm_retries_total", "LLM calls retried (reason: throttled | transient)", ("deployment", "reason")
+)
+LLM_GAVE_UP = metrics.REGISTRY.counter(
+    "agent_llm_retries_exhausted_total", "LLM calls failed after LLM_MAX_RETRIES retries", ("deployment",)
+)
+
+
+class TokenBucket:
+    """
+    ``per_minute`` units refilled continuously, holding at most
+    ``burst_seconds`` worth (Azure enforces its per-minute quotas over
+    1 or 10 second windows, so calls must be spread out rather than sent
+    in bursts). The level can go negative when actual usage exceeds what
+    was reserved. ``adapt`` scales the refill rate between half and all of
+    ``per_minute``.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = 1.0) -> None:
+        self.rate = self.max_rate = per_minute / 60
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` (at most a full bucket) can be taken."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= amount
+
+    def drain(self, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.level, 0.0)
+
+    def adapt(self, factor: float) -> None:
+        self.rate = min(self.max_rate, max(self.max_rate / 2, self.rate * factor))
+
+
+class _Waiter:
+    __slots__ = ("tokens", "priority", "future", "enqueued_at")
+
+    def __init__(self, tokens: int, priority: str, future: "asyncio.Future[None]") -> None:
+        self.tokens = tokens
+        self.priority = priority
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class LlmRateLimiter:
+    """
+    Admission control for the LLM calls of one deployment in one worker,
+    shared by every session and agent:
+
+    - token buckets for requests (``rpm``) and estimated tokens (``tpm``);
+      0 leaves that dimension unlimited. Estimates are corrected with the
+      actual usage when a call returns.
+    - waiting calls are served strictly by priority (``PRIORITIES``), then
+      in arrival order; the head of the queue is never overtaken, so a
+      large interactive call is not starved by small background ones.
+    - a 429 pauses the whole deployment until its Retry-After (plus
+      jitter, so workers do not all resume at once) instead of each caller
+      retrying on its own, and slows the buckets down by 10%; successful
+      calls speed them up again (0.2% each) up to the configured quota, so
+      a quota set slightly too high converges instead of hitting 429s.
+    """
+
+    def __init__(
+        self,
+        deployment: str = "",
+        rpm: float = 0,
+        tpm: float = 0,
+        burst_seconds: float = 1.0,
+        max_concurrent: int = 0,
+        max_jitter_seconds: float = 0.5,
+    ) -> None:
+        self.deployment = deployment
+        self.requests = TokenBucket(rpm, burst_seconds) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm, burst_seconds) if tpm > 0 else None
+        self.max_concurrent = max_concurrent
+        self.max_jitter_seconds = max_jitter_seconds
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._queue: List[Tuple[int, int, _Waiter]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def queued(self, priority: Optional[str] = None) -> int:
+        return sum(1 for _, _, w in self._queue if not w.future.done() and priority in (None, w.priority))
+
+    def _delay(self, waiter: _Waiter, now: float) -> float:
+        delay = self.paused_until - now
+        if self.requests is not None:
+            delay = max(delay, self.requests.delay(1, now))
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.delay(waiter.tokens, now))
+        return delay
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._queue:
+            waiter = self._queue[0][2]
+            if waiter.future.done():  # cancelled while waiting
+                heapq.heappop(self._queue)
+                continue
+            if self.max_concurrent and self.in_flight >= self.max_concurrent:
+                return  # release() dispatches again
+            now = time.monotonic()
+            delay = self._delay(waiter, now)
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            heapq.heappop(self._queue)
+            if self.requests is not None:
+                self.requests.take(1, now)
+            if self.tokens is not None:
+                self.tokens.take(waiter.tokens, now)
+            self.in_flight += 1
+            waiter.future.set_result(None)
+
+    async def acquire(self, tokens: int, priority: str = "interactive") -> float:
+        """Wait until a call of about ``tokens`` tokens may be sent; returns the seconds waited."""
+        waiter = _Waiter(tokens, priority, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._queue, (PRIORITIES.get(priority, 0), next(self._seq), waiter))
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(tokens, tokens)  # got the slot just as the turn was cancelled
+            raise
+        waited = time.perf_counter() - waiter.enqueued_at
+        LLM_QUEUE_WAIT.observe(waited, deployment=self.deployment, priority=priority)
+        return waited
+
+    def _buckets(self) -> List[TokenBucket]:
+        return [b for b in (self.requests, self.tokens) if b is not None]
+
+    def release(self, reserved: int, used: Optional[int] = None, ok: bool = False) -> None:
+        """A call is done (``ok``: answered); ``used`` tokens (if known) replace the ``reserved`` estimate."""
+        self.in_flight -= 1
+        if self.tokens is not None and used is not None:
+            self.tokens.level -= used - reserved
+        if ok:
+            for bucket in self._buckets():
+                bucket.adapt(1.002)
+        self._dispatch()
+
+    def throttled(self, retry_after: float) -> float:
+        """The deployment answered 429: pause every caller for ``retry_after`` plus jitter; returns the pause."""
+        pause = retry_after + random.uniform(0, self.max_jitter_seconds)
+        now = time.monotonic()
+        self.paused_until = max(self.paused_until, now + pause)
+        for bucket in self._buckets():
+            bucket.drain(now)
+            bucket.adapt(0.9)
+        LLM_THROTTLED.inc(deployment=self.deployment)
+        logging.info(f"[LlmRateLimiter] {self.deployment} throttled, pausing calls for {pause:.2f}s")
+        return pause
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Retry-After of a 429 (``retry-after-ms``, seconds or an HTTP date), None if absent."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def classify_error(exc: BaseException) -> Optional[str]:
+    """"throttled" (429), "transient" (what the openai SDK would retry) or None (not retryable)."""
+    status = getattr(exc, "status_code", None)
+    if status == 429:
+        return "throttled"
+    if status in (408, 409) or (isinstance(status, int) and status >= 500):
+        return "transient"
+    if any(cls.__name__ in ("APIConnectionError", "APITimeoutError") for cls in type(exc).__mro__):
+        return "transient"
+    return None
+
+
+class RateLimitedChatCompletionClient(DelegatingChatCompletionClient):
+    """
+    Sends every call through the deployment's LlmRateLimiter at
+    ``priority`` and retries throttled and transient failures (up to
+    ``max_retries``): after a 429 once the limiter's pause is over, after
+    anything else with exponential backoff and full jitter. The inner
+    client should not retry by itself (``max_retries=0``).
+    """
+
+    def __init__(
+        self,
+        inner: ChatCompletionClient,
+        limiter: LlmRateLimiter,
+        priority: str = "interactive",
+        max_retries: int = 6,
+        expected_completion_tokens: int = 300,
+        backoff_seconds: float = 1.0,
+        max_backoff_seconds: float = 30.0,
+    ) -> None:
+        super().__init__(inner)
+        self.limiter = limiter
+        self.priority = priority
+        self.max_retries = max_retries
+        self.expected_completion_tokens = expected_completion_tokens
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+    def estimate_tokens(self, messages: Sequence[LLMMessage], tools: Sequence[Union[Tool, ToolSchema]], extra_create_args: Dict[str, Any]) -> int:
+        schemas = [shared_schema(tool) if isinstance(tool, Tool) else tool for tool in tools]
+        completion = extra_create_args.get("max_tokens") or extra_create_args.get("max_completion_tokens") or self.expected_completion_tokens
+        return count_messages_tokens(messages) + count_schema_tokens(schemas) + int(completion)
+
+    async def _backoff(self, exc: BaseException, attempt: int) -> None:
+        reason = classify_error(exc)
+        if reason is None or attempt >= self.max_retries:
+            if reason is not None:
+                LLM_GAVE_UP.inc(deployment=self.limiter.deployment)
+            raise exc
+        LLM_RETRIES.inc(deployment=self.limiter.deployment, reason=reason)
+        if reason == "throttled":
+            retry_after = retry_after_seconds(exc)
+            if retry_after is None:
+                retry_after = random.uniform(0, min(self.max_backoff_seconds, self.backoff_seconds * 2**attempt))
+            self.limiter.throttled(retry_after)  # the queue waits it out
+        else:
+            await asyncio.sleep(random.uniform(0, min(self.max_backoff_seconds, self.backoff_seconds * 2**attempt)))
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Union[Tool, ToolSchema]] = [],
+        extra_create_args: Dict[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+        **kwargs: Any,
+    ) -> CreateResult:
+        reserved = self.estimate_tokens(messages, tools, extra_create_args)
+        for attempt in itertools.count():
+            await self.limiter.acquire(reserved, self.priority)
+            try:
+                result = await self.inner.create(
+                    messages, tools=tools, extra_create_args=extra_create_args, cancellation_token=cancellation_token, **kwargs
+                )
+            except Exception as exc:
+                self.limiter.release(reserved, 0 if classify_error(exc) else None)
+                await self._backoff(exc, attempt)
+                continue
+            except BaseException:
+                self.limiter.release(reserved)
+                raise
+            self.limiter.release(reserved, result.usage.prompt_tokens + result.usage.completion_tokens, ok=True)
+            return result
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Union[Tool, ToolSchema]] = [],
+        extra_create_args: Dict[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        reserved = self.estimate_tokens(messages, tools, extra_create_args)
+        for attempt in itertools.count():
+            await self.limiter.acquire(reserved, self.priority)
+            used: Optional[int] = None
+            started = False
+            try:
+                async for chunk in self.inner.create_stream(
+                    messages, tools=tools, extra_create_args=extra_create_args, cancellation_token=cancellation_token, **kwargs
+                ):
+                    started = True
+                    if isinstance(chunk, CreateResult):
+                        used = chunk.usage.prompt_tokens + chunk.usage.completion_tokens
+                    yield chunk
+            except Exception as exc:
+                self.limiter.release(reserved, 0 if classify_error(exc) and not started else None)
+                if started:
+                    raise  # part of the answer is out; a retry would repeat it
+                await self._backoff(exc, attempt)
+                continue
+            except BaseException:
+                self.limiter.release(reserved)
+                raise
+            self.limiter.release(reserved, used, ok=True)
+            return
+
+
+_limiters: Dict[str, LlmRateLimiter] = {}
+
+metrics.REGISTRY.gauge(
+    "agent_llm_queued_calls", "LLM calls waiting for the deployment's rate limit", ("deployment", "priority"),
+    callback=lambda: {(d, p): limiter.queued(p) for d, limiter in _limiters.items() for p in PRIORITIES},
+)
+metrics.REGISTRY.gauge(
+    "agent_llm_in_flight_calls", "LLM calls sent and not yet answered", ("deployment",),
+    callback=lambda: {(d,): limiter.in_flight for d, limiter in _limiters.items()},
+)
+
+
+def get_rate_limiter(deployment: str) -> Optional[LlmRateLimiter]:
+    """
+    The worker's limiter for ``deployment``, or None when LLM_RATE_LIMIT=off.
+
+    LLM_RATE_LIMIT_RPM / _TPM         this worker's share of the quota (0 = only react to 429s)
+    LLM_RATE_LIMIT_BURST_SECONDS      bucket size in seconds of quota (default 1)
+    LLM_MAX_CONCURRENT_REQUESTS       calls in flight at once (0 = unlimited)
+    LLM_RETRY_JITTER_SECONDS          random extra pause after a 429 (default 0.5)
+    """
+    if os.getenv("LLM_RATE_LIMIT", "on").lower() != "on":
+        return None
+    limiter = _limiters.get(deployment)
+    if limiter is None:
+        limiter = _limiters[deployment] = LlmRateLimiter(
+            deployment,
+            rpm=float(os.getenv("LLM_RATE_LIMIT_RPM", "0")),
+            tpm=float(os.getenv("LLM_RATE_LIMIT_TPM", "0")),
+            burst_seconds=float(os.getenv("LLM_RATE_LIMIT_BURST_SECONDS", "1")),
+            max_concurrent=int(os.getenv("LLM_MAX_CONCURRENT_REQUESTS", "0")),
+            max_jitter_seconds=float(os.getenv("LLM_RETRY_JITTER_SECONDS", "0.5")),
+        )
+    return limiter
+
+
+def rate_limited_model_client(inner: ChatCompletionClient, deployment: str, priority: str = "interactive") -> ChatCompletionClient:
+    """``inner`` behind the worker's limiter for ``deployment`` (unchanged when LLM_RATE_LIMIT=off)."""
+    limiter = get_rate_limiter(deployment)
+    if limiter is None:
+        return inner
+    return RateLimitedChatCompletionClient(
+        inner,
+        limiter,
+        priority=priority,
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "6")),
+        expected_completion_tokens=int(os.getenv("LLM_EXPECTED_COMPLETION_TOKENS", "300")),
+    )
@@ -0,0 +1,283 @@
+import bisect
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from autogen.turn_stats import TurnStats
+
+# Latency buckets (seconds) covering a single LLM call up to a long multi-agent turn.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Mapping[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Set directly, or computed at scrape time by ``callback`` (label values -> value)."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], Mapping[Tuple[str, ...], float]]] = None,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self.callback = callback
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        if self.callback is not None:
+            values.update(self.callback())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in values.items()]
+
+
+class Histogram(_Metric):
+    """Cumulative buckets plus ``_sum``/``_count``, as Prometheus expects (p95 via histogram_quantile)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def sum_count(self, **labels: str) -> Tuple[float, int]:
+        series = self._values.get(self._key(labels))
+        return (series[-1], sum(series[:-1])) if series else (0.0, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series[:-1]):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class CounterMap(_Metric):
+    """Exposes an existing ``collections.Counter`` (e.g. a class-level ``totals``) as one counter family."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelname: str, counts: Mapping[str, float], **const_labels: str) -> None:
+        super().__init__(name, help, tuple(const_labels) + (labelname,))
+        self.counts = counts
+        self.const_labels = tuple(const_labels.values())
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_labels(self.labelnames, self.const_labels + (k,))} {_number(v)}"
+            for k, v in list(self.counts.items())
+        ]
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: "OrderedDict[str, _Metric]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Register ``metric``; an already registered name returns the existing one."""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))  # type: ignore[return-value]
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = (), callback=None) -> Gauge:
+        return self.register(Gauge(name, help, labelnames, callback))  # type: ignore[return-value]
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))  # type: ignore[return-value]
+
+    def render(self) -> str:
+        """Text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            samples = metric.samples()
+            if samples:
+                lines.extend(metric.header())
+                lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Process-wide registry rendered by backend.py's /metrics.
+REGISTRY = MetricsRegistry()
+
+
+class ActiveSessions:
+    """Sessions that ran a turn within the last ``window_seconds``."""
+
+    def __init__(self, window_seconds: float = 900) -> None:
+        self.window_seconds = window_seconds
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def touch(self, session_id: str) -> None:
+        with self._lock:
+            self._seen[session_id] = time.monotonic()
+            self._seen.move_to_end(session_id)
+
+    def count(self) -> int:
+        cutoff = time.monotonic() - self.window_seconds
+        with self._lock:
+            while self._seen and next(iter(self._seen.values())) < cutoff:
+                self._seen.popitem(last=False)
+            return len(self._seen)
+
+
+# Updated by BaseAgent for every turn, labelled with the agent module.
+TURNS = REGISTRY.counter("agent_turns_total", "Agent turns run, by outcome (ok | error | aborted)", ("agent_module", "outcome"))
+TURN_LATENCY = REGISTRY.histogram("agent_turn_latency_seconds", "Wall time of one agent turn", ("agent_module",))
+TURN_TOKENS = REGISTRY.histogram(
+    "agent_turn_tokens", "LLM tokens per turn (kind: prompt | completion)", ("agent_module", "kind"), TOKEN_BUCKETS
+)
+TURN_LLM_CALLS = REGISTRY.histogram("agent_turn_llm_calls", "LLM calls per turn", ("agent_module",), COUNT_BUCKETS)
+TURN_TOOL_CALLS = REGISTRY.histogram("agent_turn_tool_calls", "Tool calls per turn", ("agent_module",), COUNT_BUCKETS)
+LLM_TOKENS = REGISTRY.counter("agent_llm_tokens_total", "LLM tokens (kind: prompt | completion)", ("agent_module", "kind"))
+LLM_CALLS = REGISTRY.counter("agent_llm_calls_total", "LLM calls (cached: true | false)", ("agent_module", "cached"))
+TOOL_CALLS = REGISTRY.counter("agent_tool_calls_total", "Tool calls requested by the agents", ("agent_module",))
+TOOL_CACHE_HITS = REGISTRY.counter("agent_tool_cache_hits_total", "Tool calls served from the tool-call cache", ("agent_module",))
+TOOL_RESULT_TOKENS_SAVED = REGISTRY.counter(
+    "agent_tool_result_tokens_saved_total", "Tokens cut from tool results over their budget before they reach the model", ("agent_module",)
+)
+TURNS_ABORTED = REGISTRY.counter(
+    "agent_turns_aborted_total", "Turns cancelled before completion (reason: client_disconnected | deadline | ...)", ("agent_module", "reason")
+)
+ABORTED_TOKENS_SPENT = REGISTRY.counter(
+    "agent_aborted_turn_tokens_spent_total", "LLM tokens spent by aborted turns before they were cancelled", ("agent_module",)
+)
+ABORTED_TOKENS_SAVED = REGISTRY.counter(
+    "agent_aborted_turn_tokens_saved_total",
+    "Estimated LLM tokens not spent thanks to aborts (mean tokens of a completed turn minus tokens spent)",
+    ("agent_module",),
+)
+TOOL_DISCOVERY = REGISTRY.histogram("agent_tool_discovery_seconds", "Time to fetch the MCP tool list", ("agent_module",))
+
+
+def observe_turn(agent_module: str, stats: "TurnStats") -> None:
+    TURNS.inc(agent_module=agent_module, outcome="ok")
+    TURN_LATENCY.observe(stats.latency_seconds, agent_module=agent_module)
+    TURN_TOKENS.observe(stats.prompt_tokens, agent_module=agent_module, kind="prompt")
+    TURN_TOKENS.observe(stats.completion_tokens, agent_module=agent_module, kind="completion")
+    TURN_LLM_CALLS.observe(stats.llm_calls, agent_module=agent_module)
+    TURN_TOOL_CALLS.observe(stats.tool_calls, agent_module=agent_module)
+    LLM_TOKENS.inc(stats.prompt_tokens, agent_module=agent_module, kind="prompt")
+    LLM_TOKENS.inc(stats.completion_tokens, agent_module=agent_module, kind="completion")
+    LLM_CALLS.inc(stats.llm_calls - stats.llm_cached_calls, agent_module=agent_module, cached="false")
+    LLM_CALLS.inc(stats.llm_cached_calls, agent_module=agent_module, cached="true")
+    TOOL_CALLS.inc(stats.tool_calls, agent_module=agent_module)
+    TOOL_CACHE_HITS.inc(stats.tool_cache_hits, agent_module=agent_module)
+    TOOL_RESULT_TOKENS_SAVED.inc(stats.tool_result_tokens_saved, agent_module=agent_module)
+
+
+def register_counter_map(name: str, help: str, labelname: str, counts: Mapping[str, float], agent_module: str) -> None:
+    REGISTRY.register(CounterMap(name, help, labelname, counts, agent_module=agent_module))
+
+
+def observe_aborted_turn(agent_module: str, reason: str, stats: "TurnStats") -> None:
+    TURNS.inc(agent_module=agent_module, outcome="aborted")
+    TURNS_ABORTED.inc(agent_module=agent_module, reason=reason)
+    spent = stats.prompt_tokens + stats.completion_tokens
+    ABORTED_TOKENS_SPENT.inc(spent, agent_module=agent_module)
+    prompt_sum, count = TURN_TOKENS.sum_count(agent_module=agent_module, kind="prompt")
+    completion_sum, _ = TURN_TOKENS.sum_count(agent_module=agent_module, kind="completion")
+    if count:
+        ABORTED_TOKENS_SAVED.inc(max(0.0, (prompt_sum + completion_sum) / count - spent), agent_module=agent_module)
@@ -0,0 +1,157 @@
+import os
+import time
+import logging
+from functools import lru_cache
+from typing import Any, AsyncGenerator, Callable, Dict, Hashable, Optional, Sequence, Union
+
+from autogen_core import CancellationToken
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage, ModelInfo, RequestUsage
+
+
+class DelegatingChatCompletionClient(ChatCompletionClient):
+    """
+    Wraps another model client and forwards every call to it. Subclasses
+    override ``create``/``create_stream`` to add behaviour around the call;
+    wrappers can be stacked.
+    """
+
+    def __init__(self, inner: ChatCompletionClient) -> None:
+        self.inner = inner
+
+    async def create(self, messages: Sequence[LLMMessage], **kwargs: Any) -> CreateResult:
+        return await self.inner.create(messages, **kwargs)
+
+    def create_stream(self, messages: Sequence[LLMMessage], **kwargs: Any) -> AsyncGenerator[Union[str, CreateResult], None]:
+        return self.inner.create_stream(messages, **kwargs)
+
+    async def close(self) -> None:
+        await self.inner.close()
+
+    def actual_usage(self) -> RequestUsage:
+        return self.inner.actual_usage()
+
+    def total_usage(self) -> RequestUsage:
+        return self.inner.total_usage()
+
+    def count_tokens(self, messages: Sequence[LLMMessage], **kwargs: Any) -> int:
+        return self.inner.count_tokens(messages, **kwargs)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], **kwargs: Any) -> int:
+        return self.inner.remaining_tokens(messages, **kwargs)
+
+    @property
+    def capabilities(self) -> Any:  # deprecated in AutoGen, kept for the ABC
+        return self.inner.model_info
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self.inner.model_info
+
+
+class LlmUsage:
+    """Counters for model calls made through a UsageTrackingChatCompletionClient."""
+
+    __slots__ = ("calls", "prompt_tokens", "completion_tokens", "latency_seconds", "cached_calls")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.cached_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latency_seconds = 0.0
+
+    def record(self, result: CreateResult, latency_seconds: float) -> None:
+        self.calls += 1
+        self.cached_calls += int(result.cached)
+        self.prompt_tokens += result.usage.prompt_tokens
+        self.completion_tokens += result.usage.completion_tokens
+        self.latency_seconds += latency_seconds
+
+    def snapshot(self) -> tuple:
+        return (self.calls, self.prompt_tokens, self.completion_tokens, self.latency_seconds, self.cached_calls)
+
+
+class UsageTrackingChatCompletionClient(DelegatingChatCompletionClient):
+    """
+    Counts every model call, including ones that leave no message in the
+    team's output (e.g. SelectorGroupChat speaker selection).
+    """
+
+    def __init__(self, inner: ChatCompletionClient, usage: Optional[LlmUsage] = None) -> None:
+        super().__init__(inner)
+        self.usage = usage or LlmUsage()
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        cancellation_token: Optional[CancellationToken] = None,
+        **kwargs: Any,
+    ) -> CreateResult:
+        start = time.perf_counter()
+        result = await self.inner.create(messages, cancellation_token=cancellation_token, **kwargs)
+        self.usage.record(result, time.perf_counter() - start)
+        return result
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        cancellation_token: Optional[CancellationToken] = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        start = time.perf_counter()
+        async for chunk in self.inner.create_stream(messages, cancellation_token=cancellation_token, **kwargs):
+            if isinstance(chunk, CreateResult):
+                self.usage.record(chunk, time.perf_counter() - start)
+            yield chunk
+
+
+def role_deployments_from_env() -> Dict[str, str]:
+    """
+    AGENT_ROLE_DEPLOYMENTS as a dict, e.g.
+    "selector=gpt-4o-mini,critic=gpt-4o-mini,coordinator=mini-prod:gpt-4o-mini"
+    -> {"selector": "gpt-4o-mini", ...}: agent role -> "deployment[:model]".
+    """
+    return _parse_role_deployments(os.getenv("AGENT_ROLE_DEPLOYMENTS", ""))
+
+
+@lru_cache(maxsize=8)
+def _parse_role_deployments(value: str) -> Dict[str, str]:
+    roles = {}
+    for entry in value.split(","):
+        role, _, spec = entry.partition("=")
+        if role.strip() and spec.strip():
+            roles[role.strip()] = spec.strip()
+        elif entry.strip():
+            logging.warning(f"[model_clients] ignoring AGENT_ROLE_DEPLOYMENTS entry {entry.strip()!r} (expected role=deployment[:model])")
+    return roles
+
+
+_shared_clients: Dict[Hashable, ChatCompletionClient] = {}
+
+
+def get_shared_model_client(key: Hashable, create: Callable[[], ChatCompletionClient]) -> ChatCompletionClient:
+    """
+    One model client (and HTTP connection pool) per configuration per worker,
+    instead of a new client, pool and TLS handshake for every request.
+    Callers must not close it; ``close_shared_model_clients`` does on shutdown.
+    """
+    client = _shared_clients.get(key)
+    if client is None:
+        client = _shared_clients[key] = create()
+    return client
+
+
+def shared_model_clients() -> list:
+    return list(_shared_clients.values())
+
+
+async def close_shared_model_clients() -> None:
+    clients = list(_shared_clients.values())
+    _shared_clients.clear()
+    for client in clients:
+        try:
+            await client.close()
+        except Exception as exc:
+            logging.warning(f"[model_clients] closing {type(client).__name__} failed: {exc}")
@@ -0,0 +1,263 @@
+import os
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence
+
+from autogen_core.model_context import ChatCompletionContext, HeadAndTailChatCompletionContext
+from autogen_core.models import (
+    ChatCompletionClient,
+    FunctionExecutionResultMessage,
+    LLMMessage,
+    SystemMessage,
+    UserMessage,
+)
+
+from autogen.tokens import count_message_tokens, count_tokens
+
+Summarizer = Callable[[Sequence[LLMMessage]], Awaitable[str]]
+
+SUMMARY_SOURCE = "summary"
+SUMMARY_HEADER = "[Summary of earlier conversation]"
+
+
+class ContextUsage:
+    """Running totals of what a model context sent versus what it held."""
+
+    __slots__ = ("calls", "tokens_full", "tokens_sent")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.tokens_full = 0
+        self.tokens_sent = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_full - self.tokens_sent
+
+
+class _UsageTracking:
+    """
+    Mixin that counts the tokens of the full history and of the window
+    actually returned by ``get_messages``. Counts are cached per message, so
+    the cost per call is proportional to the new messages only.
+    """
+
+    usage: ContextUsage
+    _messages: List[LLMMessage]
+
+    def _init_usage(self) -> None:
+        self.usage = ContextUsage()
+        self._token_cache: Dict[int, Any] = {}
+
+    def _tokens(self, messages: Sequence[LLMMessage]) -> int:
+        total = 0
+        for message in messages:
+            cached = self._token_cache.get(id(message))
+            if cached is None or cached[0] is not message:
+                cached = (message, count_message_tokens(message))
+                self._token_cache[id(message)] = cached
+            total += cached[1]
+        return total
+
+    def _record(self, sent: Sequence[LLMMessage], extra_full_tokens: int = 0) -> None:
+        self.usage.calls += 1
+        self.usage.tokens_full += self._tokens(self._messages) + extra_full_tokens
+        self.usage.tokens_sent += self._tokens(sent)
+        if len(self._token_cache) > 4 * len(self._messages) + 64:
+            live = {id(m) for m in self._messages}
+            self._token_cache = {k: v for k, v in self._token_cache.items() if k in live}
+
+
+def _drop_orphaned_results(messages: List[LLMMessage]) -> List[LLMMessage]:
+    # A window must not start with tool results whose calls were cut off.
+    start = 0
+    while start < len(messages) - 1 and isinstance(messages[start], FunctionExecutionResultMessage):
+        start += 1
+    return messages[start:]
+
+
+def _tail_start(messages: Sequence[LLMMessage], budget: int, tokens: Callable[[Sequence[LLMMessage]], int]) -> int:
+    """Index of the oldest message such that ``messages[index:]`` fits ``budget`` (keeps at least one)."""
+    used = 0
+    for index in range(len(messages) - 1, -1, -1):
+        used += tokens(messages[index : index + 1])
+        if used > budget:
+            return min(index + 1, len(messages) - 1)
+    return 0
+
+
+class TokenBudgetChatCompletionContext(_UsageTracking, ChatCompletionContext):
+    """
+    Sends the most recent messages that fit in ``token_limit`` tokens.
+    The full history is still kept (and persisted) so the window can be
+    widened later without losing anything.
+    """
+
+    def __init__(self, token_limit: int, initial_messages: Optional[List[LLMMessage]] = None) -> None:
+        super().__init__(initial_messages)
+        if token_limit <= 0:
+            raise ValueError("token_limit must be greater than 0.")
+        self.token_limit = token_limit
+        self._init_usage()
+
+    async def get_messages(self) -> List[LLMMessage]:
+        start = _tail_start(self._messages, self.token_limit, self._tokens)
+        window = _drop_orphaned_results(self._messages[start:])
+        self._record(window)
+        return window
+
+
+class HeadTailChatCompletionContext(_UsageTracking, HeadAndTailChatCompletionContext):
+    """AutoGen's head-plus-tail window with token savings reporting."""
+
+    def __init__(self, head_size: int, tail_size: int, initial_messages: Optional[List[LLMMessage]] = None) -> None:
+        super().__init__(head_size, tail_size, initial_messages)
+        self._init_usage()
+
+    async def get_messages(self) -> List[LLMMessage]:
+        window = await super().get_messages()
+        self._record(window)
+        return window
+
+
+async def extractive_summarizer(messages: Sequence[LLMMessage], max_tokens: int = 400, max_chars_per_message: int = 200) -> str:
+    """
+    Local, deterministic summary: one clipped line per message, newest lines
+    kept first when the budget runs out. Needs no model call.
+    """
+    lines: List[str] = []
+    for message in messages:
+        content = message.content
+        if getattr(message, "source", None) == SUMMARY_SOURCE and isinstance(content, str):
+            lines.append(content.replace(SUMMARY_HEADER, "").strip())
+            continue
+        if isinstance(message, FunctionExecutionResultMessage):
+            text = "tool results: " + "; ".join(r.content for r in content)
+        elif isinstance(content, list):
+            text = "tool calls: " + ", ".join(getattr(c, "name", "?") for c in content)
+        else:
+            text = str(content)
+        text = " ".join(text.split())
+        if len(text) > max_chars_per_message:
+            text = text[:max_chars_per_message] + "…"
+        lines.append(f"- {getattr(message, 'source', 'tool')}: {text}")
+
+    kept: List[str] = []
+    used = 0
+    for line in reversed(lines):
+        used += count_tokens(line) + 1
+        if used > max_tokens:
+            break
+        kept.append(line)
+    return "\n".join(reversed(kept))
+
+
+def llm_summarizer(model_client: ChatCompletionClient, max_tokens: int = 400) -> Summarizer:
+    """Summarizer that asks ``model_client`` to condense the folded messages."""
+
+    async def summarize(messages: Sequence[LLMMessage]) -> str:
+        transcript = await extractive_summarizer(messages, max_tokens=max_tokens * 8, max_chars_per_message=1000)
+        result = await model_client.create(
+            [
+                SystemMessage(
+                    content=(
+                        "Summarize the conversation below for an assistant that will continue it. "
+                        f"Keep customer ids, order ids, amounts, decisions and open questions. At most {max_tokens} tokens."
+                    )
+                ),
+                UserMessage(content=transcript, source="user"),
+            ]
+        )
+        return result.content if isinstance(result.content, str) else transcript
+
+    return summarize
+
+
+class SummarizingChatCompletionContext(_UsageTracking, ChatCompletionContext):
+    """
+    Rolling summarization: once the history exceeds ``trigger_tokens``, every
+    message older than the most recent ``keep_recent_tokens`` is folded into a
+    single summary message. Unlike the windowed contexts this also compacts
+    the stored history, so the persisted team state stops growing.
+    """
+
+    def __init__(
+        self,
+        trigger_tokens: int = 6000,
+        keep_recent_tokens: int = 2000,
+        summarizer: Optional[Summarizer] = None,
+        initial_messages: Optional[List[LLMMessage]] = None,
+    ) -> None:
+        super().__init__(initial_messages)
+        if keep_recent_tokens >= trigger_tokens:
+            raise ValueError("keep_recent_tokens must be smaller than trigger_tokens.")
+        self.trigger_tokens = trigger_tokens
+        self.keep_recent_tokens = keep_recent_tokens
+        self._summarizer = summarizer or extractive_summarizer
+        self._folded_tokens = 0  # tokens removed by summarization so far
+        self._init_usage()
+
+    async def get_messages(self) -> List[LLMMessage]:
+        if self._tokens(self._messages) > self.trigger_tokens:
+            await self._compact()
+        self._record(self._messages, extra_full_tokens=self._folded_tokens)
+        return list(self._messages)
+
+    async def _compact(self) -> None:
+        split = _tail_start(self._messages, self.keep_recent_tokens, self._tokens)
+        while split < len(self._messages) - 1 and isinstance(self._messages[split], FunctionExecutionResultMessage):
+            split += 1
+        head, tail = self._messages[:split], self._messages[split:]
+        if not head:
+            return
+        try:
+            summary = await self._summarizer(head)
+        except Exception as exc:
+            logging.warning(f"[SummarizingChatCompletionContext] summarizer failed, using extractive summary: {exc}")
+            summary = await extractive_summarizer(head)
+        summary_message = UserMessage(content=f"{SUMMARY_HEADER}\n{summary}", source=SUMMARY_SOURCE)
+        self._folded_tokens += self._tokens(head) - self._tokens([summary_message])
+        self._messages = [summary_message] + tail
+
+    async def save_state(self) -> Mapping[str, Any]:
+        state = dict(await super().save_state())
+        state["folded_tokens"] = self._folded_tokens
+        return state
+
+    async def load_state(self, state: Mapping[str, Any]) -> None:
+        await super().load_state(state)
+        self._folded_tokens = int(state.get("folded_tokens", 0))
+
+
+def create_model_context(model_client: Optional[ChatCompletionClient] = None) -> Optional[ChatCompletionContext]:
+    """
+    Build the model context selected by environment variables. Returns
+    ``None`` for the default unbounded policy so AssistantAgent keeps its
+    built-in behaviour.
+
+    MODEL_CONTEXT_POLICY                  unbounded (default) | token_limited | head_tail | summarizing
+    MODEL_CONTEXT_TOKEN_LIMIT             token_limited: window size in tokens (default: 8000)
+    MODEL_CONTEXT_HEAD_SIZE / _TAIL_SIZE  head_tail: messages kept at each end (default: 2 / 20)
+    MODEL_CONTEXT_SUMMARY_TRIGGER_TOKENS  summarizing: fold history above this size (default: 6000)
+    MODEL_CONTEXT_KEEP_RECENT_TOKENS      summarizing: recent tokens kept verbatim (default: 2000)
+    MODEL_CONTEXT_SUMMARIZER              summarizing: extractive (default, local) | llm
+    """
+    policy = os.getenv("MODEL_CONTEXT_POLICY", "unbounded").lower()
+    if policy == "unbounded":
+        return None
+    if policy == "token_limited":
+        return TokenBudgetChatCompletionContext(int(os.getenv("MODEL_CONTEXT_TOKEN_LIMIT", "8000")))
+    if policy == "head_tail":
+        return HeadTailChatCompletionContext(
+            head_size=int(os.getenv("MODEL_CONTEXT_HEAD_SIZE", "2")),
+            tail_size=int(os.getenv("MODEL_CONTEXT_TAIL_SIZE", "20")),
+        )
+    if policy == "summarizing":
+        summarizer = None
+        if os.getenv("MODEL_CONTEXT_SUMMARIZER", "extractive").lower() == "llm" and model_client is not None:
+            summarizer = llm_summarizer(model_client)
+        return SummarizingChatCompletionContext(
+            trigger_tokens=int(os.getenv("MODEL_CONTEXT_SUMMARY_TRIGGER_TOKENS", "6000")),
+            keep_recent_tokens=int(os.getenv("MODEL_CONTEXT_KEEP_RECENT_TOKENS", "2000")),
+            summarizer=summarizer,
+        )
+    raise ValueError(f"Unknown MODEL_CONTEXT_POLICY: {policy}")
@@ -0,0 +1,246 @@
+import logging
+from typing import Any, Dict, List, Sequence
+
+from autogen_agentchat.agents import AssistantAgent
+from autogen_agentchat.teams import DiGraphBuilder, GraphFlow
+from autogen_agentchat.conditions import MaxMessageTermination
+from autogen_agentchat.messages import BaseChatMessage
+
+from autogen.base_agent import BaseAgent
+
+# Safety net only: the graph itself ends the turn once the synthesis node has spoken.
+# A fresh condition per team: conditions keep state while a team runs.
+def create_termination_condition():
+    return MaxMessageTermination(max_messages=30)
+
+# Specialists that run concurrently after the planner (fan-out) and are joined
+# at the synthesis step (fan-in).
+SPECIALISTS = ["CRMBillingAgent", "ProductPromotionsAgent"]
+
+
+def branch_latencies(messages: Sequence[Any], start_source: str, branches: Sequence[str]) -> Dict[str, float]:
+    """Seconds from the planner's message to each branch's last message in this turn."""
+    start = next((m.created_at for m in messages if isinstance(m, BaseChatMessage) and m.source == start_source), None)
+    latencies: Dict[str, float] = {}
+    if start is None:
+        return latencies
+    for m in messages:
+        if m.source in branches:
+            latencies[m.source] = round((m.created_at - start).total_seconds(), 3)
+    return latencies
+
+
+def rearm_graph_state(state: Dict[str, Any], entry_point: str) -> Dict[str, Any]:
+    """
+    Re‑queue the entry node in a saved GraphFlow state. A finished graph
+    keeps an empty ready queue, so without this the next turn would stop
+    immediately; the message thread and agent contexts are kept.
+    """
+    for agent_state in state.get("agent_states", {}).values():
+        if "ready" in agent_state and not agent_state["ready"]:
+            agent_state["ready"] = [entry_point]
+    return state
+
+
+class Agent(BaseAgent):
+    """
+    Collaborative multi‑agent system that runs the specialists concurrently:
+
+        AnalysisPlanningAgent ──► CRMBillingAgent ────────┐
+                              └─► ProductPromotionsAgent ─┴─► AnalysisSynthesisAgent
+
+    The planner splits the request into one sub‑task per specialist, both
+    specialists work in parallel (GraphFlow fan‑out), and the synthesis step
+    waits for both before writing the answer (fan‑in).  Wall‑clock time per
+    turn is roughly planner + slowest branch + synthesis, instead of the sum
+    of all specialists as in the round‑robin / selector teams.
+    """
+
+    # MCP tool domains each specialist is given (see autogen/tool_selection.py)
+    agent_tool_domains = {
+        "CRMBillingAgent": ["billing", "social"],
+        "ProductPromotionsAgent": ["catalog"],
+    }
+
+    def __init__(self, state_store: dict, session_id: str) -> None:
+        super().__init__(state_store, session_id)
+        self.team_agent: Any = None
+        self._initialized: bool = False
+
+    # --------------------------------------------------------------------- #
+    #                         TEAM INITIALISATION                           #
+    # --------------------------------------------------------------------- #
+    async def _setup_team_agent(self) -> None:
+        """Create/restore the fan‑out graph once per session."""
+        if self._initialized:
+            return
+
+        try:
+            # 1. -----------------  Shared Tooling (Knowledge Base access)  -----------------
+            tools = await self.load_tools()
+
+            # 2. -----------------  Shared Model Client -----------------
+            model_client = self.create_model_client()
+
+            # 3. -----------------  Agent Definitions -----------------
+            analysis_planning_agent = AssistantAgent(
+                name="AnalysisPlanningAgent",
+                model_client=model_client,
+                model_context=self.create_model_context(model_client),
+                description="タスクを計画し、専門エージェントごとのサブタスクに分解するエージェント。",
+                system_message=(
+            """
+            あなたは「分析 & 計画エージェント（Analysis & Planning Agent）」です。
+
+            あなたの役割:
+            1) 顧客からのリクエストを解析すること。
+            2) リクエストを互いに独立したサブタスクに分解し、以下の形式で割り当てること。
+               CRMBillingAgent: <請求・アカウント・注文・SNS分析に関するサブタスク、なければ「なし」>
+               ProductPromotionsAgent: <製品・プロモーション・在庫に関するサブタスク、なければ「なし」>
+            3) 両エージェントは同時に作業するため、一方の結果に依存するサブタスクを作らないこと。
+            4) 自分では回答せず、サブタスクの割り当てだけを出力すること。
+            """
+                ),
+            )
+
+            crm_billing_agent = AssistantAgent(
+                name="CRMBillingAgent",
+                model_client=model_client,
+                model_context=self.create_model_context(model_client),
+                description="CRM & 請求エージェントのエージェント。CRM／請求システムを照会する",
+                tools=self.tools_for("CRMBillingAgent", tools),
+                system_message=(
+            """
+            あなたは「CRM & 請求エージェント（CRM & Billing Agent）」です。
+
+            - AnalysisPlanningAgent から CRMBillingAgent に割り当てられたサブタスクだけを実行します。
+            - アカウント、サブスクリプション、請求書、支払い情報などを取得するために、
+            構造化されたCRM／請求システムを照会します。
+            - 簡潔で構造化された情報を返答し、検出されたポリシー上の懸念事項があれば
+            フラグを立てます。
+            - 割り当てが「なし」の場合は、ツールを呼ばずに「担当なし」とだけ返答してください。
+            """
+                ),
+            )
+
+            product_promotions_agent = AssistantAgent(
+                name="ProductPromotionsAgent",
+                model_client=model_client,
+                model_context=self.create_model_context(model_client),
+                description="製品 & プロモーションエージェント。プロモーションのオファー、製品の在庫状況、適格条件、割引情報などを照会",
+                tools=self.tools_for("ProductPromotionsAgent", tools),
+                system_message=(
+            """
+            あなたは「製品 & プロモーションエージェント（Product & Promotions Agent）」です。
+
+            - AnalysisPlanningAgent から ProductPromotionsAgent に割り当てられたサブタスクだけを実行します。
+            - 構造化された情報源から、プロモーションのオファー、製品の在庫状況、
+            適格条件、割引情報などを取得します。
+            - 事実に基づいた、最新の製品／プロモーション情報を提供します。
+            - 割り当てが「なし」の場合は、ツールを呼ばずに「担当なし」とだけ返答してください。
+            """
+                ),
+            )
+
+            analysis_synthesis_agent = AssistantAgent(
+                name="AnalysisSynthesisAgent",
+                model_client=model_client,
+                model_context=self.create_model_context(model_client),
+                description="専門エージェントの結果を統合して最終回答を作成するエージェント。",
+                system_message=(
+            """
+            あなたは「分析 & 計画エージェント（Analysis & Planning Agent）」の統合担当です。
+
+            - CRMBillingAgent と ProductPromotionsAgent の出力を統合し、1つの包括的で一貫性のある
+            顧客向けの回答としてまとめてください。
+            - 「担当なし」の出力は無視してください。
+            - 顧客への最終回答のみを出力すること。
+            """
+                ),
+            )
+
+            # 4. -----------------  Assemble Graph -----------------
+            # planner ─► every specialist (fan‑out, run concurrently)
+            # every specialist ─► synthesis (fan‑in, waits for all branches)
+            specialists: List[AssistantAgent] = [crm_billing_agent, product_promotions_agent]
+            builder = DiGraphBuilder()
+            builder.add_node(analysis_planning_agent).add_node(analysis_synthesis_agent)
+            for specialist in specialists:
+                builder.add_node(specialist)
+                builder.add_edge(analysis_planning_agent, specialist)
+                builder.add_edge(specialist, analysis_synthesis_agent)
+            builder.set_entry_point(analysis_planning_agent)
+
+            self.team_agent = GraphFlow(
+                participants=builder.get_participants(),
+                graph=builder.build(),
+                termination_condition=create_termination_condition(),
+            )
+
+            # 5. -----------------  Restore persisted state (if any) -----------------
+            if self.state:
+                await self.team_agent.load_state(self.state)
+
+            self._initialized = True
+
+        except Exception as exc:
+            logging.error(f"[GraphFlowAgent] Initialisation failure: {exc}")
+            raise  # re‑raise so caller is aware something went wrong
+
+    # --------------------------------------------------------------------- #
+    #                              CHAT ENTRY                               #
+    # --------------------------------------------------------------------- #
+    async def setup(self) -> None:
+        await self._setup_team_agent()
+
+    async def chat_async(self, prompt: str) -> str:
+        """
+        Runs one fan‑out / fan‑in turn for the given user prompt.
+
+        Returns
+        -------
+        str
+            The synthesised reply produced by the AnalysisSynthesisAgent.
+        """
+        await self._setup_team_agent()
+
+        try:
+            # Start this turn at the planner again, keeping earlier turns as context.
+            await self.team_agent.load_state(
+                rearm_graph_state(dict(await self.team_agent.save_state()), "AnalysisPlanningAgent")
+            )
+
+            response = await self.run_team(self.team_agent, prompt)
+
+            # The last message is GraphFlow's stop message; the answer is the synthesis node's.
+            assistant_response: str = next(
+                m.content for m in reversed(response.messages)
+                if isinstance(m, BaseChatMessage) and m.source == "AnalysisSynthesisAgent"
+            )
+
+            logging.info(
+                f"[GraphFlowAgent] branch latencies: "
+                f"{branch_latencies(response.messages, 'AnalysisPlanningAgent', SPECIALISTS)} "
+                f"turn latency={self.last_turn_stats.latency_seconds:.2f}s"
+            )
+
+            # Persist interaction in chat history so UI / analytics can render it.
+            self.append_to_chat_history(
+                [
+                    {"role": "user", "content": prompt},
+                    {"role": "assistant", "content": assistant_response},
+                ]
+            )
+
+            # Persist internal Agent‑Chat state for future turns / resumptions.
+            new_state = await self.team_agent.save_state()
+            self._setstate(new_state)
+
+            return assistant_response
+
+        except Exception as exc:
+            logging.error(f"[GraphFlowAgent] chat_async error: {exc}")
+            return (
+                "Apologies, an unexpected error occurred while processing your "
+                "request.  Please try again later."
+            )
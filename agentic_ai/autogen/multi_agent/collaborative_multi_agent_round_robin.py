@@ -4,10 +4,7 @@ from typing import Any, List
 from autogen_agentchat.agents import AssistantAgent  
 from autogen_agentchat.teams import RoundRobinGroupChat  # keeps implementation simple & familiar  
 from autogen_agentchat.conditions import TextMessageTermination  
-from autogen_core import CancellationToken  
   
-from autogen_ext.models.openai import AzureOpenAIChatCompletionClient  
-from autogen_ext.tools.mcp import SseServerParams, mcp_server_tools  
   
 from autogen.base_agent import BaseAgent  
   
@@ -28,6 +25,12 @@ class Agent(BaseAgent):
     synthesis (TextMessageTermination("analysis_planning")).  
     """  
   
+    # MCP tool domains each specialist is given (see autogen/tool_selection.py)  
+    agent_tool_domains = {  
+        "crm_billing": ["billing", "social"],  
+        "product_promotions": ["catalog"],  
+    }  
+  
     def __init__(self, state_store: dict, session_id: str) -> None:  
         super().__init__(state_store, session_id)  
         self.team_agent: Any = None  
@@ -43,26 +46,16 @@ class Agent(BaseAgent):
   
         try:  
             # 1. -----------------  Shared Tooling (Knowledge Base access)  -----------------  
-            server_params = SseServerParams(  
-                url=self.mcp_server_uri,  
-                headers={"Content-Type": "application/json"},  
-                timeout=30,  
-            )  
-            tools = await mcp_server_tools(server_params)  
+            tools = await self.load_tools()    
   
             # 2. -----------------  Shared Model Client -----------------  
-            model_client = AzureOpenAIChatCompletionClient(  
-                api_key=self.azure_openai_key,  
-                azure_endpoint=self.azure_openai_endpoint,  
-                api_version=self.api_version,  
-                azure_deployment=self.azure_deployment,  
-                model=self.openai_model_name,  
-            )  
+            model_client = self.create_model_client()  
   
             # 3. -----------------  Agent Definitions -----------------  
             analysis_planning_agent = AssistantAgent(  
                 name="analysis_planning",  
                 model_client=model_client,  
+                model_context=self.create_model_context(model_client),  
                 tools=tools,  
                 system_message=(  
             """
@@ -86,7 +79,8 @@ class Agent(BaseAgent):
             crm_billing_agent = AssistantAgent(  
                 name="crm_billing",  
                 model_client=model_client,  
-                tools=tools,  
+                model_context=self.create_model_context(model_client),  
+                tools=self.tools_for("crm_billing", tools),  
                 system_message=(  
             """
             あなたは「CRM & 請求エージェント（CRM & Billing Agent）」です。
@@ -104,7 +98,8 @@ class Agent(BaseAgent):
             product_promotions_agent = AssistantAgent(  
                 name="product_promotions",  
                 model_client=model_client,  
-                tools=tools,  
+                model_context=self.create_model_context(model_client),  
+                tools=self.tools_for("product_promotions", tools),  
                 system_message=(  
             """
             あなたは「製品 & プロモーションエージェント（Product & Promotions Agent）」です。
@@ -149,6 +144,9 @@ class Agent(BaseAgent):
     # --------------------------------------------------------------------- #  
     #                              CHAT ENTRY                               #  
     # --------------------------------------------------------------------- #  
+    async def setup(self) -> None:  
+        await self._setup_team_agent()  
+  
     async def chat_async(self, prompt: str) -> str:  
         """  
         Executes the collaborative multi‑agent chat for a given user prompt.  
@@ -161,10 +159,7 @@ class Agent(BaseAgent):
         await self._setup_team_agent()  
   
         try:  
-            response = await self.team_agent.run(  
-                task=prompt,  
-                cancellation_token=CancellationToken(),  
-            )  
+            response = await self.run_team(self.team_agent, prompt)  
   
             assistant_response: str = response.messages[-1].content  
             assistant_response = assistant_response.replace("FINAL_ANSWER:", "").strip()
@@ -1,15 +1,15 @@
+import os  
 import logging  
 from typing import Any, List  
   
 from autogen_agentchat.agents import AssistantAgent  
 from autogen_agentchat.teams import SelectorGroupChat  # keeps implementation simple & familiar  
 from autogen_agentchat.conditions import TextMessageTermination,TextMentionTermination,MaxMessageTermination 
-from autogen_core import CancellationToken  
   
-from autogen_ext.models.openai import AzureOpenAIChatCompletionClient  
-from autogen_ext.tools.mcp import SseServerParams, mcp_server_tools  
   
+from autogen import metrics  
 from autogen.base_agent import BaseAgent  
+from autogen.multi_agent.speaker_selection import RuleBasedSelector  
   
 selector_prompt = """Select an agent to perform task.
 
@@ -22,9 +22,44 @@ Read the above conversation, then select an agent from {participants} to perform
 Make sure the planner agent has assigned tasks before other agents start working.
 Only select one agent.
 """
-text_mention_termination = TextMentionTermination("TERMINATE")
-max_messages_termination = MaxMessageTermination(max_messages=25)
-termination_condition = text_mention_termination | max_messages_termination
+
+# A fresh condition per team: conditions keep state while a team runs
+def create_termination_condition():
+    return TextMentionTermination("TERMINATE") | MaxMessageTermination(max_messages=25)
+
+
+metrics.register_counter_map(
+    "agent_speaker_selection_total", "Speaker selections by outcome (rule hits vs. LLM fallback)", "outcome",
+    RuleBasedSelector.totals, __name__,
+)
+
+# Deterministic routing rules tried before the LLM selector (SELECTOR_MODE=rules).
+speaker_keywords = {
+    "CRMBillingAgent": [
+        "請求", "支払", "返金", "注文", "顧客", "アカウント", "配送", "売上",
+        "invoice", "billing", "payment", "refund", "order", "customer", "account", "shipping",
+    ],
+    "ProductPromotionsAgent": [
+        "製品", "商品", "プロモーション", "割引", "在庫", "キャンペーン", "カテゴリ", "ゲーム",
+        "product", "promotion", "discount", "inventory", "stock", "catalog", "game",
+    ],
+}
+speaker_aliases = {
+    "CRMBillingAgent": ["crm_billing", "crm & billing", "crm＆請求"],
+    "ProductPromotionsAgent": ["product_promotions", "product & promotions", "製品 & プロモーション"],
+}
+speaker_tool_routes = {
+    "get_customer_orders": "CRMBillingAgent",
+    "get_order_details": "CRMBillingAgent",
+    "get_shipping_status": "CRMBillingAgent",
+    "get_total_sales": "CRMBillingAgent",
+    "get_daily_order_counts": "CRMBillingAgent",
+    "get_products": "ProductPromotionsAgent",
+    "get_product_detail": "ProductPromotionsAgent",
+    "get_game_products": "ProductPromotionsAgent",
+    "get_inventory_status": "ProductPromotionsAgent",
+    "get_all_categories": "ProductPromotionsAgent",
+}
 
 
 class Agent(BaseAgent):  
@@ -43,10 +78,24 @@ class Agent(BaseAgent):
     synthesis (TextMessageTermination("analysis_planning")).  
     """  
   
+    # MCP tool domains each specialist is given (see autogen/tool_selection.py)  
+    agent_tool_domains = {  
+        "CRMBillingAgent": ["billing", "social"],  
+        "ProductPromotionsAgent": ["catalog"],  
+    }  
+  
     def __init__(self, state_store: dict, session_id: str) -> None:  
         super().__init__(state_store, session_id)  
         self.team_agent: Any = None  
         self._initialized: bool = False  
+        self.speaker_selector: Any = None  
+        if os.getenv("SELECTOR_MODE", "rules").lower() == "rules":  
+            self.speaker_selector = RuleBasedSelector(  
+                planner="AnalysisPlanningAgent",  
+                specialists=speaker_keywords,  
+                aliases=speaker_aliases,  
+                tool_routes=speaker_tool_routes,  
+            )  
   
     # --------------------------------------------------------------------- #  
     #                         TEAM INITIALISATION                           #  
@@ -58,26 +107,18 @@ class Agent(BaseAgent):
   
         try:  
             # 1. -----------------  Shared Tooling (Knowledge Base access)  -----------------  
-            server_params = SseServerParams(  
-                url=self.mcp_server_uri,  
-                headers={"Content-Type": "application/json"},  
-                timeout=30,  
-            )  
-            tools = await mcp_server_tools(server_params)  
+            tools = await self.load_tools()    
   
             # 2. -----------------  Shared Model Client -----------------  
-            model_client = AzureOpenAIChatCompletionClient(  
-                api_key=self.azure_openai_key,  
-                azure_endpoint=self.azure_openai_endpoint,  
-                api_version=self.api_version,  
-                azure_deployment=self.azure_deployment,  
-                model=self.openai_model_name,  
-            )  
+            model_client = self.create_model_client()  
+            # Speaker selection may run on a smaller deployment (role_deployments)  
+            selector_client = self.create_model_client("selector")  
   
             # 3. -----------------  Agent Definitions -----------------  
             analysis_planning_agent = AssistantAgent(  
                 name="AnalysisPlanningAgent",  
                 model_client=model_client,  
+                model_context=self.create_model_context(model_client),  
                 description="タスクを計画するエージェント。新しいタスクが与えられたときに最初に起動するエージェントであるべきである。",
                 system_message=(  
             """
@@ -102,8 +143,9 @@ class Agent(BaseAgent):
             crm_billing_agent = AssistantAgent(  
                 name="CRMBillingAgent",  
                 model_client=model_client,  
+                model_context=self.create_model_context(model_client),  
                 description="CRM & 請求エージェントのエージェント。CRM／請求システムを照会する",
-                tools=tools,  
+                tools=self.tools_for("CRMBillingAgent", tools),  
                 system_message=(
             """
             あなたは「CRM & 請求エージェント（CRM & Billing Agent）」です。
@@ -121,8 +163,9 @@ class Agent(BaseAgent):
             product_promotions_agent = AssistantAgent(  
                 name="ProductPromotionsAgent",  
                 model_client=model_client,  
+                model_context=self.create_model_context(model_client),  
                 description="製品 & プロモーションエージェント。プロモーションのオファー、製品の在庫状況、適格条件、割引情報などを照会",
-                tools=tools,  
+                tools=self.tools_for("ProductPromotionsAgent", tools),  
                 system_message=(  
             """
             あなたは「製品 & プロモーションエージェント（Product & Promotions Agent）」です。
@@ -140,6 +183,7 @@ class Agent(BaseAgent):
                 name="DataAnalystAgent",  
                 description="データに基づいて分析、計算、集計を行うためのエージェント。",
                 model_client=model_client,  
+                model_context=self.create_model_context(model_client),  
                 system_message=(
             """
             あなたはデータアナリストです。
@@ -159,10 +203,12 @@ class Agent(BaseAgent):
   
             self.team_agent = SelectorGroupChat(  
                 participants=participants,  
-                termination_condition=termination_condition, 
+                termination_condition=create_termination_condition(), 
                 selector_prompt=selector_prompt,
-                model_client=model_client,
+                model_client=selector_client,
+                model_context=self.create_model_context(selector_client),  # bounds the {history} sent to the selector
                 allow_repeated_speaker=True,  # Allow an agent to speak multiple turns in a row.
+                selector_func=self.speaker_selector,  # rule-based fast path; None falls back to the LLM selector
  
             )  
   
@@ -179,6 +225,9 @@ class Agent(BaseAgent):
     # --------------------------------------------------------------------- #  
     #                              CHAT ENTRY                               #  
     # --------------------------------------------------------------------- #  
+    async def setup(self) -> None:  
+        await self._setup_team_agent()  
+  
     async def chat_async(self, prompt: str) -> str:  
         """  
         Executes the collaborative multi‑agent chat for a given user prompt.  
@@ -191,14 +240,17 @@ class Agent(BaseAgent):
         await self._setup_team_agent()  
   
         try:  
-            response = await self.team_agent.run(  
-                task=prompt,  
-                cancellation_token=CancellationToken(),  
-            )  
+            response = await self.run_team(self.team_agent, prompt)  
   
             assistant_response: str = response.messages[-1].content  
             assistant_response = assistant_response.replace("FINAL_ANSWER:", "").strip()
   
+            if self.speaker_selector is not None:  
+                logging.info(  
+                    f"[MultiDomainAgent] speaker selection: {dict(self.speaker_selector.stats)} "  
+                    f"(LLM selector calls skipped: {self.speaker_selector.skipped_llm_calls})"  
+                )  
+  
             # Persist interaction in chat history so UI / analytics can render it.  
             self.append_to_chat_history(  
                 [  
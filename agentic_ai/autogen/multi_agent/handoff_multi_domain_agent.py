@@ -1,17 +1,40 @@
+import os
 import logging
 from typing import Any, List  
 from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.teams import Swarm
 from autogen_agentchat.conditions import TextMentionTermination, MaxMessageTermination
-from autogen_core import CancellationToken
-
-from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
-from autogen_ext.tools.mcp import SseServerParams, mcp_server_tools
+from autogen_agentchat.messages import HandoffMessage, TextMessage
 
+from autogen import metrics
 from autogen.base_agent import BaseAgent
-
-# Define termination condition
-termination_condition = TextMentionTermination("TERMINATE:") | MaxMessageTermination(max_messages=10)
+from autogen.multi_agent.intent_router import IntentClassifier, load_intent_model
+
+# Define termination condition. Conditions keep state while a team runs, so
+# every team gets its own instance (a shared one breaks concurrent sessions).
+def create_termination_condition():
+    return TextMentionTermination("TERMINATE:") | MaxMessageTermination(max_messages=10)
+
+# Local pre-router: picks the starting specialist so the coordinator's routing
+# LLM call is skipped. Mirrors the routing rules in the coordinator prompt.
+intent_rules = {
+    "CRMBillingAgent": [
+        r"請求", r"支払", r"返金", r"注文", r"配送", r"アカウント", r"顧客", r"売上", r"ツイート", r"ハッシュタグ", r"SNS",
+        r"\b(invoice|bill(ing)?|payment|refund|orders?|shipping|account|customer|sales|tweets?|hashtags?)\b",
+    ],
+    "ProductPromotionsAgent": [
+        r"製品", r"商品", r"プロモーション", r"割引", r"在庫", r"キャンペーン", r"カテゴリ", r"ゲーム",
+        r"\b(products?|promotions?|discounts?|inventory|stock|catalog|categor(y|ies)|games?)\b",
+    ],
+}
+intent_classifier = IntentClassifier(
+    intent_rules,
+    model=load_intent_model(os.environ["INTENT_MODEL_PATH"]) if os.getenv("INTENT_MODEL_PATH") else None,
+    threshold=float(os.getenv("INTENT_ROUTER_THRESHOLD", "0.75")),
+)
+metrics.register_counter_map(
+    "agent_intent_router_decisions_total", "Handoff pre-router decisions", "outcome", IntentClassifier.totals, __name__
+)
 
 class Agent(BaseAgent):
     """
@@ -21,10 +44,19 @@ class Agent(BaseAgent):
     • Product Agent: Provides information on products and promotions
     """
 
+    # MCP tool domains each specialist is given (see autogen/tool_selection.py).
+    # The coordinator routes SNS analysis to CRMBillingAgent (there is no social
+    # specialist), so it also gets the social tools.
+    agent_tool_domains = {
+        "CRMBillingAgent": ["billing", "social"],
+        "ProductPromotionsAgent": ["catalog"],
+    }
+
     def __init__(self, state_store: dict, session_id: str) -> None:
         super().__init__(state_store, session_id)
         self.team_agent = None
         self._initialized = False
+        self.use_prerouter = os.getenv("HANDOFF_PREROUTER", "on").lower() == "on"
 
     async def _setup_team_agent(self) -> None:
         """Create the swarm team once per session."""
@@ -33,29 +65,21 @@ class Agent(BaseAgent):
 
         try:
             # 1. Setup tools
-            server_params = SseServerParams(
-                url=self.mcp_server_uri,
-                headers={"Content-Type": "application/json"},
-                timeout=30,
-            )
-            # HINT: One approach to improve performance is to specify which tools to use in each agent. That are domain specific.
-            tools = await mcp_server_tools(server_params)
+            tools = await self.load_tools()
 
             # 2. Setup model client
-            model_client = AzureOpenAIChatCompletionClient(
-                api_key=self.azure_openai_key,
-                azure_endpoint=self.azure_openai_endpoint,
-                api_version=self.api_version,
-                azure_deployment=self.azure_deployment,
-                model=self.openai_model_name,
-            )
+            model_client = self.create_model_client()
+            # Routing may run on a smaller deployment (role_deployments)
+            coordinator_client = self.create_model_client("coordinator")
 
             # 3. Create simplified agents
             # HINT: You can adjust the prompts to improve the performance. 
             coordinator = AssistantAgent(  
                 name="coordinator",  
-                model_client=model_client,  
-                handoffs=["CRMBillingAgent", "ProductPromotionsAgent"],
+                model_client=coordinator_client,  
+                model_context=self.create_model_context(coordinator_client),  
+                memory=self.memory(),  
+                handoffs=self.handoffs("CRMBillingAgent", "ProductPromotionsAgent"),
                 description="タスクを計画するエージェント。ユーザーのリクエストを適切な専門エージェントに振り分けてください。",
                 system_message=(  
             """
@@ -80,9 +104,11 @@ class Agent(BaseAgent):
             billing_agent = AssistantAgent(  
                 name="CRMBillingAgent",  
                 model_client=model_client,  
+                model_context=self.create_model_context(model_client),  
+                memory=self.memory(),  
                 description="CRM & 請求エージェントのエージェント。CRM／請求システムを照会する",
-                tools=tools,  
-                handoffs=["coordinator"],
+                tools=self.tools_for("CRMBillingAgent", tools),  
+                handoffs=self.handoffs("coordinator"),
                 system_message=(
             """
             あなたは「CRM & 請求エージェント（CRM & Billing Agent）」です。
@@ -94,7 +120,8 @@ class Agent(BaseAgent):
             - 簡潔で構造化された情報を返答し、検出されたポリシー上の懸念事項があれば
             フラグを立てます。
             - ツールを使って請求情報を確認してください。
-            - 請求に関係ない質問は coordinator に振り分けてください。
+            - SNS分析（ツイート、ハッシュタグ、エンゲージメント）もSNSツールを使って担当します。
+            - 請求・CRM・SNS分析に関係ない質問は coordinator に振り分けてください。
             - Always handoff back to coordinator when analysis is complete.
             """
                 ),  
@@ -103,9 +130,11 @@ class Agent(BaseAgent):
             product_agent = AssistantAgent(  
                 name="ProductPromotionsAgent",  
                 model_client=model_client,  
-                handoffs=["coordinator"],
+                model_context=self.create_model_context(model_client),  
+                memory=self.memory(),  
+                handoffs=self.handoffs("coordinator"),
                 description="製品 & プロモーションエージェント。プロモーションのオファー、製品の在庫状況、適格条件、割引情報などを照会",
-                tools=tools,  
+                tools=self.tools_for("ProductPromotionsAgent", tools),  
                 system_message=(  
             """
             あなたは「製品 & プロモーションエージェント（Product & Promotions Agent）」です。
@@ -132,7 +161,7 @@ class Agent(BaseAgent):
             # 4. Create the swarm
             self.team_agent = Swarm(
                 participants=participants,
-                termination_condition=termination_condition,
+                termination_condition=create_termination_condition(),
             )
 
             # 5. Restore state if available
@@ -145,14 +174,32 @@ class Agent(BaseAgent):
             logging.error(f"Initialization error: {exc}")
             raise
 
+    async def setup(self) -> None:
+        await self._setup_team_agent()
+
     async def chat_async(self, prompt: str) -> str:
         await self._setup_team_agent()
 
         try:
+            # Start directly at the specialist when the local classifier is confident,
+            # otherwise let the coordinator route as before.
+            task: Any = prompt
+            decision = intent_classifier.classify(prompt) if self.use_prerouter else None
+            if decision is not None and decision.target:
+                task = [
+                    TextMessage(content=prompt, source="user"),
+                    HandoffMessage(
+                        content=f"Transferred to {decision.target}, adopting the role of {decision.target} immediately.",
+                        source="user",
+                        target=decision.target,
+                    ),
+                ]
+
             # Run the conversation
-            response = await self.team_agent.run(
-                task=prompt,
-                cancellation_token=CancellationToken(),
+            response = await self.run_team(self.team_agent, task)
+            logging.info(
+                f"[HandoffAgent] routing={decision or 'coordinator'} "
+                f"llm_calls={self.last_turn_stats.llm_calls} latency={self.last_turn_stats.latency_seconds:.2f}s"
             )
 
             # Extract the final response
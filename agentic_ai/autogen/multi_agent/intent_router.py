@@ -0,0 +1,91 @@
+import re
+import pickle
+import logging
+from collections import Counter
+from typing import Callable, Dict, Optional, Sequence
+
+# A local model maps a prompt to {label: probability}. Anything exposing a
+# scikit-learn style ``predict_proba``/``classes_`` can be adapted with
+# ``load_intent_model``; nothing here calls out over the network.
+IntentModel = Callable[[str], Dict[str, float]]
+
+
+class IntentDecision:
+    __slots__ = ("target", "confidence", "method")
+
+    def __init__(self, target: Optional[str], confidence: float, method: str) -> None:
+        self.target = target
+        self.confidence = confidence
+        self.method = method
+
+    def __repr__(self) -> str:
+        return f"IntentDecision(target={self.target!r}, confidence={self.confidence:.2f}, method={self.method!r})"
+
+
+class IntentClassifier:
+    """
+    Picks the specialist that should start a Swarm turn.
+
+    Regex rules are tried first; a rule decision is accepted when the winning
+    label holds at least ``threshold`` of all rule hits. Otherwise the
+    optional local model is asked, and its top label is accepted at the same
+    threshold. Below that the decision has no target and the caller should
+    fall back to the coordinator agent.
+    """
+
+    totals: Counter = Counter()
+
+    def __init__(
+        self,
+        rules: Dict[str, Sequence[str]],
+        model: Optional[IntentModel] = None,
+        threshold: float = 0.75,
+    ) -> None:
+        self.rules = {label: [re.compile(p, re.IGNORECASE) for p in patterns] for label, patterns in rules.items()}
+        self.model = model
+        self.threshold = threshold
+
+    def _rule_scores(self, text: str) -> Dict[str, int]:
+        return {label: sum(len(p.findall(text)) for p in patterns) for label, patterns in self.rules.items()}
+
+    def classify(self, text: str) -> IntentDecision:
+        scores = self._rule_scores(text)
+        total = sum(scores.values())
+        if total:
+            label, hits = max(scores.items(), key=lambda item: item[1])
+            confidence = hits / total
+            if confidence >= self.threshold:
+                return self._decide(IntentDecision(label, confidence, "rules"))
+
+        if self.model is not None:
+            try:
+                probabilities = self.model(text)
+            except Exception as exc:
+                logging.warning(f"[IntentClassifier] local model failed: {exc}")
+                probabilities = {}
+            if probabilities:
+                label, probability = max(probabilities.items(), key=lambda item: item[1])
+                if label in self.rules and probability >= self.threshold:
+                    return self._decide(IntentDecision(label, probability, "model"))
+
+        confidence = max(scores.values()) / total if total else 0.0
+        return self._decide(IntentDecision(None, confidence, "fallback"))
+
+    def _decide(self, decision: IntentDecision) -> IntentDecision:
+        IntentClassifier.totals[decision.method] += 1
+        logging.debug(f"[IntentClassifier] {decision}")
+        return decision
+
+
+def load_intent_model(path: str) -> IntentModel:
+    """
+    Load a pickled local classifier (e.g. a scikit-learn TF-IDF + logistic
+    regression pipeline trained on labelled prompts).
+    """
+    with open(path, "rb") as f:
+        estimator = pickle.load(f)
+
+    def predict(text: str) -> Dict[str, float]:
+        return dict(zip(estimator.classes_, (float(p) for p in estimator.predict_proba([text])[0])))
+
+    return predict
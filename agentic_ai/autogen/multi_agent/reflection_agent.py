@@ -1,3 +1,4 @@
+import os  
 import logging  
 from typing import Any  
   
@@ -5,47 +6,68 @@ from dotenv import load_dotenv
   
 from autogen_agentchat.agents import AssistantAgent  
 from autogen_agentchat.teams import RoundRobinGroupChat  
-from autogen_agentchat.conditions import TextMessageTermination  
-from autogen_core import CancellationToken  
-from autogen_ext.models.openai import AzureOpenAIChatCompletionClient  
-from autogen_ext.tools.mcp import SseServerParams, mcp_server_tools  
+from autogen_agentchat.messages import TextMessage  
   
+from autogen import metrics  
 from autogen.base_agent import BaseAgent    
+from autogen.multi_agent.intent_router import load_intent_model  
+from autogen.multi_agent.reflection_policy import AdaptiveReflectionTermination, ReflectionPolicy  
+  
+# Requests that benefit from a critique (REFLECTION_MODE=adaptive). Plain  
+# lookups ("注文一覧を見せて") are answered by the primary alone.  
+reflection_keywords = [  
+    r"分析", r"比較", r"提案", r"戦略", r"改善", r"評価", r"なぜ", r"理由", r"傾向", r"予測", r"レポート",  
+    r"\b(analy[sz]e|analysis|compare|comparison|recommend|suggest|strategy|improve|evaluate|why|trend|forecast|report)\b",  
+]  
+metrics.register_counter_map(  
+    "agent_reflection_events_total", "Reflection critiques run, skipped and approved", "event",  
+    AdaptiveReflectionTermination.totals, __name__,  
+)  
   
 class Agent(BaseAgent):  
     """  
     Reflection agent utilizing a primary/critic composition in a round-robin chat.  
+  
+    The critic only runs when ``ReflectionPolicy`` considers the primary's  
+    answer worth a critique, at most REFLECTION_MAX_ROUNDS times per turn,  
+    and reviews the primary's tool results instead of querying again.  
     """  
   
     def __init__(self, state_store: dict, session_id: str) -> None:  
         super().__init__(state_store, session_id)  
         self.team_agent: Any = None  
         self._initialized: bool = False  
+        model_path = os.getenv("REFLECTION_MODEL_PATH")  
+        self.termination = AdaptiveReflectionTermination(  
+            ReflectionPolicy(  
+                mode=os.getenv("REFLECTION_MODE", "adaptive").lower(),  
+                keywords=reflection_keywords,  
+                min_answer_chars=int(os.getenv("REFLECTION_MIN_ANSWER_CHARS", "600")),  
+                max_lookup_tool_calls=int(os.getenv("REFLECTION_MAX_LOOKUP_TOOL_CALLS", "2")),  
+                model=load_intent_model(model_path) if model_path else None,  
+                threshold=float(os.getenv("REFLECTION_MODEL_THRESHOLD", "0.5")),  
+            ),  
+            max_rounds=int(os.getenv("REFLECTION_MAX_ROUNDS", "1")),  
+        )  
   
     async def _setup_team_agent(self) -> None:  
         if self._initialized:  
             return  
   
         try:  
-            server_params = SseServerParams(  
-                url=self.mcp_server_uri,  
-                headers={"Content-Type": "application/json"},  
-                timeout=30,  
-            )  
-            tools = await mcp_server_tools(server_params)  
-  
-            model_client = AzureOpenAIChatCompletionClient(  
-                api_key=self.azure_openai_key,  
-                azure_endpoint=self.azure_openai_endpoint,  
-                api_version=self.api_version,  
-                azure_deployment=self.azure_deployment,  
-                model=self.openai_model_name,  
-            )  
+            tools = await self.load_tools()    
+  
+            model_client = self.create_model_client()  
   
             primary_agent = AssistantAgent(  
                 name="primary",  
                 model_client=model_client,  
+                model_context=self.create_model_context(model_client),  
+                memory=self.memory(),  
                 tools=tools,  
+                # Without it a tool call turn ends on the raw tool output (ToolCallSummaryMessage) and has no  
+                # text answer for the policy, the critic or the reply; the offline benchmark fails every such turn  
+                reflect_on_tool_use=True,  
                 description="役立つアシスタント。複数のツールを使用して情報を検索し、質問に回答する",
                 system_message=(  
             """
@@ -55,22 +77,26 @@ class Agent(BaseAgent):
             )
             )  
 
+            # Review may run on a smaller deployment (role_deployments)  
+            critic_client = self.create_model_client("critic")  
             critic_agent = AssistantAgent(  
                 name="critic",  
-                model_client=model_client,  
+                model_client=critic_client,  
+                model_context=self.create_model_context(critic_client),  
                 description="建設的なフィードバックを提供するデータアナリスト。主に他のエージェントの出力を評価し、改善点を提案する役割を担う。",
-                tools=tools,  
+                # No tools: the critic reviews the primary's tool results already in the conversation.  
                 system_message=(
             """
             プロのデータアナリストとして建設的なフィードバックを提供してください。フィードバックが反映された場合は 'APPROVE' と回答してください。
+            データの再取得は行わず、会話中の primary のツール実行結果に基づいて評価してください。
+            不足しているデータがあれば、primary に取得を依頼してください。
             """
                 ),  
             )  
   
-            termination_condition = TextMessageTermination("primary")  
             self.team_agent = RoundRobinGroupChat(  
                 [primary_agent, critic_agent],  
-                termination_condition=termination_condition,  
+                termination_condition=self.termination,  
             )  
   
             if self.state:  
@@ -81,6 +107,9 @@ class Agent(BaseAgent):
             logging.error(f"Error initializing ReflectionAgent: {e}")  
             raise  
   
+    async def setup(self) -> None:  
+        await self._setup_team_agent()  
+  
     async def chat_async(self, prompt: str) -> str:  
         """  
         Run primary/critic group chat and return the final assistant response.  
@@ -88,11 +117,24 @@ class Agent(BaseAgent):
         await self._setup_team_agent()  
   
         try:  
-            response = await self.team_agent.run(  
-                task=prompt,  
-                cancellation_token=CancellationToken(),  
+            # Every turn starts with the primary, also when the last turn ended  
+            # before the critic spoke (skipped or capped reflection).  
+            team_state = await self.team_agent.save_state()  
+            for agent_state in team_state["agent_states"].values():  
+                if "next_speaker_index" in agent_state:  
+                    agent_state["next_speaker_index"] = 0  
+            await self.team_agent.load_state(team_state)  
+  
+            response = await self.run_team(self.team_agent, prompt)  
+            # The answer is the primary's last message (the critic may have approved it last).  
+            assistant_response = next(  
+                m.to_text() for m in reversed(response.messages)  
+                if isinstance(m, TextMessage) and m.source == "primary"  
+            )  
+            logging.info(  
+                f"[ReflectionAgent] {self.termination.last_decision} stop={response.stop_reason!r} "  
+                f"reflection: {dict(self.termination.stats)} (worker totals: {dict(AdaptiveReflectionTermination.totals)})"  
             )  
-            assistant_response = response.messages[-1].content  
   
             messages = [  
                 {"role": "user", "content": prompt},  
@@ -0,0 +1,157 @@
+import re
+import logging
+from collections import Counter
+from typing import Iterable, Optional, Sequence
+
+from autogen_agentchat.base import TerminationCondition
+from autogen_agentchat.messages import BaseAgentEvent, BaseChatMessage, StopMessage, TextMessage, ToolCallRequestEvent
+
+from autogen.multi_agent.intent_router import IntentModel
+
+
+class ReflectionDecision:
+    __slots__ = ("reflect", "reason")
+
+    def __init__(self, reflect: bool, reason: str) -> None:
+        self.reflect = reflect
+        self.reason = reason
+
+    def __repr__(self) -> str:
+        return f"ReflectionDecision(reflect={self.reflect}, reason={self.reason!r})"
+
+
+class ReflectionPolicy:
+    """
+    Decides whether the primary's first answer of a turn is worth a critique.
+
+    Modes: ``always`` (previous behaviour), ``off`` and ``adaptive``. In
+    adaptive mode an optional local model (label ``"reflect"``) is asked
+    first; otherwise the rules below are tried in order and a plain lookup
+    answer skips the critic:
+
+    1. the request asks for analysis/comparison/advice (``keywords``),
+    2. the answer is at least ``min_answer_chars`` long,
+    3. the primary needed more than ``max_lookup_tool_calls`` tool calls.
+    """
+
+    def __init__(
+        self,
+        mode: str = "adaptive",
+        keywords: Iterable[str] = (),
+        min_answer_chars: int = 600,
+        max_lookup_tool_calls: int = 2,
+        model: Optional[IntentModel] = None,
+        threshold: float = 0.5,
+    ) -> None:
+        self.mode = mode
+        self.keywords = [re.compile(k, re.IGNORECASE) for k in keywords]
+        self.min_answer_chars = min_answer_chars
+        self.max_lookup_tool_calls = max_lookup_tool_calls
+        self.model = model
+        self.threshold = threshold
+
+    def decide(self, prompt: str, answer: str, tool_calls: int) -> ReflectionDecision:
+        if self.mode == "always":
+            return ReflectionDecision(True, "always")
+        if self.mode == "off":
+            return ReflectionDecision(False, "off")
+
+        if self.model is not None:
+            try:
+                probability = self.model(prompt).get("reflect", 0.0)
+                return ReflectionDecision(probability >= self.threshold, "model")
+            except Exception as exc:
+                logging.warning(f"[ReflectionPolicy] local model failed: {exc}")
+
+        if any(k.search(prompt) for k in self.keywords):
+            return ReflectionDecision(True, "analysis_request")
+        if len(answer) >= self.min_answer_chars:
+            return ReflectionDecision(True, "long_answer")
+        if tool_calls > self.max_lookup_tool_calls:
+            return ReflectionDecision(True, "multi_tool_answer")
+        return ReflectionDecision(False, "simple_lookup")
+
+
+class AdaptiveReflectionTermination(TerminationCondition):
+    """
+    Termination condition for a primary/critic round-robin team.
+
+    After the primary's first answer the policy decides whether the critic
+    runs at all; the turn then ends when the critic replies ``APPROVE`` or
+    after ``max_rounds`` critiques. Counts what was run and skipped in
+    ``stats`` (per team) and ``totals`` (process-wide).
+    """
+
+    # Process-wide counters, shared by every team built in this worker.
+    totals: Counter = Counter()
+
+    def __init__(
+        self,
+        policy: ReflectionPolicy,
+        primary: str = "primary",
+        critic: str = "critic",
+        max_rounds: int = 1,
+        approve_token: str = "APPROVE",
+    ) -> None:
+        self.policy = policy
+        self.primary = primary
+        self.critic = critic
+        self.max_rounds = max_rounds
+        self.approve_token = approve_token
+        self.stats: Counter = Counter()
+        self.last_decision: Optional[ReflectionDecision] = None
+        self._terminated = False
+        self._prompt = ""
+        self._tool_calls = 0
+        self._answers = 0
+        self._rounds = 0
+
+    @property
+    def terminated(self) -> bool:
+        return self._terminated
+
+    def _count(self, key: str, value: int = 1) -> None:
+        self.stats[key] += value
+        AdaptiveReflectionTermination.totals[key] += value
+
+    def _stop(self, reason: str) -> StopMessage:
+        self._terminated = True
+        return StopMessage(content=f"Reflection finished: {reason}", source="AdaptiveReflectionTermination")
+
+    async def __call__(self, messages: Sequence[BaseAgentEvent | BaseChatMessage]) -> StopMessage | None:
+        if self._terminated:
+            raise RuntimeError("Termination condition has already been reached")
+        for message in messages:
+            if isinstance(message, ToolCallRequestEvent) and message.source == self.primary:
+                self._tool_calls += len(message.content)
+            if not isinstance(message, BaseChatMessage):
+                continue
+            if message.source == "user":
+                self._prompt = message.to_text()
+            elif message.source == self.critic:
+                self._rounds += 1
+                self._count("rounds")
+                if self.approve_token in message.to_text():
+                    self._count("approved")
+                    return self._stop("approved")
+            elif message.source == self.primary and isinstance(message, TextMessage):
+                # Only text is an answer; a ToolCallSummaryMessage is the raw tool output
+                self._answers += 1
+                if self._answers == 1:
+                    self.last_decision = self.policy.decide(self._prompt, message.to_text(), self._tool_calls)
+                    self._count(f"decision_{self.last_decision.reason}")
+                    if not self.last_decision.reflect:
+                        self._count("rounds_skipped")
+                        return self._stop(f"skipped ({self.last_decision.reason})")
+                if self._rounds >= self.max_rounds:
+                    if self._rounds:
+                        self._count("rounds_capped")
+                    return self._stop("round cap")
+        return None
+
+    async def reset(self) -> None:
+        self._terminated = False
+        self._prompt = ""
+        self._tool_calls = 0
+        self._answers = 0
+        self._rounds = 0
@@ -0,0 +1,112 @@
+import logging
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from autogen_agentchat.messages import BaseAgentEvent, BaseChatMessage
+
+
+class RuleBasedSelector:
+    """
+    Deterministic ``selector_func`` for SelectorGroupChat.
+
+    Routes the obvious cases locally and returns ``None`` (letting the team
+    fall back to its LLM selector) only when the rules are ambiguous:
+
+    1. A new user task always goes to the planner first.
+    2. After the planner speaks, route to the specialist it addressed: by
+       agent name/alias, by a tool name owned by a single specialist, or by
+       keywords when exactly one specialist scores highest.
+    3. After a specialist speaks, continue with any other specialist the
+       planner assigned in the same message, otherwise go back to the planner.
+    """
+
+    # Process-wide counters, shared by every team built in this worker.
+    totals: Counter = Counter()
+
+    def __init__(
+        self,
+        planner: str,
+        specialists: Dict[str, Iterable[str]],
+        aliases: Optional[Dict[str, Iterable[str]]] = None,
+        tool_routes: Optional[Dict[str, str]] = None,
+        continue_assignments: bool = True,
+    ) -> None:
+        self.planner = planner
+        self.keywords = {name: [k.lower() for k in words] for name, words in specialists.items()}
+        self.aliases = {name: [name.lower()] for name in specialists}
+        for name, extra in (aliases or {}).items():
+            self.aliases[name].extend(a.lower() for a in extra)
+        self.tool_routes = {tool.lower(): agent for tool, agent in (tool_routes or {}).items()}
+        self.continue_assignments = continue_assignments
+        self.stats: Counter = Counter()
+
+    def _count(self, outcome: str) -> None:
+        self.stats[outcome] += 1
+        RuleBasedSelector.totals[outcome] += 1
+
+    def _mentioned(self, text: str) -> List[str]:
+        """Specialists addressed by name/alias or by tool name, in order of first mention."""
+        positions = {}
+        for name, aliases in self.aliases.items():
+            hits = [text.find(alias) for alias in aliases if alias in text]
+            if hits:
+                positions[name] = min(hits)
+        for tool, name in self.tool_routes.items():
+            index = text.find(tool)
+            if index >= 0 and index < positions.get(name, len(text) + 1):
+                positions[name] = index
+        return sorted(positions, key=positions.get)
+
+    def _by_keywords(self, text: str) -> Optional[str]:
+        scores = {name: sum(text.count(k) for k in words) for name, words in self.keywords.items()}
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if not ranked or ranked[0][1] == 0 or (len(ranked) > 1 and ranked[0][1] == ranked[1][1]):
+            return None
+        return ranked[0][0]
+
+    def select(self, thread: Sequence[BaseAgentEvent | BaseChatMessage]) -> Optional[str]:
+        chat = [m for m in thread if isinstance(m, BaseChatMessage)]
+        if not chat or chat[-1].source == "user":
+            return self._route("rule_user_to_planner", self.planner)
+
+        last = chat[-1]
+        if last.source == self.planner:
+            text = last.to_text().lower()
+            mentioned = self._mentioned(text)
+            if len(mentioned) == 1 or (mentioned and self.continue_assignments):
+                return self._route("rule_planner_mention", mentioned[0])
+            specialist = self._by_keywords(text)
+            if specialist:
+                return self._route("rule_planner_keywords", specialist)
+            return self._route("llm_fallback", None)
+
+        if last.source in self.keywords:
+            if self.continue_assignments:
+                pending = self._pending_assignments(chat)
+                if pending:
+                    return self._route("rule_next_assignment", pending[0])
+            return self._route("rule_specialist_to_planner", self.planner)
+
+        return self._route("llm_fallback", None)
+
+    def _pending_assignments(self, chat: Sequence[BaseChatMessage]) -> List[str]:
+        """Specialists named in the planner's latest message that have not answered since."""
+        for index in range(len(chat) - 1, -1, -1):
+            message = chat[index]
+            if message.source == "user":
+                return []
+            if message.source == self.planner:
+                answered = {m.source for m in chat[index + 1 :]}
+                return [name for name in self._mentioned(message.to_text().lower()) if name not in answered]
+        return []
+
+    def _route(self, outcome: str, speaker: Optional[str]) -> Optional[str]:
+        self._count(outcome)
+        logging.debug(f"[RuleBasedSelector] {outcome} -> {speaker}")
+        return speaker
+
+    __call__ = select
+
+    @property
+    def skipped_llm_calls(self) -> int:
+        return sum(count for outcome, count in self.stats.items() if outcome != "llm_fallback")
@@ -4,9 +4,6 @@ from dotenv import load_dotenv
 from autogen_agentchat.agents import AssistantAgent  
 from autogen_agentchat.teams import RoundRobinGroupChat  
 from autogen_agentchat.conditions import TextMessageTermination  
-from autogen_core import CancellationToken  
-from autogen_ext.models.openai import AzureOpenAIChatCompletionClient  
-from autogen_ext.tools.mcp import SseServerParams, mcp_server_tools  
   
 from autogen.base_agent import BaseAgent    
 load_dotenv()  
@@ -22,28 +19,18 @@ class Agent(BaseAgent):
         if self._initialized:  
             return  
   
-        server_params = SseServerParams(  
-            url=self.mcp_server_uri,  
-            headers={"Content-Type": "application/json"},  
-            timeout=30  
-        )  
-  
         # Fetch tools (async)  
-        tools = await mcp_server_tools(server_params)  
+        tools = await self.load_tools()  
   
         # Set up the OpenAI/Azure model client  
-        model_client = AzureOpenAIChatCompletionClient(  
-            api_key=self.azure_openai_key,  
-            azure_endpoint=self.azure_openai_endpoint,  
-            api_version=self.api_version,  
-            azure_deployment=self.azure_deployment,  
-            model=self.openai_model_name,  
-        )  
+        model_client = self.create_model_client()  
   
         # Set up the assistant agent  
         agent = AssistantAgent(  
             name="ai_assistant",  
             model_client=model_client,  
+            model_context=self.create_model_context(model_client),  
+            memory=self.memory(),  
             tools=tools,  
             system_message=(  
                 "あなたは役立つアシスタントです。複数のツールを使用して情報を検索し、質問に回答することができます。"  
@@ -63,11 +50,14 @@ class Agent(BaseAgent):
             await self.loop_agent.load_state(self.state)  
         self._initialized = True  
   
+    async def setup(self) -> None:  
+        await self._setup_loop_agent()  
+  
     async def chat_async(self, prompt: str) -> str:  
         """Ensure agent/tools are ready and process the prompt."""  
         await self._setup_loop_agent()  
   
-        response = await self.loop_agent.run(task=prompt, cancellation_token=CancellationToken())  
+        response = await self.run_team(self.loop_agent, prompt)  
         assistant_response = response.messages[-1].content  
   
         messages = [  
@@ -0,0 +1,195 @@
+import os
+import uuid
+import zlib
+import pickle
+import logging
+from typing import Any, List, Mapping, Optional, Tuple
+
+# Delta node opcodes. A delta mirrors the shape of the state it describes:
+#   ("=", value)              replace the node with ``value``
+#   ("{", changed, removed)   dict: recurse into ``changed`` keys, drop ``removed``
+#   ("[", keep, tail)         list: keep the first ``keep`` items, then append ``tail``
+# Team state is dominated by append-only message threads, so most turns
+# collapse to a handful of "[" nodes carrying only the new messages.
+_REPLACE = "="
+_DICT = "{"
+_LIST = "["
+
+
+def diff_state(old: Any, new: Any) -> Optional[tuple]:
+    """Return a delta turning ``old`` into ``new``, or ``None`` if unchanged."""
+    if isinstance(old, Mapping) and isinstance(new, Mapping):
+        changed = {}
+        for key, value in new.items():
+            if key not in old:
+                changed[key] = (_REPLACE, value)
+                continue
+            node = diff_state(old[key], value)
+            if node is not None:
+                changed[key] = node
+        removed = [key for key in old if key not in new]
+        if not changed and not removed:
+            return None
+        return (_DICT, changed, removed)
+
+    if isinstance(old, list) and isinstance(new, list):
+        keep, limit = 0, min(len(old), len(new))
+        while keep < limit and old[keep] == new[keep]:
+            keep += 1
+        if keep == len(old) == len(new):
+            return None
+        return (_LIST, keep, new[keep:])
+
+    if old == new:
+        return None
+    return (_REPLACE, new)
+
+
+def apply_delta(old: Any, delta: Optional[tuple]) -> Any:
+    """Inverse of :func:`diff_state`. Does not mutate ``old``."""
+    if delta is None:
+        return old
+    op = delta[0]
+    if op == _REPLACE:
+        return delta[1]
+    if op == _DICT:
+        _, changed, removed = delta
+        removed = set(removed)
+        result = {key: value for key, value in old.items() if key not in removed}
+        for key, node in changed.items():
+            result[key] = apply_delta(old.get(key), node)
+        return result
+    if op == _LIST:
+        _, keep, tail = delta
+        return old[:keep] + tail
+    raise ValueError(f"Unknown delta opcode: {op!r}")
+
+
+class SnapshotHead:
+    """
+    What the session key holds: the generation of the current checkpoint and
+    the sizes of the deltas recorded since. The compressed checkpoint and each
+    delta live under their own keys (``<key>:checkpoint:<generation>``,
+    ``<key>:delta:<generation>:<n>``), so a turn writes its delta and this
+    small head, not the whole chain.
+    """
+
+    __slots__ = ("generation", "checkpoint_bytes", "delta_bytes")
+
+    def __init__(self, generation: str, checkpoint_bytes: int, delta_bytes: Optional[List[int]] = None) -> None:
+        self.generation = generation
+        self.checkpoint_bytes = checkpoint_bytes
+        self.delta_bytes = delta_bytes or []
+
+    @property
+    def size_bytes(self) -> int:
+        return self.checkpoint_bytes + sum(self.delta_bytes)
+
+    def __getstate__(self) -> Tuple[str, int, List[int]]:
+        return self.generation, self.checkpoint_bytes, self.delta_bytes
+
+    def __setstate__(self, state: Tuple[str, int, List[int]]) -> None:
+        self.generation, self.checkpoint_bytes, self.delta_bytes = state
+
+
+def _checkpoint_key(key: str, generation: str) -> str:
+    return f"{key}:checkpoint:{generation}"
+
+
+def _delta_key(key: str, generation: str, n: int) -> str:
+    return f"{key}:delta:{generation}:{n}"
+
+
+class StateSnapshotter:
+    """
+    Encodes successive team states as checkpoint + deltas in a StateStore.
+
+    A new full checkpoint is written every ``checkpoint_interval`` turns, or
+    earlier once the accumulated deltas outgrow the checkpoint, which keeps
+    restore cost bounded no matter how long the session runs. A turn between
+    checkpoints writes only its delta and the head (see ``SnapshotHead``).
+    """
+
+    def __init__(self, checkpoint_interval: int = 10, compression_level: int = 6) -> None:
+        self.checkpoint_interval = checkpoint_interval
+        self.compression_level = compression_level
+
+    @classmethod
+    def from_env(cls) -> "StateSnapshotter":
+        return cls(
+            checkpoint_interval=int(os.getenv("STATE_CHECKPOINT_INTERVAL", "10")),
+            compression_level=int(os.getenv("STATE_COMPRESSION_LEVEL", "6")),
+        )
+
+    def _pack(self, value: Any) -> bytes:
+        return zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), self.compression_level)
+
+    @staticmethod
+    def _unpack(blob: bytes) -> Any:
+        return pickle.loads(zlib.decompress(blob))
+
+    def save(self, store: Any, key: str, head: Any, previous_state: Any, new_state: Any) -> Tuple[SnapshotHead, int]:
+        """
+        Record ``new_state`` under ``key`` on top of ``head`` (whose decoded
+        value is ``previous_state``). Returns the new head and the bytes
+        written to the store for this turn (the new blob and the head).
+        """
+        if (
+            not isinstance(head, SnapshotHead)
+            or previous_state is None
+            or len(head.delta_bytes) + 1 >= self.checkpoint_interval
+        ):
+            return self._checkpoint(store, key, head, new_state)
+
+        blob = self._pack(diff_state(previous_state, new_state))
+        if sum(head.delta_bytes) + len(blob) > head.checkpoint_bytes:
+            return self._checkpoint(store, key, head, new_state)
+        store.set(_delta_key(key, head.generation, len(head.delta_bytes)), blob, group=key)
+        head = SnapshotHead(head.generation, head.checkpoint_bytes, head.delta_bytes + [len(blob)])
+        store.set(key, head, group=key)
+        return head, len(blob) + len(pickle.dumps(head, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def _checkpoint(self, store: Any, key: str, old_head: Any, new_state: Any) -> Tuple[SnapshotHead, int]:
+        blob = self._pack(new_state)
+        head = SnapshotHead(uuid.uuid4().hex[:12], len(blob))
+        # The new parts before the head that points at them, then the old parts
+        store.set(_checkpoint_key(key, head.generation), blob, group=key)
+        store.set(key, head, group=key)
+        if isinstance(old_head, SnapshotHead):
+            self._delete_parts(store, key, old_head)
+        return head, len(blob) + len(pickle.dumps(head, protocol=pickle.HIGHEST_PROTOCOL))
+
+    @staticmethod
+    def _delete_parts(store: Any, key: str, head: SnapshotHead) -> None:
+        store.delete(_checkpoint_key(key, head.generation))
+        for n in range(len(head.delta_bytes)):
+            store.delete(_delta_key(key, head.generation, n))
+
+    def load(self, store: Any, key: str) -> Tuple[Any, Any]:
+        """
+        ``(head, state)`` of the latest state under ``key``. Plain
+        (pre-snapshot) states pass through; a head whose parts were evicted
+        loads as no state.
+        """
+        value = store.get(key, None)
+        if not isinstance(value, SnapshotHead):
+            return value, value
+        checkpoint = store.get(_checkpoint_key(key, value.generation), None)
+        if checkpoint is None:
+            logging.warning(f"[StateSnapshotter] checkpoint of {key} is missing (evicted?), starting without state")
+            return None, None
+        state = self._unpack(checkpoint)
+        for n in range(len(value.delta_bytes)):
+            blob = store.get(_delta_key(key, value.generation, n), None)
+            if blob is None:
+                logging.warning(f"[StateSnapshotter] delta {n} of {key} is missing (evicted?), starting without state")
+                return None, None
+            state = apply_delta(state, self._unpack(blob))
+        return value, state
+
+    def delete(self, store: Any, key: str) -> None:
+        """Remove the state under ``key`` with its checkpoint and deltas."""
+        head = store.get(key, None)
+        if isinstance(head, SnapshotHead):
+            self._delete_parts(store, key, head)
+        store.delete(key)
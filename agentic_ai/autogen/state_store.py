@@ -0,0 +1,640 @@
+import os
+import re
+import uuid
+import pickle
+import socket
+import asyncio
+import sqlite3
+import threading
+import time
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+_MISSING = object()
+_DELETED = object()
+
+# Group for keys the store must never evict or expire by its bounds (job
+# records, queue markers); see ``StateStore.set``.
+PINNED = ""
+
+
+class StateStore(ABC):
+    """
+    Key/value store for per-session agent state and chat history.
+
+    Exposes the small dict-style surface ``BaseAgent`` and ``backend.py``
+    rely on (``get``, ``[]``, ``del``, ``in``) so a plain dict can still be
+    passed where a store is expected.
+
+    The bounds (``max_entries``, ``ttl_seconds``) apply to groups of keys,
+    not single keys: the keys of one session (snapshot head, checkpoint and
+    deltas, chat history, tool results) are written with the session id as
+    their ``group`` and are evicted or expired together, so a session is
+    never left half there. A key written without a group is its own group;
+    keys in the ``PINNED`` group and coordination keys (``add``) are outside
+    the bounds.
+    """
+
+    # True when the data survives restarts and is shared by the workers using the store
+    durable = False
+
+    @abstractmethod
+    def get(self, key: str, default: Any = None) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, group: Optional[str] = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    # Atomic operations for coordination keys (leases, claims). They act on
+    # the backing store at once, bypassing any write buffer, so they are
+    # atomic across every worker sharing the store; use them only on keys
+    # that are never written with ``set``.
+
+    def add(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> bool:
+        """Set ``key`` to ``value`` only if it is absent (or expired); True if it was set."""
+        raise NotImplementedError(f"{type(self).__name__} has no atomic add")
+
+    def refresh_if(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        """Restart the expiry of ``key`` if it still holds ``value``."""
+        raise NotImplementedError(f"{type(self).__name__} has no atomic refresh")
+
+    def delete_if(self, key: str, value: Any) -> bool:
+        """Delete ``key`` if it still holds ``value``."""
+        raise NotImplementedError(f"{type(self).__name__} has no atomic delete")
+
+    def keys(self, prefix: str = "") -> List[str]:
+        """Keys starting with ``prefix`` (unordered)."""
+        raise NotImplementedError(f"{type(self).__name__} cannot list keys")
+
+    def flush(self) -> None:
+        """Persist any buffered writes. No-op for synchronous stores."""
+
+    def close(self) -> None:
+        self.flush()
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.set(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self.delete(key)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+
+class InMemoryStateStore(StateStore):
+    """
+    Process-local store bounded by group count (LRU) and optional TTL; a
+    group expires ``ttl_seconds`` after its keys were last read or written.
+    Memory per worker stays bounded, but state is lost on restart and is
+    not shared between uvicorn workers.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: Optional[float] = None) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (expires_at of an ``add`` key, value, group)
+        self._data: Dict[str, Tuple[Optional[float], Any, str]] = {}
+        # group -> (last used, keys), least recently used first
+        self._groups: "OrderedDict[str, Tuple[float, Set[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, key: str, touch: bool = True) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return _MISSING
+        expires_at, value, group = item
+        now = time.monotonic()
+        if group == PINNED:
+            return _MISSING if expires_at is not None and expires_at <= now else value
+        if self.ttl_seconds and self._groups[group][0] + self.ttl_seconds <= now:
+            self._drop(group)
+            return _MISSING
+        if touch:
+            self._groups[group] = (now, self._groups[group][1])
+            self._groups.move_to_end(group)
+        return value
+
+    def _drop(self, group: str) -> None:
+        for key in self._groups.pop(group)[1]:
+            del self._data[key]
+
+    def _discard(self, key: str) -> None:
+        item = self._data.pop(key, None)
+        if item is None or item[2] == PINNED:
+            return
+        keys = self._groups[item[2]][1]
+        keys.discard(key)
+        if not keys:
+            del self._groups[item[2]]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            value = self._live(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: str, value: Any, group: Optional[str] = None) -> None:
+        group = key if group is None else group
+        with self._lock:
+            self._discard(key)
+            self._data[key] = (None, value, group)
+            if group == PINNED:
+                return
+            keys = self._groups.pop(group, (0.0, set()))[1]
+            keys.add(key)
+            self._groups[group] = (time.monotonic(), keys)
+            while len(self._groups) > self.max_entries:
+                self._drop(next(iter(self._groups)))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._discard(key)
+
+    def add(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._live(key) is not _MISSING:
+                return False
+            self._discard(key)
+            self._data[key] = (time.monotonic() + ttl_seconds if ttl_seconds else None, value, PINNED)
+            return True
+
+    def refresh_if(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        with self._lock:
+            if self._live(key) != value:
+                return False
+            self._data[key] = (time.monotonic() + ttl_seconds, value, PINNED)
+            return True
+
+    def delete_if(self, key: str, value: Any) -> bool:
+        with self._lock:
+            if self._live(key) != value:
+                return False
+            self._discard(key)
+            return True
+
+    def keys(self, prefix: str = "") -> List[str]:
+        with self._lock:
+            return [key for key in list(self._data) if key.startswith(prefix) and self._live(key, touch=False) is not _MISSING]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class WriteBehindStateStore(StateStore):
+    """
+    Base class for durable stores. Writes are buffered and coalesced in
+    memory, then flushed in batches by a background thread every
+    ``flush_interval`` seconds (or as soon as ``batch_size`` keys are
+    pending). Reads see pending writes first, so a worker always reads its
+    own writes; other workers see them after the next flush.
+    """
+
+    # Pending entries are (value, group); a value of _DELETED removes the key
+
+    def __init__(self, flush_interval: float = 0.05, batch_size: int = 100) -> None:
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: Dict[str, Tuple[Any, Optional[str]]] = {}
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, name=f"{type(self).__name__}-flusher", daemon=True)
+        self._flusher.start()
+
+    @abstractmethod
+    def _read(self, key: str) -> Any:
+        """Return the stored value for ``key`` or ``_MISSING``."""
+
+    @abstractmethod
+    def _write_batch(self, batch: Dict[str, Tuple[Any, Optional[str]]]) -> None:
+        """Persist ``batch`` of ``(value, group)``; a value of ``_DELETED`` removes the key."""
+
+    @abstractmethod
+    def _keys(self, prefix: str) -> List[str]:
+        """Stored keys starting with ``prefix``."""
+
+    def keys(self, prefix: str = "") -> List[str]:
+        with self._pending_lock:
+            pending = {key: value for key, (value, _) in self._pending.items() if key.startswith(prefix)}
+        keys = set(self._keys(prefix))
+        keys.update(key for key, value in pending.items() if value is not _DELETED)
+        keys.difference_update(key for key, value in pending.items() if value is _DELETED)
+        return list(keys)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._pending_lock:
+            value = self._pending.get(key, (_MISSING, None))[0]
+        if value is _DELETED:
+            return default
+        if value is _MISSING:
+            value = self._read(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: str, value: Any, group: Optional[str] = None) -> None:
+        self._enqueue(key, value, group)
+
+    def delete(self, key: str) -> None:
+        self._enqueue(key, _DELETED, None)
+
+    def _enqueue(self, key: str, value: Any, group: Optional[str]) -> None:
+        with self._pending_lock:
+            self._pending[key] = (value, group)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            try:
+                self._write_batch(batch)
+            except Exception as exc:
+                logging.error(f"[{type(self).__name__}] flush failed, retrying later: {exc}")
+                with self._pending_lock:
+                    # Keep newer writes that arrived while we were flushing.
+                    batch.update(self._pending)
+                    self._pending = batch
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self) -> None:
+        self._closed = True
+        self._wakeup.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+
+
+class SqliteStateStore(WriteBehindStateStore):
+    """
+    Durable on-disk store. Survives restarts and can be shared by several
+    backend workers on the same host (the database runs in WAL mode).
+    ``max_entries`` evicts the least recently used groups and a group
+    expires ``ttl_seconds`` after its keys were last read or written: reads
+    are recorded in memory and written with the next flush, so both are
+    exact to within ``flush_interval``.
+    """
+
+    durable = True
+
+    def __init__(
+        self,
+        path: str = "session_state.db",
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        flush_interval: float = 0.05,
+        batch_size: int = 100,
+    ) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn_lock = threading.Lock()
+        # Keys read since the last flush; their group's last-used time is updated with it
+        self._accessed: Set[str] = set()
+        with self._conn_lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # grp is NULL for pinned and coordination keys; expires_at is set for the latter
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+                " expires_at REAL, updated_at REAL NOT NULL, grp TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS state_grp ON state(grp)")
+            # used_at: last write or read of any key in the group (the LRU order)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS groups (grp TEXT PRIMARY KEY, used_at REAL NOT NULL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS groups_used_at ON groups(used_at)")
+        super().__init__(flush_interval=flush_interval, batch_size=batch_size)
+
+    def _cutoff(self, now: float) -> float:
+        """Groups last used at or before this time have expired."""
+        return now - self.ttl_seconds if self.ttl_seconds else 0.0
+
+    def _read(self, key: str) -> Any:
+        now = time.time()
+        with self._conn_lock:
+            row = self._conn.execute(
+                "SELECT s.value, s.expires_at, g.used_at FROM state s LEFT JOIN groups g ON g.grp = s.grp WHERE s.key = ?",
+                (key,),
+            ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now) or (row[2] is not None and row[2] <= self._cutoff(now)):
+            return _MISSING
+        with self._pending_lock:
+            self._accessed.add(key)
+        return pickle.loads(row[0])
+
+    def flush(self) -> None:
+        super().flush()
+        with self._pending_lock:
+            accessed, self._accessed = self._accessed, set()
+        if accessed:
+            now = time.time()
+            try:
+                with self._conn_lock, self._conn:
+                    self._conn.executemany(
+                        "UPDATE groups SET used_at = ? WHERE grp = (SELECT grp FROM state WHERE key = ?)",
+                        [(now, key) for key in accessed],
+                    )
+            except sqlite3.Error as exc:
+                logging.warning(f"[SqliteStateStore] recording reads failed: {exc}")
+
+    def _write_batch(self, batch: Dict[str, Tuple[Any, Optional[str]]]) -> None:
+        now = time.time()
+        upserts = []
+        groups: Set[str] = set()
+        deletes = []
+        for key, (value, group) in batch.items():
+            if value is _DELETED:
+                deletes.append((key,))
+                continue
+            group = key if group is None else group
+            grp = None if group == PINNED else group
+            upserts.append((key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), None, now, grp))
+            if grp is not None:
+                groups.add(grp)
+        with self._conn_lock, self._conn:
+            if upserts:
+                self._conn.executemany("INSERT OR REPLACE INTO state VALUES (?, ?, ?, ?, ?)", upserts)
+                self._conn.executemany("INSERT OR REPLACE INTO groups VALUES (?, ?)", [(grp, now) for grp in groups])
+            if deletes:
+                self._conn.executemany("DELETE FROM state WHERE key = ?", deletes)
+                self._conn.execute("DELETE FROM groups WHERE NOT EXISTS (SELECT 1 FROM state WHERE state.grp = groups.grp)")
+            self._conn.execute("DELETE FROM state WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+            stale = self._conn.execute("SELECT grp FROM groups WHERE used_at <= ?", (self._cutoff(now),)).fetchall()
+            if self.max_entries:
+                stale += self._conn.execute(
+                    "SELECT grp FROM groups ORDER BY used_at DESC LIMIT -1 OFFSET ?", (self.max_entries,)
+                ).fetchall()
+            if stale:
+                self._conn.executemany("DELETE FROM state WHERE grp = ?", stale)
+                self._conn.executemany("DELETE FROM groups WHERE grp = ?", stale)
+
+    def add(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> bool:
+        now = time.time()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._conn_lock, self._conn:
+            self._conn.execute("DELETE FROM state WHERE key = ? AND expires_at IS NOT NULL AND expires_at <= ?", (key, now))
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO state VALUES (?, ?, ?, ?, NULL)", (key, blob, now + ttl_seconds if ttl_seconds else None, now)
+            )
+        return cursor.rowcount == 1
+
+    def refresh_if(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        now = time.time()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._conn_lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE state SET expires_at = ?, updated_at = ? WHERE key = ? AND value = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (now + ttl_seconds, now, key, blob, now),
+            )
+        return cursor.rowcount == 1
+
+    def delete_if(self, key: str, value: Any) -> bool:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._conn_lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM state WHERE key = ? AND value = ?", (key, blob))
+        return cursor.rowcount == 1
+
+    # Live rows: neither the key (coordination keys) nor its group has expired
+    _LIVE = (
+        "FROM state s LEFT JOIN groups g ON g.grp = s.grp"
+        " WHERE (s.expires_at IS NULL OR s.expires_at > ?) AND (g.used_at IS NULL OR g.used_at > ?)"
+    )
+
+    def _keys(self, prefix: str) -> List[str]:
+        now = time.time()
+        with self._conn_lock:
+            rows = self._conn.execute(
+                f"SELECT s.key {self._LIVE} AND substr(s.key, 1, ?) = ?", (now, self._cutoff(now), len(prefix), prefix)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def __len__(self) -> int:
+        now = time.time()
+        with self._conn_lock:
+            return self._conn.execute(f"SELECT COUNT(*) {self._LIVE}", (now, self._cutoff(now))).fetchone()[0]
+
+    def close(self) -> None:
+        super().close()
+        with self._conn_lock:
+            self._conn.close()
+
+
+# Compare-and-expire / compare-and-delete, atomic on the redis server
+REFRESH_IF_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('PEXPIRE', KEYS[1], ARGV[2]) end
+return 0
+"""
+DELETE_IF_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+"""
+
+
+class RedisStateStore(WriteBehindStateStore):
+    """
+    Store backed by any client speaking the redis-py API (``get``,
+    ``pipeline().set/delete/execute``). Pass ``redis.Redis`` for production
+    or a local fake such as ``fakeredis.FakeRedis`` in tests. Bound memory
+    with ``ttl_seconds``, which expires a group ``ttl_seconds`` after the
+    last write to any of its keys (reads do not extend it); redis evicts
+    single keys, so use ``maxmemory-policy noeviction`` (an LRU policy can
+    drop part of a session).
+    """
+
+    durable = True
+    # Sets listing the keys of each group, so a write can restart the expiry of all of them
+    GROUP_INDEX = "__group__:"
+
+    def __init__(
+        self,
+        client: Any,
+        prefix: str = "agent_state:",
+        ttl_seconds: Optional[float] = None,
+        flush_interval: float = 0.05,
+        batch_size: int = 100,
+    ) -> None:
+        self.client = client
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+        super().__init__(flush_interval=flush_interval, batch_size=batch_size)
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs: Any) -> "RedisStateStore":
+        import redis  # optional dependency, only needed for this backend
+
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def _read(self, key: str) -> Any:
+        raw = self.client.get(self.prefix + key)
+        return _MISSING if raw is None else pickle.loads(raw)
+
+    def add(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> bool:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        return bool(self.client.set(self.prefix + key, blob, nx=True, px=int(ttl_seconds * 1000) if ttl_seconds else None))
+
+    def refresh_if(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        return bool(self.client.eval(REFRESH_IF_SCRIPT, 1, self.prefix + key, blob, int(ttl_seconds * 1000)))
+
+    def delete_if(self, key: str, value: Any) -> bool:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        return bool(self.client.eval(DELETE_IF_SCRIPT, 1, self.prefix + key, blob))
+
+    def _keys(self, prefix: str) -> List[str]:
+        pattern = re.sub(r"([*?\[\]\\])", r"\\\1", self.prefix + prefix) + "*"
+        keys = ((key.decode() if isinstance(key, bytes) else key)[len(self.prefix):] for key in self.client.scan_iter(match=pattern, count=1000))
+        return [key for key in keys if not key.startswith(self.GROUP_INDEX)]
+
+    def _group_key(self, group: str) -> str:
+        return f"{self.prefix}{self.GROUP_INDEX}{group}"
+
+    def _write_batch(self, batch: Dict[str, Tuple[Any, Optional[str]]]) -> None:
+        ttl = int(self.ttl_seconds) if self.ttl_seconds else None
+        groups: Dict[str, List[str]] = {}
+        pipe = self.client.pipeline(transaction=False)
+        for key, (value, group) in batch.items():
+            if value is _DELETED:
+                pipe.delete(self.prefix + key)
+                continue
+            pipe.set(self.prefix + key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), ex=None if group == PINNED else ttl)
+            if ttl and group not in (None, PINNED):
+                groups.setdefault(group, []).append(key)
+        for group, keys in groups.items():
+            pipe.sadd(self._group_key(group), *keys)
+            pipe.expire(self._group_key(group), ttl)
+        pipe.execute()
+        # Restart the expiry of the group's other keys too, so it expires as a whole
+        for group in groups:
+            members = [member.decode() if isinstance(member, bytes) else member for member in self.client.smembers(self._group_key(group))]
+            pipe = self.client.pipeline(transaction=False)
+            for member in members:
+                pipe.expire(self.prefix + member, ttl)
+            gone = [member for member, alive in zip(members, pipe.execute()) if not alive]
+            if gone:
+                self.client.srem(self._group_key(group), *gone)
+
+
+class StoreLease:
+    """
+    Exclusive, expiring hold on ``key`` of a store shared by several workers
+    (built on ``StateStore.add``). It is renewed in the background while
+    held and released only by its holder; a holder that dies loses it after
+    ``ttl_seconds``. ``release`` flushes the store first, so the next holder
+    reads everything written under the lease.
+
+    A holder must stop writing once ``lost`` is set: another worker may hold
+    the key by then. It is set when a renewal fails, and also once
+    ``ttl_seconds`` have passed since the last successful one (e.g. the event
+    loop was blocked); ``on_lost`` callbacks run when a renewal fails.
+    """
+
+    def __init__(self, store: StateStore, key: str, ttl_seconds: float = 30.0) -> None:
+        self.store = store
+        self.key = key
+        self.ttl_seconds = ttl_seconds
+        self.token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        self._lost = False
+        self._valid_until = 0.0
+        self._on_lost: List[Callable[[], None]] = []
+        self._renewer: Optional["asyncio.Task[None]"] = None
+
+    @property
+    def lost(self) -> bool:
+        return self._lost or time.monotonic() >= self._valid_until
+
+    def on_lost(self, callback: Callable[[], None]) -> None:
+        self._on_lost.append(callback)
+
+    def try_acquire(self) -> bool:
+        start = time.monotonic()
+        if not self.store.add(self.key, self.token, self.ttl_seconds):
+            return False
+        self._valid_until = start + self.ttl_seconds
+        self._renewer = asyncio.ensure_future(self._renew())
+        return True
+
+    async def acquire(self, timeout: float, abandoned: Optional[asyncio.Event] = None) -> bool:
+        """Poll for the lease for up to ``timeout`` seconds (or until ``abandoned`` is set)."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        delay = 0.05
+        while not self.try_acquire():
+            remaining = deadline - loop.time()
+            if remaining <= 0 or (abandoned is not None and abandoned.is_set()):
+                return False
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, 1.0)
+        return True
+
+    async def _renew(self) -> None:
+        while True:
+            await asyncio.sleep(self.ttl_seconds / 3)
+            start = time.monotonic()
+            if not await asyncio.to_thread(self.store.refresh_if, self.key, self.token, self.ttl_seconds):
+                self._lost = True
+                logging.warning(f"[StoreLease] lost {self.key} (expired or taken over)")
+                for callback in self._on_lost:
+                    callback()
+                return
+            self._valid_until = start + self.ttl_seconds
+
+    async def release(self) -> None:
+        if self._renewer is not None:
+            self._renewer.cancel()
+            self._renewer = None
+        # Flushing and deleting are store I/O: keep them off the event loop
+        await asyncio.to_thread(self._release)
+
+    def _release(self) -> None:
+        self.store.flush()
+        self.store.delete_if(self.key, self.token)
+
+
+def create_state_store() -> StateStore:
+    """
+    Build the session store selected by environment variables:
+
+    STATE_STORE_BACKEND      memory (default) | sqlite | redis
+    STATE_STORE_PATH         sqlite database file (default: session_state.db)
+    STATE_STORE_URL          redis URL (default: redis://localhost:6379/0)
+    STATE_STORE_MAX_ENTRIES  LRU bound on sessions for memory/sqlite (default: 10000)
+    STATE_STORE_TTL_SECONDS  expire a session this many seconds after its last
+                             read or write (redis: after its last write)
+    """
+    backend = os.getenv("STATE_STORE_BACKEND", "memory").lower()
+    max_entries = int(os.getenv("STATE_STORE_MAX_ENTRIES", "10000"))
+    ttl = os.getenv("STATE_STORE_TTL_SECONDS")
+    ttl_seconds = float(ttl) if ttl else None
+
+    if backend == "memory":
+        return InMemoryStateStore(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    if backend == "sqlite":
+        return SqliteStateStore(
+            os.getenv("STATE_STORE_PATH", "session_state.db"),
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+        )
+    if backend == "redis":
+        return RedisStateStore.from_url(os.getenv("STATE_STORE_URL", "redis://localhost:6379/0"), ttl_seconds=ttl_seconds)
+    raise ValueError(f"Unknown STATE_STORE_BACKEND: {backend}")
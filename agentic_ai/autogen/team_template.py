@@ -0,0 +1,80 @@
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from autogen_agentchat.base import Handoff
+from autogen_core.tools import BaseTool
+from pydantic import PrivateAttr
+
+from autogen.tool_selection import select_tools
+
+_MISSING = object()
+
+
+class SharedHandoff(Handoff):
+    """
+    Handoff whose tool is built on first use and then reused. AutoGen's
+    Handoff creates a new FunctionTool (and a new pydantic argument model
+    class) every time ``handoff_tool`` is read, i.e. once per agent per
+    session; the tool only returns ``message``, so one instance can serve
+    every session.
+    """
+
+    _tool: Optional[BaseTool[Any, Any]] = PrivateAttr(default=None)
+
+    @property
+    def handoff_tool(self) -> BaseTool[Any, Any]:
+        if self._tool is None:
+            self._tool = super().handoff_tool
+        return self._tool
+
+
+class TeamTemplate:
+    """
+    The immutable part of an agent module's team, built once per process
+    and shared by every session of the worker:
+
+    - the tool subset of each agent (selected by name once, so the schema
+      token accounting of ``select_tools`` does not run per session),
+    - handoff tools (``SharedHandoff``),
+    - anything else a module registers with ``shared(key, factory)``.
+
+    Prompts are string constants and the Azure client's connection pool is
+    already shared (model_clients.py). What stays per session is the mutable
+    part: the AssistantAgents with their model contexts, the model client
+    and tool wrappers (usage, cancellation, tool cache) and the team with
+    its restored state.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._shared: Dict[Any, Any] = {}
+
+    def shared(self, key: Any, factory: Callable[[], Any]) -> Any:
+        value = self._shared.get(key, _MISSING)
+        if value is _MISSING:
+            value = self._shared[key] = factory()
+        return value
+
+    def tools_for(self, agent_name: str, tools: Sequence[Any], domains: Sequence[str]) -> List[Any]:
+        """This session's wrappers of the tools selected for ``agent_name`` (selection cached by tool names)."""
+        names = self.shared(
+            ("tools", agent_name, tuple(tool.name for tool in tools), tuple(domains)),
+            lambda: frozenset(tool.name for tool in select_tools(tools, domains, agent_name)),
+        )
+        return [tool for tool in tools if tool.name in names]
+
+    def handoffs(self, targets: Sequence[str]) -> List[Handoff]:
+        return [self.shared(("handoff", target), lambda target=target: SharedHandoff(target=target)) for target in targets]
+
+
+_templates: Dict[str, TeamTemplate] = {}
+
+
+def get_team_template(agent_module: str) -> Optional[TeamTemplate]:
+    """The worker's template for ``agent_module``; None when TEAM_TEMPLATES=off (rebuild per session)."""
+    if os.getenv("TEAM_TEMPLATES", "on").lower() != "on":
+        return None
+    template = _templates.get(agent_module)
+    if template is None:
+        template = _templates[agent_module] = TeamTemplate(agent_module)
+    return template
@@ -0,0 +1,77 @@
+import json
+import os
+import unicodedata
+from functools import lru_cache
+from typing import Any, Iterable, Optional
+
+# Per-message framing overhead used by the OpenAI chat format.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@lru_cache(maxsize=1)
+def _tiktoken_encoding() -> Optional[Any]:
+    """
+    Return a tiktoken encoding when explicitly enabled with TOKEN_COUNTER=tiktoken.
+    tiktoken downloads its BPE files on first use, so it is opt-in; the default
+    heuristic below never touches the network.
+    """
+    if os.getenv("TOKEN_COUNTER", "heuristic").lower() != "tiktoken":
+        return None
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(os.getenv("TIKTOKEN_ENCODING", "o200k_base"))
+    except Exception:
+        return None
+
+
+def _is_cjk(char: str) -> bool:
+    return unicodedata.east_asian_width(char) in ("W", "F")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in ``text`` locally.
+
+    The heuristic counts wide (CJK) characters as one token each and the rest
+    at roughly four characters per token. That is an estimate, not an exact
+    tokenizer, but it is good enough for budgeting and needs no network.
+    """
+    if not text:
+        return 0
+    encoding = _tiktoken_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    wide = sum(1 for char in text if ord(char) > 0x2E7F and _is_cjk(char))
+    narrow = len(text) - wide
+    return wide + (narrow + 3) // 4
+
+
+def _content_text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        parts = []
+        for item in content:
+            if isinstance(item, str):
+                parts.append(item)
+            elif hasattr(item, "arguments"):  # FunctionCall
+                parts.append(f"{item.name}({item.arguments})")
+            elif hasattr(item, "content"):  # FunctionExecutionResult
+                parts.append(str(item.content))
+        return "\n".join(parts)
+    return str(content)
+
+
+def count_message_tokens(message: Any) -> int:
+    """Estimate the prompt tokens of one LLM message (``autogen_core.models``)."""
+    return MESSAGE_OVERHEAD_TOKENS + count_tokens(_content_text(getattr(message, "content", message)))
+
+
+def count_messages_tokens(messages: Iterable[Any]) -> int:
+    return sum(count_message_tokens(message) for message in messages)
+
+
+def count_schema_tokens(schema: Any) -> int:
+    """Estimate the prompt tokens a tool schema adds to every request."""
+    return count_tokens(json.dumps(schema, ensure_ascii=False))
@@ -0,0 +1,150 @@
+import os
+import json
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional
+
+from autogen_core import CancellationToken
+from autogen_core.tools import BaseTool, ToolSchema
+from pydantic import BaseModel
+
+from autogen.state_store import InMemoryStateStore
+from autogen.tool_catalog import shared_schema
+
+_MISSING = object()
+
+
+class ToolCallCache:
+    """
+    Memo of tool results keyed by tool name and canonical JSON arguments.
+
+    Identical calls made while the first one is still running (e.g. by
+    concurrent GraphFlow branches) wait for that call instead of issuing
+    their own. The shared call runs in its own task, so cancelling one
+    caller does not cancel the others; it is cancelled only when every
+    caller waiting for it is. Failed calls are not cached.
+    """
+
+    def __init__(self, scope: str = "run", ttl_seconds: Optional[float] = None, max_entries: int = 256) -> None:
+        self.scope = scope
+        self._results = InMemoryStateStore(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._inflight: Dict[str, "asyncio.Task[Any]"] = {}
+        self._waiters: Dict["asyncio.Task[Any]", int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(name: str, args: Mapping[str, Any]) -> str:
+        return f"{name}:{json.dumps(args, sort_keys=True, ensure_ascii=False, default=str)}"
+
+    async def call(self, name: str, args: Mapping[str, Any], fn: Callable[[], Awaitable[Any]]) -> Any:
+        key = self.key(name, args)
+        value = self._results.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            logging.debug(f"[ToolCallCache] hit {key}")
+            return value
+        task = self._inflight.get(key)
+        if task is not None:
+            self.hits += 1
+            logging.debug(f"[ToolCallCache] joined in-flight {key}")
+        else:
+            self.misses += 1
+            task = self._inflight[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda done: self._finished(key, done))
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[task] == 1:
+                task.cancel()  # nobody else is waiting for it
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    def _finished(self, key: str, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        if task.exception() is None:  # also marks a failure retrieved when every caller is gone
+            self._results.set(key, task.result())
+
+    def clear(self) -> None:
+        self._results = InMemoryStateStore(max_entries=self._results.max_entries, ttl_seconds=self._results.ttl_seconds)
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+
+class MemoizedTool(BaseTool[BaseModel, Any]):
+    """
+    Wraps a tool (typically an McpToolAdapter) so calls go through a
+    ToolCallCache. Schema and result formatting are the wrapped tool's;
+    other attributes are looked up on the wrapped tool as well.
+    """
+
+    def __init__(self, tool: BaseTool[Any, Any], cache: ToolCallCache) -> None:
+        self.tool = tool
+        self.cache = cache
+        super().__init__(
+            args_type=tool.args_type(),
+            return_type=tool.return_type(),
+            name=tool.name,
+            description=tool.description,
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "tool":
+            raise AttributeError(name)
+        return getattr(self.tool, name)
+
+    @property
+    def schema(self) -> ToolSchema:
+        return shared_schema(self.tool)
+
+    def return_value_as_string(self, value: Any) -> str:
+        return self.tool.return_value_as_string(value)
+
+    async def run(self, args: BaseModel, cancellation_token: CancellationToken) -> Any:
+        return await self.tool.run(args, cancellation_token)
+
+    async def run_json(
+        self, args: Mapping[str, Any], cancellation_token: CancellationToken, call_id: str | None = None
+    ) -> Any:
+        return await self.cache.call(
+            self.name, args, lambda: self.tool.run_json(args, cancellation_token, call_id=call_id)
+        )
+
+
+def memoize_tools(tools: List[Any], cache: Optional[ToolCallCache]) -> List[Any]:
+    if cache is None:
+        return tools
+    return [MemoizedTool(tool, cache) if isinstance(tool, BaseTool) else tool for tool in tools]
+
+
+# Session-scoped caches outlive the per-request Agent objects; bounded per worker.
+_session_caches = InMemoryStateStore(max_entries=1000)
+
+
+def create_tool_cache(session_id: str) -> Optional[ToolCallCache]:
+    """
+    Tool-call cache for an agent, configured by TOOL_CACHE_SCOPE:
+
+    - ``run`` (default): identical calls are deduplicated within one turn.
+    - ``session``: results are reused across the session's turns for
+      TOOL_CACHE_TTL_SECONDS (default 300).
+    - ``off``: no memoization.
+    """
+    scope = os.getenv("TOOL_CACHE_SCOPE", "run").lower()
+    if scope == "off":
+        return None
+    if scope == "session":
+        cache = _session_caches.get(session_id)
+        if cache is None:
+            cache = ToolCallCache("session", ttl_seconds=float(os.getenv("TOOL_CACHE_TTL_SECONDS", "300")))
+            _session_caches.set(session_id, cache)
+        return cache
+    return ToolCallCache("run")
@@ -0,0 +1,78 @@
+import os
+import time
+import asyncio
+import logging
+import weakref
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from autogen_core.tools import ToolSchema
+
+if TYPE_CHECKING:
+    from autogen_ext.tools.mcp import SseServerParams
+
+
+class ToolCatalog:
+    """
+    MCP tool adapters of one server, discovered once and shared by every
+    agent of the worker. The adapters open their own session per call, so
+    sharing them is safe; the list is refreshed after ``ttl_seconds``
+    (0 = rediscover on every call, as before). Concurrent callers wait for
+    a single discovery.
+    """
+
+    def __init__(self, server_params: "SseServerParams", ttl_seconds: float = 300.0) -> None:
+        self.server_params = server_params
+        self.ttl_seconds = ttl_seconds
+        self._tools: Optional[List[Any]] = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def fresh(self) -> bool:
+        return self._tools is not None and (time.monotonic() - self._loaded_at) < self.ttl_seconds
+
+    async def tools(self) -> List[Any]:
+        if self.fresh:
+            return list(self._tools)
+        async with self._lock:
+            if not self.fresh:
+                # The MCP client stack (mcp, httpx-sse, ...) is imported on first discovery
+                from autogen_ext.tools.mcp import mcp_server_tools
+
+                tools = await mcp_server_tools(self.server_params)
+                self._tools, self._loaded_at = tools, time.monotonic()
+                logging.info(f"[ToolCatalog] discovered {len(tools)} tools at {self.server_params.url}")
+            return list(self._tools)
+
+    def invalidate(self) -> None:
+        self._tools = None
+
+
+_catalogs: Dict[str, ToolCatalog] = {}
+
+
+def get_tool_catalog(url: str) -> ToolCatalog:
+    """One catalog per MCP server URL per worker; TOOL_CATALOG_TTL_SECONDS (default 300) bounds staleness."""
+    catalog = _catalogs.get(url)
+    if catalog is None:
+        from autogen_ext.tools.mcp import SseServerParams
+
+        server_params = SseServerParams(url=url, headers={"Content-Type": "application/json"}, timeout=30)
+        catalog = _catalogs[url] = ToolCatalog(server_params, float(os.getenv("TOOL_CATALOG_TTL_SECONDS", "300")))
+    return catalog
+
+
+_schemas: "weakref.WeakKeyDictionary[Any, ToolSchema]" = weakref.WeakKeyDictionary()
+
+
+def shared_schema(tool: Any) -> ToolSchema:
+    """
+    ``tool.schema``, computed once per tool object. BaseTool rebuilds the
+    pydantic JSON schema on every read (about 15 ms for the 19 MCP tools),
+    which AssistantAgent does on every model call; the tool wrappers read
+    it through here, so all sessions share the catalog adapters' schemas.
+    """
+    schema = _schemas.get(tool)
+    if schema is None:
+        schema = _schemas[tool] = tool.schema
+    return schema
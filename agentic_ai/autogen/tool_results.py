@@ -0,0 +1,367 @@
+import os
+import json
+import uuid
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from autogen_core import CancellationToken
+from autogen_core.tools import BaseTool, ToolSchema
+from pydantic import BaseModel, Field
+
+from autogen.state_store import InMemoryStateStore, StateStore
+from autogen.tokens import count_tokens
+from autogen.tool_catalog import shared_schema
+
+FETCH_TOOL_NAME = "get_tool_result_rows"
+
+# How a row list over budget is reduced, per tool (default: head)
+# - head: the first rows; the tools already sort by recency or rank
+# - sample: evenly spaced rows, first and last included (time series)
+# - summary: statistics of every column over all rows, plus a sample
+TOOL_RESULT_SHAPES: Dict[str, str] = {
+    "search_tweets_by_hashtag": "head",
+    "get_daily_tweet_counts": "summary",
+    "get_daily_average_engagement": "summary",
+    "get_daily_order_counts": "summary",
+    "get_hourly_tweet_distribution": "summary",
+}
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def result_text(value: Any) -> Optional[str]:
+    """The text payload of a tool result: a FunctionTool's string or the text parts of an MCP result."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list) and value and all(isinstance(getattr(item, "text", None), str) for item in value):
+        return "\n".join(item.text for item in value)
+    return None
+
+
+def clip(value: Any, max_chars: int) -> Any:
+    """``value`` with every string longer than ``max_chars`` cut to that length."""
+    if isinstance(value, str):
+        return value if len(value) <= max_chars else value[:max_chars] + "…"
+    if isinstance(value, dict):
+        return {k: clip(v, max_chars) for k, v in value.items()}
+    if isinstance(value, list):
+        return [clip(v, max_chars) for v in value]
+    return value
+
+
+def find_rows(data: Any) -> Tuple[Optional[List[Any]], Optional[str]]:
+    """The row list of a JSON result (the result itself, or its longest list field) and its key."""
+    if isinstance(data, list):
+        return data, None
+    if isinstance(data, dict):
+        lists = [(len(v), k) for k, v in data.items() if isinstance(v, list)]
+        if lists:
+            _, key = max(lists)
+            return data[key], key
+        # A mapping of many scalars (e.g. hour -> count) is a table too
+        if len(data) > 1 and all(not isinstance(v, (dict, list)) for v in data.values()):
+            return [{"key": k, "value": v} for k, v in data.items()], ""
+    return None, None
+
+
+def summarize_rows(rows: Sequence[Any], top_k: int = 5, max_chars: int = 80) -> Dict[str, Any]:
+    """
+    Per-column statistics over all ``rows``: min/max (with the row label,
+    e.g. the date, where they occur), total and mean of numeric columns;
+    distinct count, first/last and the most frequent values of the others.
+    """
+    dict_rows = [r for r in rows if isinstance(r, dict)]
+    columns: Dict[str, List[Any]] = {}
+    for row in dict_rows:
+        for key, value in row.items():
+            if value is not None:
+                columns.setdefault(key, []).append(value)
+    label = next((k for k, vs in columns.items() if all(isinstance(v, str) for v in vs)), None)
+    summary: Dict[str, Any] = {}
+    for key, values in columns.items():
+        if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+            total = sum(values)
+            stats: Dict[str, Any] = {"min": min(values), "max": max(values), "total": round(total, 2), "mean": round(total / len(values), 2)}
+            if label is not None:
+                stats["min_at"] = next(r.get(label) for r in dict_rows if r.get(key) == stats["min"])
+                stats["max_at"] = next(r.get(label) for r in dict_rows if r.get(key) == stats["max"])
+            summary[key] = stats
+        elif all(isinstance(v, str) for v in values):
+            counts = Counter(values)
+            stats = {"distinct": len(counts), "first": clip(values[0], max_chars), "last": clip(values[-1], max_chars)}
+            if counts.most_common(1)[0][1] > 1:
+                stats["top"] = [[clip(v, max_chars), n] for v, n in counts.most_common(top_k)]
+            summary[key] = stats
+    return summary
+
+
+def _evenly(n: int, k: int) -> List[int]:
+    if k == 1:
+        return [0]
+    return sorted({round(i * (n - 1) / (k - 1)) for i in range(k)})
+
+
+def fit_rows(rows: Sequence[Any], budget: int, evenly: bool = False) -> List[int]:
+    """
+    Indexes of the rows that fit in ``budget`` tokens: a prefix, or (``evenly``)
+    as many evenly spaced rows as fit, first and last included. Deterministic.
+    """
+    # Separator per row; evenly spaced rows also list their index in ``row_indexes``
+    costs = [count_tokens(_dumps(row)) + (3 if evenly else 1) for row in rows]
+    if not evenly:
+        used, picked = 0, []
+        for i, cost in enumerate(costs):
+            if used + cost > budget:
+                break
+            used += cost
+            picked.append(i)
+        return picked
+    k = min(len(rows), max(1, budget * len(rows) // max(1, sum(costs))))
+    while k > 0:
+        picked = _evenly(len(rows), k)
+        if sum(costs[i] for i in picked) <= budget:
+            return picked
+        k -= 1
+    return []
+
+
+class ToolResultShaper:
+    """
+    Shapes tool results over their token budget before they enter the
+    model context (and every later LLM call of the turn): long strings are
+    clipped, row lists reduced to the rows that fit (``TOOL_RESULT_SHAPES``)
+    with a pointer to the fetch tool for the rest, anything else truncated.
+    Results within budget pass unchanged. Counts the tokens it saves.
+
+    The full rows are kept with the session, in ``store`` under
+    ``<session_id>:tool_result:<random id>`` (the last ``max_results``), so
+    a pointer in the history pages on any worker and after a restart, and
+    only from the session that got it.
+    """
+
+    def __init__(
+        self,
+        budget: int = 1000,
+        budgets: Optional[Mapping[str, int]] = None,
+        shapes: Optional[Mapping[str, str]] = None,
+        max_field_chars: int = 280,
+        top_k: int = 5,
+        store: Optional[StateStore] = None,
+        session_id: str = "",
+        max_results: int = 16,
+    ) -> None:
+        self.budget = budget
+        self.budgets = dict(budgets or {})
+        self.shapes = dict(TOOL_RESULT_SHAPES if shapes is None else shapes)
+        self.max_field_chars = max_field_chars
+        self.top_k = top_k
+        self.store = store if store is not None else InMemoryStateStore(max_entries=max_results + 1)
+        self.session_id = session_id
+        self.max_results = max_results
+        self.results_shaped = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_in - self.tokens_out
+
+    def budget_for(self, tool_name: str) -> int:
+        return self.budgets.get(tool_name, self.budget)
+
+    def _keep(self, rows: List[Any]) -> str:
+        """Store ``rows`` for the fetch tool; returns their id. Older results beyond ``max_results`` are dropped."""
+        result_id = uuid.uuid4().hex
+        self.store.set(f"{self.session_id}:tool_result:{result_id}", rows, group=self.session_id)
+        ids = self.store.get(f"{self.session_id}_tool_results", []) + [result_id]
+        for old in ids[:-self.max_results]:
+            self.store.delete(f"{self.session_id}:tool_result:{old}")
+        self.store.set(f"{self.session_id}_tool_results", ids[-self.max_results:], group=self.session_id)
+        return result_id
+
+    def shape(self, tool_name: str, text: str, tokens: Optional[int] = None) -> Optional[str]:
+        """Shaped ``text`` of a ``tool_name`` result, or None when it is within budget."""
+        budget = self.budget_for(tool_name)
+        tokens = count_tokens(text) if tokens is None else tokens
+        if tokens <= budget:
+            return None
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = None
+        rows, key = find_rows(data)
+        if rows:
+            shaped = self._shape_rows(tool_name, data, rows, key, budget)
+        else:
+            shaped = self._truncate(text, budget)
+        self.results_shaped += 1
+        self.tokens_in += tokens
+        self.tokens_out += count_tokens(shaped)
+        logging.debug(f"[ToolResultShaper] {tool_name}: {tokens} -> {count_tokens(shaped)} tokens")
+        return shaped
+
+    def _truncate(self, text: str, budget: int) -> str:
+        # Binary search on characters: token density varies (CJK vs ASCII)
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if count_tokens(text[:mid]) <= budget:
+                low = mid
+            else:
+                high = mid - 1
+        return f"{text[:low]}… [truncated: {count_tokens(text) - count_tokens(text[:low])} more tokens]"
+
+    def _shape_rows(self, tool_name: str, data: Any, rows: List[Any], key: Optional[str], budget: int) -> str:
+        strategy = self.shapes.get(tool_name, "head")
+        result_id = self._keep(rows)
+        shaped: Dict[str, Any] = {"rows_total": len(rows), "strategy": strategy}
+        if strategy == "summary":
+            shaped["summary"] = summarize_rows(rows, self.top_k)
+        shaped["more"] = f'{FETCH_TOOL_NAME}(result_id="{result_id}", offset=0) pages through all rows'
+        clipped = [clip(row, self.max_field_chars) for row in rows]
+        picked = fit_rows(clipped, budget - count_tokens(_dumps(shaped)) - 16, evenly=strategy != "head")
+        shaped["rows_shown"] = len(picked)
+        if strategy != "head":
+            shaped["row_indexes"] = picked
+        shaped["rows"] = [clipped[i] for i in picked]
+        if key is None:
+            return _dumps(shaped)
+        if key == "":  # a scalar mapping, shaped as a key/value table
+            return _dumps({"table": shaped})
+        return _dumps({**{k: v for k, v in data.items() if k != key}, key: shaped})
+
+    def page(self, result_id: str, offset: int = 0) -> str:
+        """Rows of a stored result of this session from ``offset``, as many as fit the default budget."""
+        rows = self.store.get(f"{self.session_id}:tool_result:{result_id}")
+        if rows is None:
+            return _dumps({"error": f"result {result_id} is no longer available; call the original tool again"})
+        clipped = [clip(row, self.max_field_chars) for row in rows[offset:]]
+        picked = fit_rows(clipped, self.budget - 40)
+        page: Dict[str, Any] = {"result_id": result_id, "offset": offset, "rows_total": len(rows), "rows": [clipped[i] for i in picked]}
+        if offset + len(picked) < len(rows):
+            page["next_offset"] = offset + max(1, len(picked))
+        return _dumps(page)
+
+
+class ShapedTool(BaseTool[BaseModel, Any]):
+    """
+    Wraps a tool so its results go through a ToolResultShaper on their
+    way into the model context; the call itself and its (memoized) raw
+    result are the wrapped tool's.
+    """
+
+    def __init__(self, tool: BaseTool[Any, Any], shaper: ToolResultShaper) -> None:
+        self.tool = tool
+        self.shaper = shaper
+        super().__init__(
+            args_type=tool.args_type(),
+            return_type=tool.return_type(),
+            name=tool.name,
+            description=tool.description,
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "tool":
+            raise AttributeError(name)
+        return getattr(self.tool, name)
+
+    @property
+    def schema(self) -> ToolSchema:
+        return shared_schema(self.tool)
+
+    def return_value_as_string(self, value: Any) -> str:
+        text = self.tool.return_value_as_string(value)
+        # Shape the payload (not the MCP content envelope) but budget what the model would see
+        payload = result_text(value)
+        shaped = self.shaper.shape(self.name, text if payload is None else payload, count_tokens(text))
+        return text if shaped is None else shaped
+
+    async def run(self, args: BaseModel, cancellation_token: CancellationToken) -> Any:
+        return await self.tool.run(args, cancellation_token)
+
+    async def run_json(
+        self, args: Mapping[str, Any], cancellation_token: CancellationToken, call_id: str | None = None
+    ) -> Any:
+        return await self.tool.run_json(args, cancellation_token, call_id=call_id)
+
+
+class ResultRowsArgs(BaseModel):
+    result_id: str = Field(description="result_id from the \"more\" field of a shortened tool result")
+    offset: int = Field(0, description="Index of the first row to return")
+
+
+_rows_schema: List[ToolSchema] = []
+
+
+class ResultRowsTool(BaseTool[ResultRowsArgs, str]):
+    """The ``get_tool_result_rows`` tool of one session: pages through the rows its shaper kept."""
+
+    def __init__(self, shaper: ToolResultShaper) -> None:
+        self.shaper = shaper
+        super().__init__(
+            args_type=ResultRowsArgs,
+            return_type=str,
+            name=FETCH_TOOL_NAME,
+            description=(
+                "Rows of a tool result that was shortened to fit the context (see its \"more\" field), "
+                "starting at offset; call again with next_offset for the following page."
+            ),
+        )
+
+    @property
+    def schema(self) -> ToolSchema:
+        # The same for every session: built once per worker
+        if not _rows_schema:
+            _rows_schema.append(super().schema)
+        return _rows_schema[0]
+
+    async def run(self, args: ResultRowsArgs, cancellation_token: CancellationToken) -> str:
+        return self.shaper.page(args.result_id, args.offset)
+
+
+def shape_tools(tools: List[Any], shaper: Optional[ToolResultShaper]) -> List[Any]:
+    """
+    ``tools`` with their results shaped, plus the fetch tool. With shaping
+    off (no shaper) or no tool to shape, nothing is added, so the fetch
+    tool's schema is not sent with every model call for nothing.
+    """
+    if shaper is None or not any(isinstance(tool, BaseTool) for tool in tools):
+        return tools
+    shaped = [ShapedTool(tool, shaper) if isinstance(tool, BaseTool) else tool for tool in tools]
+    return shaped + [ResultRowsTool(shaper)]
+
+
+def _parse_budgets(spec: str) -> Dict[str, int]:
+    budgets = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, tokens = item.partition("=")
+        budgets[name.strip()] = int(tokens)
+    return budgets
+
+
+def create_tool_result_shaper(store: Optional[StateStore] = None, session_id: str = "") -> Optional[ToolResultShaper]:
+    """
+    Result shaper for an agent, configured by TOOL_RESULT_SHAPING (on|off),
+    TOOL_RESULT_TOKEN_BUDGET (default 1000 tokens per result),
+    TOOL_RESULT_BUDGETS (per-tool overrides, "tool=tokens,...") and
+    TOOL_RESULT_MAX_FIELD_CHARS (default 280). The rows left out are kept
+    in the session's ``store``.
+    """
+    if os.getenv("TOOL_RESULT_SHAPING", "on").lower() != "on":
+        return None
+    return ToolResultShaper(
+        budget=int(os.getenv("TOOL_RESULT_TOKEN_BUDGET", "1000")),
+        budgets=_parse_budgets(os.getenv("TOOL_RESULT_BUDGETS", "")),
+        max_field_chars=int(os.getenv("TOOL_RESULT_MAX_FIELD_CHARS", "280")),
+        store=store,
+        session_id=session_id,
+    )
+
+
+def delete_tool_results(store: StateStore, session_id: str) -> None:
+    """Remove the rows kept for ``session_id`` (on a session reset)."""
+    for result_id in store.get(f"{session_id}_tool_results", []):
+        store.delete(f"{session_id}:tool_result:{result_id}")
+    store.delete(f"{session_id}_tool_results")
@@ -0,0 +1,41 @@
+import logging
+from typing import Any, Iterable, List, Sequence, Set
+
+from autogen.tokens import count_schema_tokens
+
+
+def tool_domains(tool: Any) -> Set[str]:
+    """
+    Domain tags the MCP server publishes for a tool adapter (FastMCP's
+    ``tags=``, under ``_meta._fastmcp.tags``); empty for untagged tools
+    and for tools that are not MCP adapters, such as get_tool_result_rows.
+    """
+    mcp_tool = getattr(tool, "_tool", None)
+    meta = getattr(mcp_tool, "meta", None) or {}
+    tags = (meta.get("_fastmcp") or {}).get("tags") or meta.get("tags")
+    return set(tags or ())
+
+
+def tool_schema_tokens(tools: Iterable[Any]) -> int:
+    """Estimated prompt tokens the tool schemas add to every model call."""
+    return sum(count_schema_tokens(tool.schema) for tool in tools)
+
+
+def select_tools(tools: Sequence[Any], domains: Iterable[str], agent_name: str = "") -> List[Any]:
+    """
+    Return the tools tagged with any of ``domains``, plus every untagged
+    tool, and log the prompt tokens this saves on each of the agent's
+    model calls.
+    """
+    wanted = set(domains)
+    selected = []
+    for tool in tools:
+        tags = tool_domains(tool)
+        if not tags or tags & wanted:
+            selected.append(tool)
+    saved = tool_schema_tokens(tools) - tool_schema_tokens(selected)
+    logging.info(
+        f"[ToolSelection] {agent_name or 'agent'}: {len(selected)}/{len(tools)} tools for {sorted(wanted)}, "
+        f"~{saved} prompt tokens saved per call"
+    )
+    return selected
@@ -0,0 +1,173 @@
+import os
+import copy
+import logging
+from typing import Any, AsyncGenerator, List, Mapping, Optional, Sequence, Union
+
+from autogen_core import CancellationToken
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage
+from autogen_core.tools import BaseTool, ToolSchema
+from opentelemetry import propagate, trace
+from pydantic import BaseModel
+
+from autogen.model_clients import DelegatingChatCompletionClient
+from autogen.tool_catalog import shared_schema
+
+# opentelemetry-api ships with autogen-core; without a configured provider
+# (TRACING=off or no SDK installed) every span below is a no-op.
+tracer = trace.get_tracer("agentic_ai")
+
+_configured = False
+
+
+def setup_tracing(service_name: str) -> bool:
+    """
+    Export spans to the OTLP endpoint (the bundled Jaeger by default) when
+    TRACING=on, as the notebooks do: TracerProvider + BatchSpanProcessor +
+    OTLP gRPC exporter, plus OpenAIInstrumentor when it is installed.
+    Returns whether tracing is active; safe to call more than once.
+    """
+    global _configured
+    if _configured:
+        return True
+    if os.getenv("TRACING", "off").lower() != "on":
+        return False
+    try:
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError as exc:
+        logging.warning(f"[tracing] TRACING=on but the OpenTelemetry SDK/exporter is not installed: {exc}")
+        return False
+
+    endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4317")
+    provider = TracerProvider(resource=Resource({"service.name": os.getenv("OTEL_SERVICE_NAME", service_name)}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint, insecure=endpoint.startswith("http://"))))
+    trace.set_tracer_provider(provider)
+    try:
+        from opentelemetry.instrumentation.openai import OpenAIInstrumentor
+
+        OpenAIInstrumentor().instrument()
+    except ImportError:
+        pass
+    _configured = True
+    logging.info(f"[tracing] exporting spans of {service_name} to {endpoint}")
+    return True
+
+
+def shutdown_tracing() -> None:
+    """Flush spans still queued in the BatchSpanProcessor."""
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()
+
+
+class TracingChatCompletionClient(DelegatingChatCompletionClient):
+    """One ``llm.create`` span per model call, with model, token usage and cache hit."""
+
+    def __init__(self, inner: ChatCompletionClient, model: Optional[str] = None) -> None:
+        super().__init__(inner)
+        self.model = model
+
+    def _start_span(self, messages: Sequence[LLMMessage], kwargs: Mapping[str, Any]) -> trace.Span:
+        span = tracer.start_span("llm.create", kind=trace.SpanKind.CLIENT)
+        span.set_attribute("gen_ai.request.model", self.model or "")
+        span.set_attribute("llm.messages", len(messages))
+        span.set_attribute("llm.tools", len(kwargs.get("tools", ())))
+        return span
+
+    @staticmethod
+    def _record(span: trace.Span, result: CreateResult) -> None:
+        span.set_attribute("gen_ai.usage.input_tokens", result.usage.prompt_tokens)
+        span.set_attribute("gen_ai.usage.output_tokens", result.usage.completion_tokens)
+        span.set_attribute("gen_ai.response.finish_reasons", [result.finish_reason])
+        span.set_attribute("llm.cached", bool(result.cached))
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        cancellation_token: Optional[CancellationToken] = None,
+        **kwargs: Any,
+    ) -> CreateResult:
+        span = self._start_span(messages, kwargs)
+        with trace.use_span(span, end_on_exit=True):
+            result = await self.inner.create(messages, cancellation_token=cancellation_token, **kwargs)
+            self._record(span, result)
+            return result
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        cancellation_token: Optional[CancellationToken] = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        # The span is not made current: a generator may be resumed in another context.
+        span = self._start_span(messages, kwargs)
+        try:
+            async for chunk in self.inner.create_stream(messages, cancellation_token=cancellation_token, **kwargs):
+                if isinstance(chunk, CreateResult):
+                    self._record(span, chunk)
+                yield chunk
+        except BaseException as exc:
+            span.record_exception(exc)
+            span.set_status(trace.Status(trace.StatusCode.ERROR, str(exc)))
+            raise
+        finally:
+            span.end()
+
+
+class TracedTool(BaseTool[BaseModel, Any]):
+    """
+    One ``mcp.tool`` span per call of the wrapped tool. For MCP adapters the
+    trace context is added to the HTTP headers of the call's SSE session,
+    so the MCP server's spans join the agent's trace.
+    """
+
+    def __init__(self, tool: BaseTool[Any, Any]) -> None:
+        self.tool = tool
+        super().__init__(
+            args_type=tool.args_type(),
+            return_type=tool.return_type(),
+            name=tool.name,
+            description=tool.description,
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "tool":
+            raise AttributeError(name)
+        return getattr(self.tool, name)
+
+    @property
+    def schema(self) -> ToolSchema:
+        return shared_schema(self.tool)
+
+    def return_value_as_string(self, value: Any) -> str:
+        return self.tool.return_value_as_string(value)
+
+    def _propagating_tool(self) -> BaseTool[Any, Any]:
+        server_params = getattr(self.tool, "_server_params", None)
+        if server_params is None or not hasattr(server_params, "headers"):
+            return self.tool
+        carrier: dict = {}
+        propagate.inject(carrier)
+        if not carrier:
+            return self.tool
+        tool = copy.copy(self.tool)
+        tool._server_params = server_params.model_copy(update={"headers": {**(server_params.headers or {}), **carrier}})
+        return tool
+
+    async def run(self, args: BaseModel, cancellation_token: CancellationToken) -> Any:
+        return await self.tool.run(args, cancellation_token)
+
+    async def run_json(
+        self, args: Mapping[str, Any], cancellation_token: CancellationToken, call_id: str | None = None
+    ) -> Any:
+        with tracer.start_as_current_span(f"mcp.tool {self.name}", kind=trace.SpanKind.CLIENT) as span:
+            span.set_attribute("mcp.tool.name", self.name)
+            return await self._propagating_tool().run_json(args, cancellation_token, call_id=call_id)
+
+
+def trace_tools(tools: List[Any]) -> List[Any]:
+    return [TracedTool(tool) if isinstance(tool, BaseTool) else tool for tool in tools]
@@ -0,0 +1,232 @@
+import os
+import math
+import time
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional, Set
+
+from autogen import metrics
+from autogen.state_store import StateStore, StoreLease
+
+QUEUE_WAIT = metrics.REGISTRY.histogram(
+    "agent_scheduler_queue_wait_seconds", "Time a turn waited for its session and a run slot", ("agent_module",)
+)
+REJECTED = metrics.REGISTRY.counter(
+    "agent_scheduler_rejected_total",
+    "Turns refused with 429 (reason: queue_full | session_queue_full | timeout | session_locked)",
+    ("agent_module", "reason"),
+)
+
+
+class TurnRejectedError(Exception):
+    """The scheduler is saturated; retry after ``retry_after`` seconds."""
+
+    def __init__(self, reason: str, retry_after: int) -> None:
+        super().__init__(f"too many agent turns in progress ({reason}), retry in {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TurnAbandonedError(Exception):
+    """The caller gave up (client disconnected) while its turn was queued."""
+
+
+class TurnAbortedError(Exception):
+    """Raised by ``BaseAgent.run_team`` when the turn was cancelled (``abort_turn``) or hit its deadline."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(f"turn aborted: {reason}")
+        self.reason = reason
+
+
+class _Waiter:
+    __slots__ = ("session_id", "future", "enqueued_at")
+
+    def __init__(self, session_id: str, future: "asyncio.Future[None]") -> None:
+        self.session_id = session_id
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class TurnScheduler:
+    """
+    Admission control for agent turns in one worker process.
+
+    - A session runs at most one turn at a time; its other turns wait in
+      arrival order, so each one sees the state saved by the previous.
+    - At most ``max_concurrent`` turns run at once. Free slots go round-robin
+      to the sessions with a waiting turn, so a session sending many turns
+      cannot starve the others.
+    - The queue is bounded (``max_queued`` overall, ``max_queued_per_session``
+      per session) and a turn waits at most ``queue_timeout`` seconds;
+      otherwise ``TurnRejectedError`` carries a Retry-After estimate.
+    - With a durable ``store`` shared by several workers (sqlite, redis), a
+      turn also holds the session's lease in the store (``StoreLease`` on
+      ``<session>_turn_lock``), so two workers never run turns of the same
+      session at once; a turn waits for it within ``queue_timeout``. The
+      running turn gets it from ``lease`` and must save nothing once it is
+      ``lost`` (see ``BaseAgent.guard_turn``).
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 8,
+        max_queued: int = 64,
+        max_queued_per_session: int = 4,
+        queue_timeout: float = 60.0,
+        agent_module: str = "",
+        store: Optional[StateStore] = None,
+        session_lock_ttl: float = 30.0,
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.max_queued_per_session = max_queued_per_session
+        self.queue_timeout = queue_timeout
+        self.agent_module = agent_module
+        # Cross-worker session lock, only needed when the store is shared
+        self.store = store if store is not None and getattr(store, "durable", False) else None
+        self.session_lock_ttl = session_lock_ttl
+        self.running = 0
+        self.queued = 0
+        self._busy: Set[str] = set()
+        # Cross-worker session locks of the running turns
+        self._leases: Dict[str, StoreLease] = {}
+        # Sessions with waiting turns, in round-robin order
+        self._queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self._avg_turn_seconds = 10.0
+
+    @classmethod
+    def from_env(cls, agent_module: str = "", store: Optional[StateStore] = None) -> "TurnScheduler":
+        """
+        SCHEDULER_MAX_CONCURRENT_TURNS    turns running at once (default 8)
+        SCHEDULER_MAX_QUEUED_TURNS        waiting turns before 429 (default 64)
+        SCHEDULER_MAX_QUEUED_PER_SESSION  waiting turns per session (default 4)
+        SCHEDULER_QUEUE_TIMEOUT_SECONDS   max wait for a slot (default 60)
+        SCHEDULER_SESSION_LOCK_TTL_SECONDS  expiry of a dead worker's session lock (default 30)
+        """
+        return cls(
+            max_concurrent=int(os.getenv("SCHEDULER_MAX_CONCURRENT_TURNS", "8")),
+            max_queued=int(os.getenv("SCHEDULER_MAX_QUEUED_TURNS", "64")),
+            max_queued_per_session=int(os.getenv("SCHEDULER_MAX_QUEUED_PER_SESSION", "4")),
+            queue_timeout=float(os.getenv("SCHEDULER_QUEUE_TIMEOUT_SECONDS", "60")),
+            agent_module=agent_module,
+            store=store,
+            session_lock_ttl=float(os.getenv("SCHEDULER_SESSION_LOCK_TTL_SECONDS", "30")),
+        )
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained, from the mean turn time."""
+        waves = (self.queued + self.running) / max(self.max_concurrent, 1)
+        return max(1, math.ceil(waves * self._avg_turn_seconds))
+
+    def _reject(self, reason: str) -> TurnRejectedError:
+        REJECTED.inc(agent_module=self.agent_module, reason=reason)
+        return TurnRejectedError(reason, self.retry_after())
+
+    def _dispatch(self) -> None:
+        for session_id in list(self._queues):
+            if self.running >= self.max_concurrent:
+                return
+            if session_id in self._busy:
+                continue
+            waiters = self._queues.pop(session_id)
+            waiter = waiters.popleft()
+            if waiters:
+                self._queues[session_id] = waiters  # back of the round-robin order
+            self.queued -= 1
+            self.running += 1
+            self._busy.add(session_id)
+            waiter.future.set_result(None)
+
+    def _remove(self, waiter: _Waiter) -> None:
+        waiters = self._queues.get(waiter.session_id)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            self.queued -= 1
+            if not waiters:
+                del self._queues[waiter.session_id]
+
+    async def acquire(self, session_id: str, abandoned: Optional[asyncio.Event] = None) -> float:
+        """
+        Wait for this session's turn and a run slot; returns the seconds waited.
+        Setting ``abandoned`` (e.g. the client disconnected) leaves the queue
+        with TurnAbandonedError.
+        """
+        waiters = self._queues.get(session_id)
+        if waiters is not None and len(waiters) >= self.max_queued_per_session:
+            raise self._reject("session_queue_full")
+        idle = session_id not in self._busy and self.running < self.max_concurrent
+        if not idle and self.queued >= self.max_queued:
+            raise self._reject("queue_full")
+
+        waiter = _Waiter(session_id, asyncio.get_running_loop().create_future())
+        self._queues.setdefault(session_id, deque()).append(waiter)
+        self.queued += 1
+        self._dispatch()
+        gone = asyncio.ensure_future(abandoned.wait()) if abandoned is not None else None
+        try:
+            if not waiter.future.done():
+                await asyncio.wait(
+                    [f for f in (waiter.future, gone) if f is not None],
+                    timeout=self.queue_timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+        finally:
+            if gone is not None:
+                gone.cancel()
+            if not waiter.future.done():
+                waiter.future.cancel()
+                self._remove(waiter)
+            elif (abandoned is not None and abandoned.is_set()) or asyncio.current_task().cancelling():
+                # Got the slot just as we gave up: hand it on
+                self.release(session_id)
+        if abandoned is not None and abandoned.is_set():
+            raise TurnAbandonedError(session_id)
+        if waiter.future.cancelled():
+            raise self._reject("timeout")
+        waited = time.perf_counter() - waiter.enqueued_at
+        QUEUE_WAIT.observe(waited, agent_module=self.agent_module)
+        return waited
+
+    def release(self, session_id: str, turn_seconds: Optional[float] = None) -> None:
+        self.running -= 1
+        self._busy.discard(session_id)
+        if turn_seconds:
+            self._avg_turn_seconds = 0.9 * self._avg_turn_seconds + 0.1 * turn_seconds
+        self._dispatch()
+
+    def lease(self, session_id: str) -> Optional[StoreLease]:
+        """The session lock held by the running turn of ``session_id`` (None without a durable store)."""
+        return self._leases.get(session_id)
+
+    @asynccontextmanager
+    async def turn(self, session_id: str, abandoned: Optional[asyncio.Event] = None) -> AsyncIterator[float]:
+        """``async with scheduler.turn(session_id) as waited:`` around one turn."""
+        waited = await self.acquire(session_id, abandoned)
+        lease = None
+        turn_seconds = None
+        try:
+            if self.store is not None:
+                start = time.perf_counter()
+                lease = await self._lock_session(session_id, max(0.0, self.queue_timeout - waited), abandoned)
+                self._leases[session_id] = lease
+                waited += time.perf_counter() - start
+            start = time.perf_counter()
+            yield waited
+            turn_seconds = time.perf_counter() - start
+        finally:
+            try:
+                if lease is not None:
+                    del self._leases[session_id]
+                    await lease.release()
+            finally:
+                self.release(session_id, turn_seconds)
+
+    async def _lock_session(self, session_id: str, timeout: float, abandoned: Optional[asyncio.Event]) -> StoreLease:
+        lease = StoreLease(self.store, f"{session_id}_turn_lock", self.session_lock_ttl)
+        if await lease.acquire(timeout, abandoned):
+            return lease
+        if abandoned is not None and abandoned.is_set():
+            raise TurnAbandonedError(session_id)
+        raise self._reject("session_locked")
@@ -0,0 +1,51 @@
+from typing import Any, Dict, Sequence, Tuple
+
+from autogen_agentchat.messages import ToolCallRequestEvent
+
+
+class TurnStats:
+    """
+    Per-turn measurements collected by ``BaseAgent.run_team``: wall time,
+    message/tool-call counts, tool calls served from the tool cache, LLM
+    calls (and cache hits) and tokens counted by the model client, and the
+    prompt tokens the model contexts trimmed away and the tool result
+    shaper cut from tool results.
+    """
+
+    def __init__(self, latency_seconds: float, messages: Sequence[Any]) -> None:
+        self.latency_seconds = latency_seconds
+        self.messages = len(messages)
+        self.tool_calls = sum(len(m.content) for m in messages if isinstance(m, ToolCallRequestEvent))
+        self.tool_cache_hits = 0
+        self.llm_calls = 0
+        self.llm_cached_calls = 0
+        self.llm_latency_seconds = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.context_tokens_sent = 0
+        self.context_tokens_saved = 0
+        self.tool_result_tokens_saved = 0
+
+    def add_llm_usage(self, before: Tuple[int, int, int, float, int], after: Tuple[int, int, int, float, int]) -> None:
+        """Add the difference of two ``LlmUsage.snapshot()`` tuples."""
+        self.llm_calls += after[0] - before[0]
+        self.prompt_tokens += after[1] - before[1]
+        self.completion_tokens += after[2] - before[2]
+        self.llm_latency_seconds += after[3] - before[3]
+        self.llm_cached_calls += after[4] - before[4]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "latency_seconds": round(self.latency_seconds, 3),
+            "messages": self.messages,
+            "tool_calls": self.tool_calls,
+            "tool_cache_hits": self.tool_cache_hits,
+            "llm_calls": self.llm_calls,
+            "llm_cached_calls": self.llm_cached_calls,
+            "llm_latency_seconds": round(self.llm_latency_seconds, 3),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "context_tokens_sent": self.context_tokens_sent,
+            "context_tokens_saved": self.context_tokens_saved,
+            "tool_result_tokens_saved": self.tool_result_tokens_saved,
+        }
@@ -0,0 +1,389 @@
+import os
+import re
+import json
+import math
+import zlib
+import asyncio
+import hashlib
+import importlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from autogen_core import CancellationToken
+from autogen_core.memory import Memory, MemoryContent, MemoryMimeType, MemoryQueryResult, UpdateContextResult
+from autogen_core.model_context import ChatCompletionContext
+from autogen_core.models import SystemMessage, UserMessage
+
+from autogen.tokens import count_tokens
+
+if TYPE_CHECKING:
+    # NumPy is imported by the code that embeds or searches, so USER_MEMORY=off never loads it
+    import numpy as np
+
+# texts -> (len(texts), dim) float32 array of L2-normalized embeddings
+EmbeddingFunction = Callable[[Sequence[str]], "np.ndarray"]
+
+_WORD = re.compile(r"\w+")
+_HIRAGANA = re.compile(r"^[\u3040-\u309f]+$")
+
+
+def row_dtype() -> "np.dtype":
+    """Per-memory row next to its vector: where its JSON line starts in entries.jsonl, and its size."""
+    import numpy as np
+
+    return np.dtype([("offset", "<i8"), ("length", "<i4"), ("tokens", "<i4")])
+
+
+def normalized(vectors: Any) -> "np.ndarray":
+    """float32 rows scaled to unit length, so a dot product is the cosine similarity."""
+    import numpy as np
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+class HashingEmbedding:
+    """
+    Local embedding without a model: words with their character trigrams
+    for alphabetic text, and character unigrams and bigrams for Japanese
+    (no tokenizer needed; hiragana-only grams such as particles are skipped),
+    hashed into ``dim`` signed buckets with sublinear term frequency.
+    Deterministic across processes, so stored vectors stay valid. It matches
+    wording, not meaning; plug a sentence embedding in via MEMORY_EMBEDDING
+    for paraphrases.
+    """
+
+    def __init__(self, dim: int = 256) -> None:
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def features(self, text: str) -> Dict[str, int]:
+        text = unicodedata.normalize("NFKC", text).lower()
+        counts: Dict[str, int] = {}
+        for word in _WORD.findall(text):
+            if word.isascii():
+                padded = f" {word} "
+                grams = [word] + [padded[i : i + 3] for i in range(len(word))]
+            else:
+                grams = [word[i : i + n] for n in (1, 2) for i in range(len(word) - n + 1)]
+            for gram in grams:
+                if not _HIRAGANA.match(gram):
+                    counts[gram] = counts.get(gram, 0) + 1
+        return counts
+
+    def __call__(self, texts: Sequence[str]) -> "np.ndarray":
+        import numpy as np
+
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        rows: List[int] = []
+        columns: List[int] = []
+        values: List[float] = []
+        for row, text in enumerate(texts):
+            for feature, count in self.features(text).items():
+                h = zlib.crc32(feature.encode("utf-8"))
+                rows.append(row)
+                columns.append(h % self.dim)
+                values.append((1.0 + math.log(count)) * (1 if h & 0x80000000 else -1))
+        np.add.at(vectors, (rows, columns), values)
+        return normalized(vectors)
+
+
+def load_embedding(spec: str) -> Tuple[str, EmbeddingFunction]:
+    """
+    ``hashing`` / ``hashing:<dim>`` or ``package.module:attribute`` naming an
+    embedding function (or a class, instantiated without arguments). The
+    returned name is stored with each index so vectors from two different
+    embeddings are never mixed.
+    """
+    name, _, arg = spec.partition(":")
+    if name == "hashing":
+        embedding = HashingEmbedding(int(arg or 256))
+        return embedding.name, embedding
+    target = getattr(importlib.import_module(name), arg)
+    if isinstance(target, type):
+        target = target()
+    return getattr(target, "name", spec), target
+
+
+class VectorIndex:
+    """
+    One user's memories on disk, in ``path``:
+
+    - ``vectors.f32``: float32 embeddings, memory-mapped (capacity doubles as it fills)
+    - ``rows.bin``: offset, length and token count of each entry (``row_dtype()``)
+    - ``entries.jsonl``: the entries ({"content", "metadata"}), read only for hits
+    - ``index.json``: dim, embedding name and count, replaced atomically last
+
+    A write becomes visible when ``index.json`` is replaced, so a crash
+    leaves the previous count and unreferenced bytes. Other processes pick
+    up new entries on their next search (``index.json`` mtime). Writes of
+    one user are expected from one worker at a time (session affinity).
+    """
+
+    def __init__(self, path: str, embedding_name: str, dim: int) -> None:
+        self.path = path
+        self.embedding_name = embedding_name
+        self.dim = dim
+        self.count = 0
+        self._vectors: Optional["np.memmap"] = None
+        self._rows: Optional["np.memmap"] = None
+        self._mtime_ns = 0
+        self._lock = threading.Lock()
+        self._refresh()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self.count
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _refresh(self) -> None:
+        try:
+            mtime_ns = os.stat(self._file("index.json")).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime_ns == self._mtime_ns:
+            return
+        with open(self._file("index.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["embedding"] != self.embedding_name or meta["dim"] != self.dim:
+            raise ValueError(
+                f"memory index {self.path} was built with {meta['embedding']} ({meta['dim']} dims), "
+                f"not {self.embedding_name} ({self.dim} dims); clear it or set MEMORY_EMBEDDING back"
+            )
+        self.count = meta["count"]
+        self._map(meta["capacity"])
+        self._mtime_ns = mtime_ns
+
+    def _map(self, capacity: int) -> None:
+        import numpy as np
+
+        self._vectors = np.memmap(self._file("vectors.f32"), dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._rows = np.memmap(self._file("rows.bin"), dtype=row_dtype(), mode="r+", shape=(capacity,))
+
+    def _reserve(self, needed: int) -> None:
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        if needed <= capacity:
+            return
+        capacity = max(1024, capacity)
+        while capacity < needed:
+            capacity *= 2
+        os.makedirs(self.path, exist_ok=True)
+        for name, row_bytes in (("vectors.f32", self.dim * 4), ("rows.bin", row_dtype().itemsize)):
+            with open(self._file(name), "ab") as f:
+                f.truncate(capacity * row_bytes)
+        self._map(capacity)
+
+    def add(self, vectors: "np.ndarray", entries: Sequence[Dict[str, Any]]) -> None:
+        """Append ``entries`` with their ``vectors`` (one batch, one index.json write)."""
+        import numpy as np
+
+        with self._lock:
+            self._refresh()
+            start = self.count
+            self._reserve(start + len(entries))
+            lines = [(json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8") for entry in entries]
+            with open(self._file("entries.jsonl"), "ab") as f:
+                offset = f.tell()
+                f.write(b"".join(lines))
+            rows = np.empty(len(entries), dtype=row_dtype())
+            rows["length"] = [len(line) for line in lines]
+            rows["offset"] = offset + np.cumsum(rows["length"], dtype=np.int64) - rows["length"]
+            rows["tokens"] = [count_tokens(entry["content"]) for entry in entries]
+            self._rows[start : start + len(entries)] = rows
+            self._vectors[start : start + len(entries)] = vectors
+            self._vectors.flush()
+            self._rows.flush()
+            meta = {"embedding": self.embedding_name, "dim": self.dim, "count": start + len(entries), "capacity": self._vectors.shape[0]}
+            with open(self._file("index.json.tmp"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(self._file("index.json.tmp"), self._file("index.json"))
+            self.count = meta["count"]
+            self._mtime_ns = os.stat(self._file("index.json")).st_mtime_ns
+
+    def search(self, query: "np.ndarray", top_k: int, token_budget: int, min_score: float = 0.0, chunk_rows: int = 65536) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Best matches by cosine similarity, best first: at most ``top_k``
+        entries scoring at least ``min_score`` whose contents fit in
+        ``token_budget`` tokens together (an entry that does not fit is
+        skipped for a smaller one further down).
+        """
+        import numpy as np
+
+        with self._lock:
+            self._refresh()
+            count, vectors, rows = self.count, self._vectors, self._rows
+        if count == 0 or top_k <= 0:
+            return []
+        scores = np.empty(count, dtype=np.float32)
+        # Scan in chunks so only one chunk of the mapped file is touched at a time
+        for start in range(0, count, chunk_rows):
+            end = min(count, start + chunk_rows)
+            np.dot(vectors[start:end], query, out=scores[start:end])
+        candidates = min(count, top_k * 4)
+        best = np.argpartition(-scores, candidates - 1)[:candidates]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        picked, used = [], 0
+        for i in best:
+            if scores[i] < min_score or len(picked) == top_k:
+                break
+            tokens = int(rows[i]["tokens"])
+            if used + tokens > token_budget:
+                continue
+            picked.append(int(i))
+            used += tokens
+        hits = []
+        with open(self._file("entries.jsonl"), "rb") as f:
+            for i in picked:
+                f.seek(int(rows[i]["offset"]))
+                hits.append((json.loads(f.read(int(rows[i]["length"]))), float(scores[i])))
+        return hits
+
+    def clear(self) -> None:
+        with self._lock:
+            for name in ("index.json", "vectors.f32", "rows.bin", "entries.jsonl"):
+                try:
+                    os.remove(self._file(name))
+                except FileNotFoundError:
+                    pass
+            self.count, self._vectors, self._rows, self._mtime_ns = 0, None, None, 0
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(os.path.getsize(self._file(name)) for name in ("vectors.f32", "rows.bin", "entries.jsonl") if os.path.exists(self._file(name)))
+
+
+class VectorMemory(Memory):
+    """
+    AutoGen Memory over a user's VectorIndex. Unlike ListMemory, which puts
+    every memory into every prompt, ``update_context`` adds only the
+    memories most similar to the latest user message, at most ``top_k`` and
+    ``token_budget`` tokens. Embedding and search run in a worker thread.
+    """
+
+    def __init__(
+        self,
+        index: VectorIndex,
+        embedding: EmbeddingFunction,
+        top_k: int = 5,
+        token_budget: int = 300,
+        min_score: float = 0.2,
+    ) -> None:
+        self.index = index
+        self.embedding = embedding
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.min_score = min_score
+
+    async def add(self, content: MemoryContent, cancellation_token: Optional[CancellationToken] = None) -> None:
+        await self.add_many([content], cancellation_token)
+
+    async def add_many(self, contents: Sequence[MemoryContent], cancellation_token: Optional[CancellationToken] = None) -> None:
+        """Batch insert: one embedding call and one index write for all ``contents``."""
+        if not contents:
+            return
+        texts = [str(content.content) for content in contents]
+        entries = [{"content": text, "metadata": content.metadata or {}} for text, content in zip(texts, contents)]
+
+        def insert() -> None:
+            self.index.add(normalized(self.embedding(texts)), entries)
+
+        await asyncio.to_thread(insert)
+
+    async def query(
+        self,
+        query: str | MemoryContent = "",
+        cancellation_token: Optional[CancellationToken] = None,
+        **kwargs: Any,
+    ) -> MemoryQueryResult:
+        text = str(query.content) if isinstance(query, MemoryContent) else query
+
+        def search() -> List[Tuple[Dict[str, Any], float]]:
+            if not text or len(self.index) == 0:
+                return []
+            return self.index.search(
+                normalized(self.embedding([text]))[0],
+                kwargs.get("top_k", self.top_k),
+                kwargs.get("token_budget", self.token_budget),
+                kwargs.get("min_score", self.min_score),
+            )
+
+        hits = await asyncio.to_thread(search)
+        return MemoryQueryResult(
+            results=[
+                MemoryContent(content=entry["content"], mime_type=MemoryMimeType.TEXT, metadata={**entry["metadata"], "score": round(score, 4)})
+                for entry, score in hits
+            ]
+        )
+
+    async def update_context(self, model_context: ChatCompletionContext) -> UpdateContextResult:
+        messages = await model_context.get_messages()
+        # The user's latest request: in teams, other agents' messages and handoff notices are UserMessages too
+        texts = [m for m in messages if isinstance(m, UserMessage) and isinstance(m.content, str)]
+        requests = [m for m in texts if m.source == "user" and not m.content.startswith("Transferred to ")]
+        query = (requests or texts)[-1].content if texts else ""
+        result = await self.query(query)
+        if result.results:
+            lines = [f"{i}. {memory.content}" for i, memory in enumerate(result.results, 1)]
+            content = "\nRelevant memory content (most relevant first):\n" + "\n".join(lines) + "\n"
+            # AssistantAgent asks again on every inference of the turn; add the same memories once
+            if not any(isinstance(m, SystemMessage) and m.content == content for m in messages):
+                await model_context.add_message(SystemMessage(content=content))
+        return UpdateContextResult(memories=result)
+
+    async def clear(self) -> None:
+        await asyncio.to_thread(self.index.clear)
+
+    async def close(self) -> None:
+        pass
+
+
+_embedding: Optional[Tuple[str, str, EmbeddingFunction, int]] = None
+_indexes: "OrderedDict[str, VectorIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_embedding() -> Tuple[str, EmbeddingFunction, int]:
+    """The worker's embedding per MEMORY_EMBEDDING: (name, function, dim), loaded once."""
+    global _embedding
+    spec = os.getenv("MEMORY_EMBEDDING", "hashing")
+    if _embedding is None or _embedding[0] != spec:
+        name, embedding = load_embedding(spec)
+        dim = int(getattr(embedding, "dim", 0)) or embedding(["dim"]).shape[1]
+        _embedding = (spec, name, embedding, dim)
+    return _embedding[1:]
+
+
+def user_index_path(user_id: str) -> str:
+    # Hashed, so any user id is a safe directory name
+    return os.path.join(os.getenv("MEMORY_DIR", "memory_store"), hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:32])
+
+
+def get_user_memory(user_id: str) -> Optional[VectorMemory]:
+    """
+    ``user_id``'s VectorMemory, or None when USER_MEMORY=off. Open indexes
+    (their memory maps) are kept per worker, least recently used first out
+    beyond MEMORY_OPEN_INDEXES.
+    """
+    if os.getenv("USER_MEMORY", "off").lower() != "on":
+        return None
+    name, embedding, dim = get_embedding()
+    path = user_index_path(user_id)
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None or index.embedding_name != name:
+            index = _indexes[path] = VectorIndex(path, name, dim)
+        _indexes.move_to_end(path)
+        while len(_indexes) > int(os.getenv("MEMORY_OPEN_INDEXES", "64")):
+            _indexes.popitem(last=False)
+    return VectorMemory(
+        index,
+        embedding,
+        top_k=int(os.getenv("MEMORY_TOP_K", "5")),
+        token_budget=int(os.getenv("MEMORY_TOKEN_BUDGET", "300")),
+        min_score=float(os.getenv("MEMORY_MIN_SCORE", "0.2")),
+    )
@@ -0,0 +1,120 @@
+import time
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from autogen import metrics
+from autogen.state_store import InMemoryStateStore
+
+WARMUP_STEP = metrics.REGISTRY.histogram(
+    "agent_warmup_step_seconds", "Duration of each startup warm-up step", ("agent_module", "step")
+)
+
+
+def describe(exc: BaseException) -> str:
+    # MCP client errors arrive wrapped in (nested) TaskGroup exception groups
+    while getattr(exc, "exceptions", None):
+        exc = exc.exceptions[0]
+    return f"{type(exc).__name__}: {exc}"
+
+
+class Readiness:
+    """
+    Warm-up progress of a worker. Liveness only says the process serves
+    requests; readiness says the first request will not pay for tool
+    discovery, client creation and team construction.
+    """
+
+    def __init__(self) -> None:
+        self.created_at = time.time()
+        self.ready_at: Optional[float] = None
+        self.draining = False
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_at is not None and not self.draining
+
+    def mark_ready(self) -> None:
+        self.ready_at = time.time()
+        self.error = None
+
+    @contextmanager
+    def step(self, name: str, agent_module: str = "") -> Iterator[None]:
+        self.steps[name] = {"status": "running"}
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as exc:
+            self.steps[name] = {"status": "error", "error": describe(exc)}
+            raise
+        seconds = time.perf_counter() - start
+        self.steps[name] = {"status": "ok", "seconds": round(seconds, 3)}
+        WARMUP_STEP.observe(seconds, agent_module=agent_module, step=name)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "status": "draining" if self.draining else "ready" if self.ready else "warming_up",
+            "time_to_ready_seconds": round(self.ready_at - self.created_at, 3) if self.ready_at else None,
+            "attempts": self.attempts,
+            "error": self.error,
+            "steps": self.steps,
+        }
+
+
+async def open_connection(client: Any) -> None:
+    """
+    Resolve DNS and finish the TLS handshake of an OpenAI-based client's
+    connection pool with a request that spends no tokens (list models).
+    Any HTTP answer will do; only connection errors fail.
+    """
+    raw = getattr(client, "_client", None)
+    if raw is None or not hasattr(raw, "models"):
+        return
+    import openai
+
+    try:
+        await raw.models.list()
+    except openai.APIStatusError as exc:
+        logging.debug(f"[warmup] model endpoint answered {exc.status_code}; connection is open")
+
+
+async def warm_up_once(load_agent_class: Callable[[], Any], readiness: Readiness, agent_module: str = "") -> None:
+    # Import the agent stack in a thread so the event loop keeps answering /healthz
+    with readiness.step("import", agent_module):
+        agent_cls = await asyncio.to_thread(load_agent_class)
+    from autogen.model_clients import shared_model_clients
+
+    # A throw-away session: nothing is written to the real session store
+    agent = agent_cls(InMemoryStateStore(), "__warmup__")
+    with readiness.step("tool_catalog", agent_module):
+        await agent.load_tools()
+    with readiness.step("template_team", agent_module):
+        await agent.setup()
+    with readiness.step("model_connection", agent_module):
+        await asyncio.gather(*(open_connection(client) for client in shared_model_clients()))
+
+
+async def warm_up(
+    load_agent_class: Callable[[], Any],
+    readiness: Readiness,
+    timeout: float = 60.0,
+    retry_seconds: float = 10.0,
+    agent_module: str = "",
+) -> None:
+    """Warm the worker up, retrying every ``retry_seconds`` until it succeeds, then mark it ready."""
+    while True:
+        readiness.attempts += 1
+        try:
+            await asyncio.wait_for(warm_up_once(load_agent_class, readiness, agent_module), timeout)
+        except Exception as exc:
+            readiness.error = describe(exc)
+            logging.warning(f"[warmup] attempt {readiness.attempts} failed, retrying in {retry_seconds}s: {readiness.error}")
+            await asyncio.sleep(retry_seconds)
+            continue
+        readiness.mark_ready()
+        logging.info(f"[warmup] ready after {readiness.ready_at - readiness.created_at:.2f}s: {readiness.steps}")
+        return
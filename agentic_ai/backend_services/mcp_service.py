@@ -1,13 +1,11 @@
 import os
 import asyncio
-import asyncpg
 import json
 from typing import List, Optional, Dict, Any
 import datetime
 from dotenv import load_dotenv
 from datetime import date
 import uuid
-from pymongo import MongoClient
 import re
 
 # Load environment variables from .env file.
@@ -28,10 +26,63 @@ mcp = FastMCP(
     instructions="All product, order, and inventory data is accessible ONLY via the declared tools below. Return values are JSON strings. Always call the most specific tool that answers the user's question."
 )
 
+# ────────────────────────────── Tracing (optional) ──────────────────────
+# TRACING=on でツール呼び出しごとに span を出力し、エージェント側から
+# HTTP ヘッダ (traceparent) で伝搬されたトレースに連結する
+def setup_tracing():
+    if os.getenv("TRACING", "off").lower() != "on":
+        return
+    try:
+        from opentelemetry import propagate, trace
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from fastmcp.server.dependencies import get_http_headers
+        from fastmcp.server.middleware import Middleware
+    except ImportError as e:
+        print(f"Tracing disabled: {e}")
+        return
+
+    endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4317")
+    provider = TracerProvider(resource=Resource({"service.name": "mcp-service"}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint, insecure=endpoint.startswith("http://"))))
+    trace.set_tracer_provider(provider)
+    tracer = trace.get_tracer("mcp_service")
+
+    class TracingMiddleware(Middleware):
+        async def on_call_tool(self, context, call_next):
+            with tracer.start_as_current_span(
+                f"mcp.call_tool {context.message.name}",
+                context=propagate.extract(get_http_headers()),
+                kind=trace.SpanKind.SERVER,
+            ) as span:
+                span.set_attribute("mcp.tool.name", context.message.name)
+                return await call_next(context)
+
+    mcp.add_middleware(TracingMiddleware())
+
+setup_tracing()
+
+# ────────────────────────────── Health check ────────────────────────────
+# コンテナのヘルスチェック用。DB ドライバを読み込まずに即応答する
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+@mcp.custom_route("/healthz", methods=["GET"])
+async def healthz(request: Request) -> JSONResponse:
+    return JSONResponse({"status": "ok"})
+
 # ────────────────────────────── DB Connection ───────────────────────────
+# asyncpg / pymongo はコールドスタートを速くするため、最初のツール呼び出しで import する
 async def get_conn():
+    import asyncpg
     return await asyncpg.connect(**DB_CONFIG)
 
+def get_mongo_client(conn_str):
+    from pymongo import MongoClient
+    return MongoClient(conn_str)
+
 # 共通のJSON変換ヘルパー
 def to_json(data):
     """データを安全にJSONに変換するヘルパー関数"""
@@ -46,7 +97,7 @@ def to_json(data):
 #                               TOOL ENDPOINTS                               #
 ##############################################################################
 
-@mcp.tool(description="List all product categories")
+@mcp.tool(description="List all product categories", tags={"catalog"})
 async def get_all_categories() -> dict:
     """
     List all product categories
@@ -61,7 +112,7 @@ async def get_all_categories() -> dict:
     finally:
         await conn.close()
 
-@mcp.tool(description="List all products (optionally filter by category)")
+@mcp.tool(description="List all products (optionally filter by category)", tags={"catalog"})
 async def get_products(category_id: Optional[int] = None) -> str:
     """
     List all products (optionally filter by category)
@@ -78,7 +129,7 @@ async def get_products(category_id: Optional[int] = None) -> str:
     finally:
         await conn.close()
 
-@mcp.tool(description="Get product detail by product_id")
+@mcp.tool(description="Get product detail by product_id", tags={"catalog"})
 async def get_product_detail(product_id: int) -> str:
     """
     Get product detail by product_id
@@ -95,7 +146,7 @@ async def get_product_detail(product_id: int) -> str:
     finally:
         await conn.close()
 
-@mcp.tool(description="List all game products")
+@mcp.tool(description="List all game products", tags={"catalog"})
 async def get_game_products() -> str:
     """
     List all game products
@@ -109,7 +160,7 @@ async def get_game_products() -> str:
     finally:
         await conn.close()
 
-@mcp.tool(description="Get inventory status for a product")
+@mcp.tool(description="Get inventory status for a product", tags={"catalog"})
 async def get_inventory_status(product_id: str) -> str:
     """
     Get inventory status for a product
@@ -125,7 +176,7 @@ async def get_inventory_status(product_id: str) -> str:
     finally:
         await conn.close()
 
-@mcp.tool(description="List all orders for a customer")
+@mcp.tool(description="List all orders for a customer", tags={"billing"})
 async def get_customer_orders(customer_id: str) -> str:
     """
     List all orders for a customer
@@ -139,7 +190,7 @@ async def get_customer_orders(customer_id: str) -> str:
     finally:
         await conn.close()
 
-@mcp.tool(description="Get order details for an order")
+@mcp.tool(description="Get order details for an order", tags={"billing"})
 async def get_order_details(order_id: int) -> str:
     """
     Get order details for an order
@@ -153,7 +204,7 @@ async def get_order_details(order_id: int) -> str:
     finally:
         await conn.close()
 
-@mcp.tool(description="Get shipping status for a user's order")
+@mcp.tool(description="Get shipping status for a user's order", tags={"billing"})
 async def get_shipping_status(user_id: int) -> str:
     """
     Get shipping status for a user's order
@@ -186,7 +237,7 @@ async def get_shipping_status(user_id: int) -> str:
     finally:
         await conn.close()
 
-@mcp.tool(description="List all users")
+@mcp.tool(description="List all users", tags={"billing"})
 async def get_all_users() -> str:
     """
     List all users
@@ -200,7 +251,7 @@ async def get_all_users() -> str:
     finally:
         await conn.close()
 
-@mcp.tool(description="指定期間の売上合計を取得する")
+@mcp.tool(description="指定期間の売上合計を取得する", tags={"billing"})
 async def get_total_sales(start_date: str, end_date: str) -> str:
     """
     start_date から end_date までの orders.total_amount 合計を返します。
@@ -234,7 +285,7 @@ async def get_total_sales(start_date: str, end_date: str) -> str:
         await conn.close()
         
 
-@mcp.tool(description="指定期間の日別受注数を取得する")
+@mcp.tool(description="指定期間の日別受注数を取得する", tags={"billing"})
 async def get_daily_order_counts(start_date: str, end_date: str) -> str:
     """
     start_date から end_date までの期間について、
@@ -269,7 +320,7 @@ async def get_daily_order_counts(start_date: str, end_date: str) -> str:
     finally:
         await conn.close()
 
-@mcp.tool(description="日別のツイート数を取得する")
+@mcp.tool(description="日別のツイート数を取得する", tags={"social"})
 async def get_daily_tweet_counts() -> str:
     """
     CosmosDBのMongoDBインターフェースを使用して、日付ごとのツイート数を集計して返します。
@@ -280,7 +331,7 @@ async def get_daily_tweet_counts() -> str:
         conn_str = os.getenv("MONGODB_CONNECTION_STRING")
         db_name = os.getenv("MONGODB_DB_NAME", "Twitter")
         coll_name = os.getenv("MONGODB_COLLECTION_NAME", "tweets")
-        client = MongoClient(conn_str)
+        client = get_mongo_client(conn_str)
         coll = client[db_name][coll_name]
 
         # 日別ドキュメント数をカウントするための集約パイプライン
@@ -320,7 +371,7 @@ async def get_daily_tweet_counts() -> str:
             client.close()
 
 # --- 1. ユーザーごとの投稿数上位を取得 ---
-@mcp.tool(description="ユーザー別のツイート数上位を取得する")
+@mcp.tool(description="ユーザー別のツイート数上位を取得する", tags={"social"})
 async def get_top_users_by_tweet_count(limit: int = 10) -> str:
     """
     日別ではなく、ユーザー（screen_name）ごとのツイート数を集計し、
@@ -330,7 +381,7 @@ async def get_top_users_by_tweet_count(limit: int = 10) -> str:
         conn_str = os.getenv("MONGODB_CONNECTION_STRING")
         db_name = os.getenv("MONGODB_DB_NAME", "Twitter")
         coll_name = os.getenv("MONGODB_COLLECTION_NAME", "tweets")
-        client = MongoClient(conn_str)
+        client = get_mongo_client(conn_str)
         coll = client[db_name][coll_name]
         pipeline = [
             {"$group": {"_id": "$user.screen_name", "count": {"$sum": 1}}},
@@ -347,7 +398,7 @@ async def get_top_users_by_tweet_count(limit: int = 10) -> str:
 
 
 # --- 2. ハッシュタグ別の出現頻度上位を取得 ---
-@mcp.tool(description="ハッシュタグの出現頻度上位を取得する")
+@mcp.tool(description="ハッシュタグの出現頻度上位を取得する", tags={"social"})
 async def get_top_hashtags(limit: int = 10) -> str:
     """
     text フィールドから正規表現でハッシュタグを抽出し、
@@ -357,7 +408,7 @@ async def get_top_hashtags(limit: int = 10) -> str:
         conn_str = os.getenv("MONGODB_CONNECTION_STRING")
         db_name = os.getenv("MONGODB_DB_NAME", "Twitter")
         coll_name = os.getenv("MONGODB_COLLECTION_NAME", "tweets")
-        client = MongoClient(conn_str)
+        client = get_mongo_client(conn_str)
         coll = client[db_name][coll_name]
         pipeline = [
             {"$project": {"tags": {"$regexFindAll": {"input": "$text", "regex": r"#\w+"}}}},
@@ -376,7 +427,7 @@ async def get_top_hashtags(limit: int = 10) -> str:
 
 
 # --- 3. 言語（lang）ごとのツイート分布を取得 ---
-@mcp.tool(description="言語ごとのツイート数を集計する")
+@mcp.tool(description="言語ごとのツイート数を集計する", tags={"social"})
 async def get_language_distribution() -> str:
     """
     lang フィールドを基に、ツイートの言語分布を集計し、割合も算出して返します。
@@ -385,7 +436,7 @@ async def get_language_distribution() -> str:
         conn_str = os.getenv("MONGODB_CONNECTION_STRING")
         db_name = os.getenv("MONGODB_DB_NAME", "Twitter")
         coll_name = os.getenv("MONGODB_COLLECTION_NAME", "tweets")
-        client = MongoClient(conn_str)
+        client = get_mongo_client(conn_str)
         coll = client[db_name][coll_name]
         total = coll.count_documents({})
         pipeline = [
@@ -408,7 +459,7 @@ async def get_language_distribution() -> str:
 
 
 # --- 4. 時間帯（時間単位）ごとのツイート数を取得 ---
-@mcp.tool(description="時間帯別のツイート数を取得する")
+@mcp.tool(description="時間帯別のツイート数を取得する", tags={"social"})
 async def get_hourly_tweet_distribution() -> str:
     """
     created_at を時間粒度（0～23 時）で集計し、
@@ -418,7 +469,7 @@ async def get_hourly_tweet_distribution() -> str:
         conn_str = os.getenv("MONGODB_CONNECTION_STRING")
         db_name = os.getenv("MONGODB_DB_NAME", "Twitter")
         coll_name = os.getenv("MONGODB_COLLECTION_NAME", "tweets")
-        client = MongoClient(conn_str)
+        client = get_mongo_client(conn_str)
         coll = client[db_name][coll_name]
         pipeline = [
             {
@@ -439,7 +490,7 @@ async def get_hourly_tweet_distribution() -> str:
 
 
 # --- 5. 日別平均エンゲージメントを取得 ---
-@mcp.tool(description="日別の平均いいね・リプライ・リツイート数を取得する")
+@mcp.tool(description="日別の平均いいね・リプライ・リツイート数を取得する", tags={"social"})
 async def get_daily_average_engagement() -> str:
     """
     favorite_count, reply_count, retweet_count, quote_count の平均を
@@ -449,7 +500,7 @@ async def get_daily_average_engagement() -> str:
         conn_str = os.getenv("MONGODB_CONNECTION_STRING")
         db_name = os.getenv("MONGODB_DB_NAME", "Twitter")
         coll_name = os.getenv("MONGODB_COLLECTION_NAME", "tweets")
-        client = MongoClient(conn_str)
+        client = get_mongo_client(conn_str)
         coll = client[db_name][coll_name]
         pipeline = [
             {
@@ -481,7 +532,7 @@ async def get_daily_average_engagement() -> str:
 
 
 # --- 6. プロダクト別の言及回数を取得 ---
-@mcp.tool(description="product_name 別のツイート数を集計する")
+@mcp.tool(description="product_name 別のツイート数を集計する", tags={"social"})
 async def get_product_mentions_count() -> str:
     """
     product_name フィールドを基に、各プロダクトの言及回数を
@@ -491,7 +542,7 @@ async def get_product_mentions_count() -> str:
         conn_str = os.getenv("MONGODB_CONNECTION_STRING")
         db_name = os.getenv("MONGODB_DB_NAME", "Twitter")
         coll_name = os.getenv("MONGODB_COLLECTION_NAME", "tweets")
-        client = MongoClient(conn_str)
+        client = get_mongo_client(conn_str)
         coll = client[db_name][coll_name]
         pipeline = [
             {"$group": {"_id": "$product_name", "count": {"$sum": 1}}},
@@ -506,7 +557,7 @@ async def get_product_mentions_count() -> str:
         client.close()
 
 
-@mcp.tool(description="特定のハッシュタグを含むツイートを検索する")
+@mcp.tool(description="特定のハッシュタグを含むツイートを検索する", tags={"social"})
 async def search_tweets_by_hashtag(hashtag: str, limit: int = 100) -> str:
     """
     指定されたハッシュタグを含むツイートを MongoDB から検索し、
@@ -516,7 +567,7 @@ async def search_tweets_by_hashtag(hashtag: str, limit: int = 100) -> str:
         conn_str = os.getenv("MONGODB_CONNECTION_STRING")
         db_name = os.getenv("MONGODB_DB_NAME", "Twitter")
         coll_name = os.getenv("MONGODB_COLLECTION_NAME", "tweets")
-        client = MongoClient(conn_str)
+        client = get_mongo_client(conn_str)
         coll = client[db_name][coll_name]
 
         regex = re.compile(rf"#{re.escape(hashtag)}", re.IGNORECASE)
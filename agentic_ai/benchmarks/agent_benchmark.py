@@ -0,0 +1,174 @@
+"""
+Offline end-to-end comparison of the agent architectures.
+
+Drives every agent module through ``BaseAgent.chat_async`` over a fixed
+corpus of scenarios (one session per scenario, a fresh Agent per turn as
+in backend.py), using the scripted model client and fake MCP tools from
+``benchmarks/offline.py``. Reports per turn: LLM calls, prompt/completion
+tokens, tool calls, messages, wall time, and the session's stored state
+size. Results are written as JSON so runs can be compared.
+
+Usage (from agentic_ai/):
+    python benchmarks/agent_benchmark.py
+    python benchmarks/agent_benchmark.py --modules autogen.single_agent.loop_agent --llm-latency 0.2
+    python benchmarks/agent_benchmark.py --compare benchmarks/results/<earlier run>.json
+"""
+import argparse
+import asyncio
+import datetime
+import importlib
+import json
+import logging
+import os
+import pickle
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("MCP_SERVER_URI", "http://localhost:8000/sse")  # never contacted offline
+
+from autogen.base_agent import TurnAbortedError
+from autogen.state_store import InMemoryStateStore
+from offline import offline_agent_class
+
+MODULES = [
+    "autogen.single_agent.loop_agent",
+    "autogen.multi_agent.reflection_agent",
+    "autogen.multi_agent.collaborative_multi_agent_round_robin",
+    "autogen.multi_agent.collaborative_multi_agent_selector_group",
+    "autogen.multi_agent.handoff_multi_domain_agent",
+    "autogen.multi_agent.collaborative_multi_agent_graphflow",
+]
+
+# name -> turns of one session
+SCENARIOS: Dict[str, List[str]] = {
+    "order_lookup": ["顧客 251 の注文一覧を見せて"],
+    "product_lookup": ["ゲーム製品の在庫状況を教えて"],
+    "cross_domain": ["顧客 42 の注文履歴と、おすすめのゲーム製品のプロモーションを教えて"],
+    "sales_analysis": ["6月の売上の傾向を分析して、改善策を提案して"],
+    "social": ["人気のハッシュタグとツイート数を教えて"],
+    "multi_turn": ["顧客 7 の配送状況は?", "注文 1001 の詳細も教えて", "その製品の在庫はありますか?"],
+}
+
+METRICS = ["llm_calls", "prompt_tokens", "completion_tokens", "tool_calls", "messages", "latency_seconds", "state_bytes"]
+
+
+class ErrorCounter(logging.Handler):
+    """Agent modules log and swallow their errors; count them per turn."""
+
+    def __init__(self) -> None:
+        super().__init__(level=logging.ERROR)
+        self.count = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.count += 1
+
+
+async def run_scenario(agent_cls: Any, name: str, turns: List[str]) -> List[Dict[str, Any]]:
+    store = InMemoryStateStore()
+    session_id = f"bench-{name}"
+    results = []
+    errors = ErrorCounter()
+    logging.getLogger().addHandler(errors)
+    for prompt in turns:
+        agent = agent_cls(store, session_id)
+        errors.count = 0
+        start = time.perf_counter()
+        try:
+            answer = await agent.chat_async(prompt)
+        except TurnAbortedError as exc:  # TURN_DEADLINE_SECONDS hit by a module that does not catch errors
+            answer = str(exc)
+        wall = time.perf_counter() - start
+        stats = agent.last_turn_stats.as_dict() if agent.last_turn_stats else {}
+        if errors.count or not stats or agent.last_turn_aborted:
+            stats["error"] = answer
+        stats["wall_seconds"] = round(wall, 4)
+        # The state head plus its checkpoint and delta keys
+        stats["state_bytes"] = sum(
+            len(pickle.dumps(store.get(key), protocol=pickle.HIGHEST_PROTOCOL))
+            for key in [session_id, *store.keys(f"{session_id}:")]
+        )
+        stats["answer"] = answer[:200]
+        results.append(stats)
+    logging.getLogger().removeHandler(errors)
+    return results
+
+
+async def run(modules: List[str], llm_latency: float) -> Dict[str, Any]:
+    report: Dict[str, Any] = {}
+    for module_path in modules:
+        agent_cls = offline_agent_class(importlib.import_module(module_path).Agent, llm_latency)
+        scenarios = {name: await run_scenario(agent_cls, name, turns) for name, turns in SCENARIOS.items()}
+        turns = [t for ts in scenarios.values() for t in ts]
+        summary = {
+            metric: round(sum(t.get(metric, 0) for t in turns) / len(turns), 4)
+            for metric in METRICS
+        }
+        summary["errors"] = sum(1 for t in turns if "error" in t)
+        report[module_path] = {"summary": summary, "scenarios": scenarios}
+    return report
+
+
+def print_table(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    header = f"{'module':<42}" + "".join(f"{m:>18}" for m in METRICS) + f"{'errors':>8}"
+    print("per-turn averages" + (" (delta vs baseline)" if baseline else ""))
+    print(header)
+    print("-" * len(header))
+    for module_path, result in report.items():
+        row = f"{module_path.split('.')[-1]:<42}"
+        for metric in METRICS:
+            value = result["summary"][metric]
+            cell = f"{value:.3f}" if metric == "latency_seconds" else f"{value:.1f}"
+            if baseline and module_path in baseline:
+                before = baseline[module_path]["summary"][metric]
+                cell += f" ({value - before:+.1f})" if metric != "latency_seconds" else f" ({value - before:+.3f})"
+            row += f"{cell:>18}"
+        print(row + f"{result['summary']['errors']:>8}")
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds added to every scripted LLM call")
+    parser.add_argument("--output", help="result file (default: benchmarks/results/agent_benchmark_<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier result file to diff against")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    report = asyncio.run(run(args.modules, args.llm_latency))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["modules"]
+    print_table(report, baseline)
+
+    output = Path(args.output) if args.output else (
+        Path(__file__).resolve().parent / "results" / f"agent_benchmark_{datetime.datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "revision": git_revision(),
+                "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                "llm_latency_seconds": args.llm_latency,
+                "config": {k: v for k, v in os.environ.items() if k.startswith(("SELECTOR_", "HANDOFF_", "REFLECTION_", "TOOL_", "MODEL_CONTEXT", "STATE_", "TURN_"))},
+                "modules": report,
+            },
+            f,
+            ensure_ascii=False,
+            indent=2,
+        )
+    print(f"\nresults written to {output}")
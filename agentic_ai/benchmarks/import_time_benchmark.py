@@ -0,0 +1,125 @@
+"""
+Cold-start profile of the two containers: ``python -X importtime`` of
+applications/backend.py and backend_services/mcp_service.py, plus the time
+from process start until the backend's /healthz answers under uvicorn.
+
+For each target the report gives the median import time of ``--runs``
+fresh interpreters, the packages with the largest self import time, and
+which heavy dependencies were imported at startup at all (they should be
+deferred to the warm-up or the first tool call). The agent module is
+profiled too, as the part backend.py now imports after it is live.
+
+Usage (from agentic_ai/):
+    python benchmarks/import_time_benchmark.py
+    python benchmarks/import_time_benchmark.py --module autogen.single_agent.loop_agent --runs 10 --top 15
+"""
+import argparse
+import json
+import os
+import re
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import httpx
+
+from startup_benchmark import free_port, wait_for
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY = ["openai", "autogen_agentchat", "autogen_ext", "mcp", "tiktoken", "pymongo", "asyncpg", "opentelemetry.sdk"]
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def environment(module: str) -> Dict[str, str]:
+    return {
+        **os.environ,
+        "PYTHONPATH": str(ROOT),
+        "AGENT_MODULE": module,
+        "MCP_SERVER_URI": os.getenv("MCP_SERVER_URI", "http://127.0.0.1:9/sse"),
+        "STATE_STORE_BACKEND": "memory",
+        "TRACING": "off",
+    }
+
+
+def profile_import(target: str, module: str) -> Tuple[float, List[Tuple[int, str]]]:
+    """Cumulative import time of ``target`` in ms and (self µs, module) of everything it imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT, env=environment(module), capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    rows = [m.groups() for m in map(IMPORT_LINE.match, result.stderr.splitlines()) if m]
+    total = next(int(cumulative) for _, cumulative, _, name in reversed(rows) if name == target)
+    return total / 1000, [(int(own), name) for own, _, _, name in rows]
+
+
+def report_target(target: str, module: str, runs: int, top: int) -> Dict[str, Any]:
+    try:
+        profiles = [profile_import(target, module) for _ in range(runs)]
+    except RuntimeError as exc:
+        return {"target": target, "error": str(exc)}
+    by_package: Counter = Counter()
+    for own, name in profiles[-1][1]:
+        by_package[name.split(".")[0]] += own
+    imported = {name for _, name in profiles[-1][1]}
+    return {
+        "target": target,
+        "import_ms": statistics.median(ms for ms, _ in profiles),
+        "modules": len(imported),
+        "top_packages_ms": {name: own / 1000 for name, own in by_package.most_common(top)},
+        "heavy_imported": [name for name in HEAVY if name in imported],
+    }
+
+
+def time_to_live(module: str) -> float:
+    """Seconds from starting ``uvicorn applications.backend:app`` until /healthz answers."""
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "applications.backend:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env={**environment(module), "WARMUP": "on"},
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=10) as client:
+            return wait_for(client, "/healthz", start, process)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=60)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="autogen.multi_agent.handoff_multi_domain_agent", help="AGENT_MODULE")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="packages listed per target")
+    parser.add_argument("--output", help="write the raw results as JSON")
+    args = parser.parse_args()
+
+    targets = ["applications.backend", "backend_services.mcp_service", args.module]
+    report = [report_target(target, args.module, args.runs, args.top) for target in targets]
+    live = [time_to_live(args.module) for _ in range(args.runs)]
+
+    print(f"import time, median of {args.runs} runs (AGENT_MODULE={args.module})")
+    for entry in report:
+        print(f"\n{entry['target']}")
+        if "error" in entry:
+            print(f"  not importable here: {entry['error']}")
+            continue
+        print(f"  {entry['import_ms']:.0f} ms, {entry['modules']} modules")
+        print(f"  heavy dependencies imported: {', '.join(entry['heavy_imported']) or 'none'}")
+        for name, ms in entry["top_packages_ms"].items():
+            print(f"  {ms:8.1f} ms  {name}")
+    print(f"\nbackend process start -> /healthz: {statistics.median(live):.3f}s (median)")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"module": args.module, "imports": report, "live_seconds": live}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
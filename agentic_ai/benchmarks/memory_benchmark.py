@@ -0,0 +1,151 @@
+"""
+User memory benchmark (autogen/vector_memory.py) at 1k, 10k and 100k
+memories of one user, with the local hashing embedding (or MEMORY_EMBEDDING).
+
+For each size, in a temporary MEMORY_DIR:
+
+- batch insert throughput (``--batch`` memories per insert) and bytes on disk,
+- retrieval latency, median and p95 of ``--queries`` queries: the full
+  ``query`` (embedding + search + reading the hits) and the search alone,
+  plus the first query after reopening the index,
+- recall@k of planted memories queried with different wording,
+- tokens the memories add to a prompt: VectorMemory (top-k within
+  MEMORY_TOKEN_BUDGET) against ListMemory, which adds every memory.
+
+Usage (from agentic_ai/):
+    python benchmarks/memory_benchmark.py
+    python benchmarks/memory_benchmark.py --sizes 1000 100000 --queries 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from autogen_core.memory import MemoryContent, MemoryMimeType  # noqa: E402
+
+from autogen.tokens import count_tokens  # noqa: E402
+from autogen.vector_memory import VectorIndex, get_embedding, get_user_memory, normalized  # noqa: E402
+
+SUBJECTS = ["配送", "支払い", "返品", "ゲーム製品", "家電", "書籍", "サブスクリプション", "ポイント", "クーポン", "請求書", "通知", "レポート"]
+PREFERENCES = [
+    "は{}を希望している", "について{}で連絡してほしい", "の案内は{}が好み", "は{}だと満足する", "で{}は避けてほしい",
+]
+DETAILS = ["週末", "平日の夜", "メール", "箇条書き", "表形式", "短い要約", "関西弁", "丁寧語", "英語", "グラフ付き", "月末", "午前中"]
+# Planted memories and queries worded differently; each must come back in the top k
+PLANTED = [
+    ("誕生日は3月14日で、その週はセール情報を送ってほしい", "誕生日の週のセールについて"),
+    ("キャンプ用品のレビューを参考にして購入を決めている", "キャンプ用品のおすすめは？"),
+    ("Prefers invoices as PDF attachments sent on the first business day", "send my invoice as a pdf"),
+    ("夜間の電話連絡は一切しないでほしい", "電話の連絡は夜でもいい？"),
+    ("定期購入のコーヒー豆は深煎りを好む", "コーヒー豆の定期購入の焙煎"),
+]
+
+
+def synthetic_memories(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(SUBJECTS)}{rng.choice(PREFERENCES).format(rng.choice(DETAILS))}（{i}）"
+        for i in range(n)
+    ]
+
+
+def percentile(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[max(0, int(len(values) * p) - 1)]
+
+
+async def measure(size: int, args: argparse.Namespace) -> Dict[str, Any]:
+    os.environ["USER_MEMORY"] = "on"
+    os.environ["MEMORY_DIR"] = tempfile.mkdtemp(prefix="memory_benchmark_")
+    try:
+        memory = get_user_memory(f"bench-{size}")
+        texts = synthetic_memories(size - len(PLANTED))
+        positions = sorted(random.Random(1).sample(range(size), len(PLANTED)))
+        for position, (planted, _) in zip(positions, PLANTED):
+            texts.insert(position, planted)
+
+        start = time.perf_counter()
+        for i in range(0, size, args.batch):
+            await memory.add_many([MemoryContent(content=t, mime_type=MemoryMimeType.TEXT) for t in texts[i : i + args.batch]])
+        insert_s = time.perf_counter() - start
+
+        queries = [f"{q}について" for q in synthetic_memories(args.queries, seed=2)]
+        query_ms, search_ms = [], []
+        _, embedding, _ = get_embedding()
+        for q in queries:
+            start = time.perf_counter()
+            await memory.query(q)
+            query_ms.append((time.perf_counter() - start) * 1000)
+            vector = normalized(embedding([q]))[0]
+            start = time.perf_counter()
+            memory.index.search(vector, memory.top_k, memory.token_budget, memory.min_score)
+            search_ms.append((time.perf_counter() - start) * 1000)
+
+        reopened = VectorIndex(memory.index.path, memory.index.embedding_name, memory.index.dim)
+        start = time.perf_counter()
+        reopened.search(normalized(embedding([queries[0]]))[0], memory.top_k, memory.token_budget)
+        reopen_ms = (time.perf_counter() - start) * 1000
+
+        found = 0
+        injected: List[int] = []
+        for planted, query in PLANTED:
+            results = (await memory.query(query, min_score=0.0)).results
+            found += planted in [r.content for r in results]
+            injected.append(sum(count_tokens(str(r.content)) for r in results))
+        return {
+            "memories": size,
+            "insert_s": insert_s,
+            "inserts_per_s": size / insert_s,
+            "disk_mb": memory.index.size_bytes / 1024 / 1024,
+            "query_ms_median": statistics.median(query_ms),
+            "query_ms_p95": percentile(query_ms, 0.95),
+            "search_ms_median": statistics.median(search_ms),
+            "search_ms_p95": percentile(search_ms, 0.95),
+            "reopen_first_search_ms": reopen_ms,
+            "recall_at_k": found / len(PLANTED),
+            "prompt_tokens_vector": max(injected),
+            "prompt_tokens_list_memory": sum(count_tokens(t) for t in texts),
+        }
+    finally:
+        shutil.rmtree(os.environ["MEMORY_DIR"], ignore_errors=True)
+
+
+async def main(args: argparse.Namespace) -> None:
+    name, _, dim = get_embedding()
+    results = [await measure(size, args) for size in args.sizes]
+
+    print(f"user memory, embedding {name} ({dim} dims), top_k {os.getenv('MEMORY_TOP_K', '5')}, budget {os.getenv('MEMORY_TOKEN_BUDGET', '300')} tokens")
+    header = (
+        f"{'memories':>9}{'insert/s':>10}{'disk MB':>9}{'query p50':>11}{'query p95':>11}{'search p50':>12}"
+        f"{'search p95':>12}{'reopen ms':>11}{'recall':>8}{'prompt tok':>12}{'ListMemory tok':>16}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['memories']:>9}{r['inserts_per_s']:>10.0f}{r['disk_mb']:>9.1f}{r['query_ms_median']:>11.2f}{r['query_ms_p95']:>11.2f}"
+            f"{r['search_ms_median']:>12.2f}{r['search_ms_p95']:>12.2f}{r['reopen_first_search_ms']:>11.2f}{r['recall_at_k']:>8.2f}"
+            f"{r['prompt_tokens_vector']:>12}{r['prompt_tokens_list_memory']:>16}"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"embedding": name, "dim": dim, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="memories of one user")
+    parser.add_argument("--batch", type=int, default=1000, help="memories per insert")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--output", help="write the raw results as JSON")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,201 @@
+"""
+Per-role model tiering benchmark (``BaseAgent.role_deployments`` /
+AGENT_ROLE_DEPLOYMENTS): the agent modules with routing and critique roles,
+with every role on the default deployment ("single") and with the
+SelectorGroupChat selector, the handoff coordinator and the reflection
+critic on a smaller deployment ("tiered").
+
+Offline, over the scenarios of ``benchmarks/agent_benchmark.py``: the
+scripted model of ``benchmarks/offline.py`` answers, and each call waits
+as long as its deployment would take, time to first token plus prompt
+tokens at ``--*-prefill`` ms per 1k plus completion tokens at ``--*-tps``
+tokens per second. The defaults are rough gpt-4o / gpt-4o-mini figures;
+pass measured ones for real deployments. Cost uses ``--*-price`` (USD per
+1M prompt and completion tokens, defaults at gpt-4o / gpt-4o-mini list
+prices).
+
+By default the LLM paths of these roles run (SELECTOR_MODE=llm,
+HANDOFF_PREROUTER=off, REFLECTION_MODE=always); ``--fast-paths`` keeps the
+configured rule-based shortcuts, which already skip many of these calls.
+
+Reported per module and configuration: turn latency (mean, p95), LLM calls
+and cost per turn, and per role its calls, tokens and cost.
+
+Usage (from agentic_ai/):
+    python benchmarks/model_tier_benchmark.py
+    python benchmarks/model_tier_benchmark.py --small-ttft 0.2 --small-tps 150 --fast-paths
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("MCP_SERVER_URI", "http://localhost:8000/sse")  # never contacted offline
+os.environ.setdefault("TRACING", "off")
+
+from autogen_core.models import CreateResult, LLMMessage, RequestUsage  # noqa: E402
+
+from agent_benchmark import SCENARIOS  # noqa: E402
+from offline import ScriptedChatCompletionClient, offline_agent_class  # noqa: E402
+
+from autogen.cancellation import CancellableChatCompletionClient  # noqa: E402
+from autogen.model_clients import LlmUsage, UsageTrackingChatCompletionClient  # noqa: E402
+from autogen.state_store import InMemoryStateStore  # noqa: E402
+
+MODULES = [
+    "autogen.multi_agent.reflection_agent",
+    "autogen.multi_agent.collaborative_multi_agent_selector_group",
+    "autogen.multi_agent.handoff_multi_domain_agent",
+]
+LARGE, SMALL = "gpt-4o", "gpt-4o-mini"
+TIERED_ROLES = "selector={0},coordinator={0},critic={0}".format(SMALL)
+LLM_PATHS = {"SELECTOR_MODE": "llm", "HANDOFF_PREROUTER": "off", "REFLECTION_MODE": "always"}
+
+
+class Profile:
+    """Latency and price of one deployment."""
+
+    def __init__(self, ttft: float, prefill_ms_per_1k: float, tps: float, prompt_price: float, completion_price: float) -> None:
+        self.ttft = ttft
+        self.prefill_ms_per_1k = prefill_ms_per_1k
+        self.tps = tps
+        self.prompt_price = prompt_price
+        self.completion_price = completion_price
+
+    def latency(self, usage: RequestUsage) -> float:
+        return self.ttft + usage.prompt_tokens / 1000 * self.prefill_ms_per_1k / 1000 + usage.completion_tokens / self.tps
+
+    def cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+        return (prompt_tokens * self.prompt_price + completion_tokens * self.completion_price) / 1_000_000
+
+
+class ProfiledScriptedClient(ScriptedChatCompletionClient):
+    """The scripted model, answering after the latency of a deployment profile."""
+
+    def __init__(self, profile: Profile) -> None:
+        super().__init__()
+        self.profile = profile
+
+    async def create(self, messages: Sequence[LLMMessage], **kwargs: Any) -> CreateResult:
+        result = await super().create(messages, **kwargs)
+        await asyncio.sleep(self.profile.latency(result.usage))
+        return result
+
+
+def tiered_agent_class(agent_cls: Any, profiles: Dict[str, Profile], usage: Dict[Tuple[str, str], LlmUsage]) -> Any:
+    """Offline agent whose model clients answer at the profile of the role's deployment, counted per role in ``usage``."""
+
+    class TieredAgent(offline_agent_class(agent_cls)):  # type: ignore[misc]
+        def create_model_client(self, role: Optional[str] = None) -> UsageTrackingChatCompletionClient:
+            deployment, _ = self.model_for(role)
+            per_role = usage.setdefault((role or "default", deployment or LARGE), LlmUsage())
+            client = UsageTrackingChatCompletionClient(ProfiledScriptedClient(profiles[deployment or LARGE]), per_role)
+            return UsageTrackingChatCompletionClient(CancellableChatCompletionClient(client, self.cancellation_token), self.llm_usage)
+
+    return TieredAgent
+
+
+def percentile(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, math.ceil(len(values) * p) - 1))]
+
+
+async def run(module: str, roles: str, profiles: Dict[str, Profile]) -> Dict[str, Any]:
+    os.environ["AGENT_ROLE_DEPLOYMENTS"] = roles
+    usage: Dict[Tuple[str, str], LlmUsage] = {}
+    agent_cls = tiered_agent_class(importlib.import_module(module).Agent, profiles, usage)
+    latencies: List[float] = []
+    calls: List[int] = []
+    for name, turns in SCENARIOS.items():
+        store = InMemoryStateStore()
+        for prompt in turns:
+            agent = agent_cls(store, f"{roles or 'single'}-{name}")
+            start = time.perf_counter()
+            answer = await agent.chat_async(prompt)
+            latencies.append(time.perf_counter() - start)
+            calls.append(agent.last_turn_stats.llm_calls)
+            if not answer:
+                raise RuntimeError(f"{module}: empty answer for {prompt!r}")
+    by_role = {
+        f"{role}@{deployment}": {
+            "calls": u.calls,
+            "prompt_tokens": u.prompt_tokens,
+            "completion_tokens": u.completion_tokens,
+            "cost_usd": profiles[deployment].cost(u.prompt_tokens, u.completion_tokens),
+        }
+        for (role, deployment), u in sorted(usage.items())
+    }
+    return {
+        "turns": len(latencies),
+        "latency_mean": statistics.mean(latencies),
+        "latency_p95": percentile(latencies, 0.95),
+        "llm_calls_per_turn": statistics.mean(calls),
+        "cost_usd_per_turn": sum(r["cost_usd"] for r in by_role.values()) / len(latencies),
+        "roles": by_role,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    os.environ["AZURE_OPENAI_CHAT_DEPLOYMENT"] = os.environ["OPENAI_MODEL_NAME"] = LARGE
+    if not args.fast_paths:
+        os.environ.update(LLM_PATHS)
+    profiles = {
+        LARGE: Profile(args.large_ttft, args.large_prefill, args.large_tps, *args.large_price),
+        SMALL: Profile(args.small_ttft, args.small_prefill, args.small_tps, *args.small_price),
+    }
+    report: Dict[str, Dict[str, Any]] = {}
+    for module in args.module or MODULES:
+        report[module] = {config: await run(module, roles, profiles) for config, roles in (("single", ""), ("tiered", TIERED_ROLES))}
+
+    paths = "rule-based fast paths as configured" if args.fast_paths else "LLM routing and critique paths"
+    print(f"single: every role on {LARGE}; tiered: {TIERED_ROLES} ({paths})")
+    header = f"{'module':<42}{'config':>8}{'turn s':>9}{'p95 s':>8}{'calls':>7}{'$/1k turns':>12}"
+    print(header)
+    print("-" * len(header))
+    for module, configs in report.items():
+        for config, r in configs.items():
+            print(
+                f"{module.rsplit('.', 1)[-1]:<42}{config:>8}{r['latency_mean']:>9.2f}{r['latency_p95']:>8.2f}"
+                f"{r['llm_calls_per_turn']:>7.1f}{r['cost_usd_per_turn'] * 1000:>12.2f}"
+            )
+        single, tiered = configs["single"], configs["tiered"]
+        print(
+            f"{'':<42}{'delta':>8}{100 * (tiered['latency_mean'] / single['latency_mean'] - 1):>8.0f}%"
+            f"{100 * (tiered['latency_p95'] / single['latency_p95'] - 1):>7.0f}%{'':>7}"
+            f"{100 * (tiered['cost_usd_per_turn'] / single['cost_usd_per_turn'] - 1):>11.0f}%"
+        )
+    print(f"\nper role (tiered), over {sum(len(t) for t in SCENARIOS.values())} turns per module")
+    print(f"{'module':<42}{'role@deployment':<28}{'calls':>7}{'prompt tok':>12}{'compl tok':>11}{'$':>10}")
+    for module, configs in report.items():
+        for role, r in configs["tiered"]["roles"].items():
+            print(
+                f"{module.rsplit('.', 1)[-1]:<42}{role:<28}{r['calls']:>7}{r['prompt_tokens']:>12}"
+                f"{r['completion_tokens']:>11}{r['cost_usd']:>10.4f}"
+            )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", action="append", help="agent module (repeatable; default: the three with tiered roles)")
+    parser.add_argument("--large-ttft", type=float, default=0.45, help=f"{LARGE} seconds to first token")
+    parser.add_argument("--large-prefill", type=float, default=60, help=f"{LARGE} ms per 1k prompt tokens")
+    parser.add_argument("--large-tps", type=float, default=80, help=f"{LARGE} completion tokens per second")
+    parser.add_argument("--large-price", type=float, nargs=2, default=[2.5, 10.0], metavar=("PROMPT", "COMPLETION"), help="USD per 1M tokens")
+    parser.add_argument("--small-ttft", type=float, default=0.3, help=f"{SMALL} seconds to first token")
+    parser.add_argument("--small-prefill", type=float, default=25, help=f"{SMALL} ms per 1k prompt tokens")
+    parser.add_argument("--small-tps", type=float, default=130, help=f"{SMALL} completion tokens per second")
+    parser.add_argument("--small-price", type=float, nargs=2, default=[0.15, 0.6], metavar=("PROMPT", "COMPLETION"), help="USD per 1M tokens")
+    parser.add_argument("--fast-paths", action="store_true", help="keep SELECTOR_MODE, HANDOFF_PREROUTER and REFLECTION_MODE as configured")
+    parser.add_argument("--output", help="write the raw results as JSON")
+    asyncio.run(main(parser.parse_args()))
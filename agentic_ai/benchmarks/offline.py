@@ -0,0 +1,458 @@
+"""
+Offline stand-ins for the two external services the agent modules call:
+
+- ``ScriptedChatCompletionClient``: a deterministic model that plays each
+  role (planner, specialist, coordinator, critic, selector...) from the
+  agent's system prompt and the conversation so far.
+- ``fake_mcp_tools()``: in-process tools with the same names, parameters,
+  descriptions and domain tags as backend_services/mcp_service.py,
+  returning canned JSON.
+
+``offline_agent_class`` combines both with an agent module's ``Agent`` so a
+whole team runs through ``chat_async`` with no network.
+"""
+import asyncio
+import datetime
+import json
+import re
+from typing import Any, AsyncGenerator, Dict, List, Mapping, Optional, Sequence, Type, Union
+
+from autogen_core import CancellationToken, FunctionCall
+from autogen_core.models import (
+    ChatCompletionClient,
+    CreateResult,
+    FunctionExecutionResultMessage,
+    LLMMessage,
+    ModelInfo,
+    RequestUsage,
+    SystemMessage,
+    UserMessage,
+)
+from autogen_core.tools import FunctionTool, Tool, ToolSchema
+
+from autogen.cancellation import CancellableChatCompletionClient
+from autogen.model_clients import UsageTrackingChatCompletionClient
+from autogen.tokens import count_messages_tokens, count_schema_tokens, count_tokens
+
+MODEL_INFO: ModelInfo = {
+    "vision": False,
+    "function_calling": True,
+    "json_output": True,
+    "structured_output": True,
+    "family": "unknown",
+}
+
+# Keyword -> tool the scripted specialists call for it (first match wins).
+KEYWORD_TOOLS = [
+    ("を含むツイート", "search_tweets_by_hashtag"),
+    ("配送", "get_shipping_status"),
+    ("詳細", "get_order_details"),
+    ("注文", "get_customer_orders"),
+    ("売上", "get_total_sales"),
+    ("受注", "get_daily_order_counts"),
+    ("ユーザー", "get_all_users"),
+    ("在庫", "get_inventory_status"),
+    ("ゲーム", "get_game_products"),
+    ("カテゴリ", "get_all_categories"),
+    ("製品", "get_products"),
+    ("商品", "get_products"),
+    ("プロモーション", "get_products"),
+    ("エンゲージメント", "get_daily_average_engagement"),
+    ("ハッシュタグ", "get_top_hashtags"),
+    ("ツイート", "get_daily_tweet_counts"),
+    ("言語", "get_language_distribution"),
+]
+BILLING_WORDS = ("請求", "支払", "注文", "配送", "顧客", "売上", "受注", "ツイート", "ハッシュタグ", "ユーザー")
+PRODUCT_WORDS = ("製品", "商品", "プロモーション", "割引", "在庫", "カテゴリ", "ゲーム")
+
+
+def _schema(tool: Union[Tool, ToolSchema]) -> Mapping[str, Any]:
+    return tool.schema if isinstance(tool, Tool) else tool
+
+
+def _text(message: LLMMessage) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(str(getattr(item, "content", item)) for item in content)
+    return str(content)
+
+
+class ScriptedChatCompletionClient(ChatCompletionClient):
+    """
+    Deterministic model for offline runs. Same conversation in, same
+    completion out; usage is estimated with ``autogen.tokens`` so token
+    figures are comparable between architectures. ``latency_seconds`` adds
+    a fixed delay per call to mimic a remote model.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0) -> None:
+        self.latency_seconds = latency_seconds
+        self._total = RequestUsage(prompt_tokens=0, completion_tokens=0)
+        self._last = RequestUsage(prompt_tokens=0, completion_tokens=0)
+
+    # ------------------------------------------------------------------ roles
+    def _respond(self, messages: Sequence[LLMMessage], tools: Sequence[Union[Tool, ToolSchema]]) -> Union[str, List[FunctionCall]]:
+        system = "\n".join(_text(m) for m in messages if isinstance(m, SystemMessage))
+        everything = "\n".join(_text(m) for m in messages)
+        names = [_schema(t)["name"] for t in tools]
+        handoffs = [n for n in names if n.startswith("transfer_to_")]
+        data_tools = [t for t in tools if not _schema(t)["name"].startswith("transfer_to_")]
+
+        # The user's request; a Swarm task may end with a user handoff notice.
+        user_turns = [
+            i for i, m in enumerate(messages)
+            if isinstance(m, UserMessage) and m.source == "user" and not _text(m).startswith("Transferred to")
+        ]
+        task_index = user_turns[-1] if user_turns else -1
+        task = _text(messages[task_index]) if task_index >= 0 else ""
+        since_task = messages[task_index + 1:]
+        peer_outputs = [_text(m) for m in since_task if isinstance(m, UserMessage) and m.source != "user"]
+        inputs = [i for i, m in enumerate(messages) if isinstance(m, UserMessage)]
+        last_input = inputs[-1] if inputs else -1
+        tool_results = [_text(m) for m in messages[last_input + 1:] if isinstance(m, FunctionExecutionResultMessage)]
+        instruction = _text(messages[last_input]) if last_input >= 0 else task
+
+        selector = re.search(r"select an agent from \[?([^\n\]]+)", everything, re.IGNORECASE)
+        if selector and not tools:
+            candidates = [c.strip(" '\",.") for c in selector.group(1).split(",")]
+            return self._select(candidates, everything)
+        if "統合担当" in system:
+            return "FINAL_ANSWER: " + self._digest(peer_outputs)
+        if "コーディネーター" in system:
+            if peer_outputs or (tool_results and not any("Transferred" in r for r in tool_results)):
+                return "TERMINATE: " + self._digest(peer_outputs or tool_results)
+            return [self._call(self._handoff_for(task, handoffs), {})]
+        if "Analysis & Planning Agent" in system:
+            if peer_outputs:
+                return "FINAL_ANSWER: " + self._digest(peer_outputs) + " TERMINATE"
+            return self._plan(task)
+        if "APPROVE" in system:
+            return "APPROVE"
+
+        if data_tools and not tool_results:
+            tool = self._tool_for(instruction + "\n" + task, data_tools)
+            return [self._call(_schema(tool)["name"], self._arguments(_schema(tool), instruction + "\n" + task))]
+        if "transfer_to_coordinator" in handoffs:
+            return [self._call("transfer_to_coordinator", {})]
+        return "結果: " + self._digest(tool_results or [instruction])
+
+    @staticmethod
+    def _select(candidates: List[str], prompt: str) -> str:
+        # The planner first, then every specialist once, then the planner concludes.
+        history = prompt.split("Current conversation context:", 1)[-1].split("Read the above conversation", 1)[0]
+        spoken = {c for c in candidates if re.search(rf"^{re.escape(c)}:", history, re.MULTILINE)}
+        planner = next((c for c in candidates if "Planning" in c), candidates[0])
+        if planner not in spoken:
+            return planner
+        return next((c for c in candidates if c not in spoken), planner)
+
+    @staticmethod
+    def _specialists(task: str) -> List[str]:
+        wanted = []
+        if any(w in task for w in BILLING_WORDS):
+            wanted.append("CRMBillingAgent (crm_billing)")
+        if any(w in task for w in PRODUCT_WORDS):
+            wanted.append("ProductPromotionsAgent (product_promotions)")
+        return wanted or ["CRMBillingAgent (crm_billing)", "ProductPromotionsAgent (product_promotions)"]
+
+    def _plan(self, task: str) -> str:
+        return "\n".join(f"{name}: 「{task}」について担当範囲のデータを確認してください。" for name in self._specialists(task))
+
+    @staticmethod
+    def _handoff_for(task: str, handoffs: List[str]) -> str:
+        target = "transfer_to_ProductPromotionsAgent" if any(w in task for w in PRODUCT_WORDS) and not any(
+            w in task for w in BILLING_WORDS
+        ) else "transfer_to_CRMBillingAgent"
+        return target if target in handoffs else handoffs[0]
+
+    @staticmethod
+    def _tool_for(text: str, tools: Sequence[Union[Tool, ToolSchema]]) -> Union[Tool, ToolSchema]:
+        by_name = {_schema(t)["name"]: t for t in tools}
+        for keyword, name in KEYWORD_TOOLS:
+            if keyword in text and name in by_name:
+                return by_name[name]
+        return tools[0]
+
+    @staticmethod
+    def _arguments(schema: Mapping[str, Any], text: str) -> Dict[str, Any]:
+        numbers = re.findall(r"\d+", text)
+        parameters = schema.get("parameters", {})
+        arguments: Dict[str, Any] = {}
+        for name in parameters.get("required", []):
+            kind = parameters.get("properties", {}).get(name, {}).get("type")
+            if "date" in name:
+                arguments[name] = "2025-06-30" if name.startswith("end") else "2025-06-01"
+            elif kind == "integer":
+                arguments[name] = int(numbers[0]) if numbers else 1
+            else:
+                arguments[name] = numbers[0] if numbers else "1"
+        return arguments
+
+    @staticmethod
+    def _call(name: str, arguments: Dict[str, Any]) -> FunctionCall:
+        return FunctionCall(id=f"call_{name}", name=name, arguments=json.dumps(arguments, ensure_ascii=False))
+
+    @staticmethod
+    def _digest(parts: Sequence[str]) -> str:
+        return " / ".join(p.replace("\n", " ")[:160] for p in parts) or "確認しました。"
+
+    # ------------------------------------------------------------ client API
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Union[Tool, ToolSchema]] = [],
+        tool_choice: Any = "auto",
+        json_output: Optional[Any] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        content = self._respond(messages, tools)
+        completion = content if isinstance(content, str) else "".join(f"{c.name}({c.arguments})" for c in content)
+        usage = RequestUsage(
+            prompt_tokens=self.count_tokens(messages, tools=tools),
+            completion_tokens=count_tokens(completion),
+        )
+        self._last = usage
+        self._total = RequestUsage(
+            prompt_tokens=self._total.prompt_tokens + usage.prompt_tokens,
+            completion_tokens=self._total.completion_tokens + usage.completion_tokens,
+        )
+        return CreateResult(
+            finish_reason="stop" if isinstance(content, str) else "function_calls",
+            content=content,
+            usage=usage,
+            cached=False,
+        )
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        **kwargs: Any,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        result = await self.create(messages, **kwargs)
+        if isinstance(result.content, str):
+            yield result.content
+        yield result
+
+    async def close(self) -> None:
+        pass
+
+    def actual_usage(self) -> RequestUsage:
+        return self._last
+
+    def total_usage(self) -> RequestUsage:
+        return self._total
+
+    def count_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Union[Tool, ToolSchema]] = []) -> int:
+        return count_messages_tokens(messages) + sum(count_schema_tokens(_schema(t)) for t in tools)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Union[Tool, ToolSchema]] = []) -> int:
+        return 128000 - self.count_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self) -> Any:
+        return MODEL_INFO
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return MODEL_INFO
+
+
+# ---------------------------------------------------------------------------
+#  Fake MCP tools (names, parameters and descriptions of mcp_service.py)
+# ---------------------------------------------------------------------------
+def _json(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False)
+
+
+async def get_all_categories() -> str:
+    return _json([{"category_id": i, "name": n} for i, n in enumerate(["ゲーム", "周辺機器", "グッズ"], 1)])
+
+
+async def get_products(category_id: Optional[int] = None) -> str:
+    return _json([{"product_id": i, "name": f"製品{i}", "category_id": category_id or 1, "price": 4980 + i * 1000} for i in range(1, 6)])
+
+
+async def get_product_detail(product_id: int) -> str:
+    return _json({"product_id": product_id, "name": f"製品{product_id}", "price": 6980, "promotion": "10%オフ"})
+
+
+async def get_game_products() -> str:
+    return _json([{"product_id": i, "name": f"ゲーム{i}", "price": 7980} for i in range(1, 4)])
+
+
+async def get_inventory_status(product_id: str) -> str:
+    return _json({"product_id": product_id, "stock": 42, "warehouse": "東京"})
+
+
+async def get_customer_orders(customer_id: str) -> str:
+    return _json([{"order_id": 1000 + i, "customer_id": customer_id, "total": 9800 * i, "status": "shipped"} for i in range(1, 4)])
+
+
+async def get_order_details(order_id: int) -> str:
+    return _json({"order_id": order_id, "items": [{"product_id": 1, "quantity": 2}], "total": 13960})
+
+
+async def get_shipping_status(user_id: int) -> str:
+    return _json([{"order_id": 1001, "user_id": user_id, "shipping_status": "配送中"}])
+
+
+async def get_all_users() -> str:
+    return _json([{"user_id": i, "name": f"ユーザー{i}"} for i in range(1, 6)])
+
+
+async def get_total_sales(start_date: str, end_date: str) -> str:
+    return _json({"start_date": start_date, "end_date": end_date, "total_sales": 1234567})
+
+
+async def get_daily_order_counts(start_date: str, end_date: str) -> str:
+    return _json([{"date": f"2025-06-0{d}", "orders": 10 + d} for d in range(1, 8)])
+
+
+# The tweet tools answer over a year-long corpus, like the MongoDB collection
+# behind mcp_service.py: one row per day, or full tweets.
+_DAYS = [(datetime.date(2025, 1, 1) + datetime.timedelta(days=d)).isoformat() for d in range(365)]
+
+
+async def get_daily_tweet_counts() -> str:
+    return _json([{"date": day, "count": 80 + (d * 37) % 61} for d, day in enumerate(_DAYS)])
+
+
+async def get_top_users_by_tweet_count(limit: int = 10) -> str:
+    return _json([{"user": f"user{i}", "tweets": 50 - i} for i in range(min(limit, 5))])
+
+
+async def get_top_hashtags(limit: int = 10) -> str:
+    return _json([{"hashtag": f"#tag{i}", "count": 80 - i * 5} for i in range(min(limit, 5))])
+
+
+async def get_language_distribution() -> str:
+    return _json({"ja": 820, "en": 150, "other": 30})
+
+
+async def get_hourly_tweet_distribution() -> str:
+    return _json({str(h): 10 + h for h in range(24)})
+
+
+async def get_daily_average_engagement() -> str:
+    return _json([
+        {"date": day, "avg_favorite": round(8 + (d * 13) % 9 * 0.75, 2), "avg_reply": round(0.5 + (d * 7) % 5 * 0.3, 2),
+         "avg_retweet": round(2 + (d * 11) % 7 * 0.4, 2), "avg_quote": round((d * 5) % 4 * 0.25, 2)}
+        for d, day in enumerate(_DAYS)
+    ])
+
+
+async def get_product_mentions_count() -> str:
+    return _json([{"product_name": "製品1", "mentions": 31}, {"product_name": "製品2", "mentions": 17}])
+
+
+async def search_tweets_by_hashtag(hashtag: str, limit: int = 100) -> str:
+    return _json([
+        {
+            "id": f"66a1{n:08x}",
+            "created_at": f"{_DAYS[-1 - n % 365]}T{n % 24:02d}:15:00",
+            "user": f"gamer_{(n * 31) % 997}",
+            "text": f"#{hashtag} 新作ゲームを予約しました！発売日が待ちきれない。グラフィックもストーリーも期待以上で、"
+                    f"週末は友達とオンラインで遊ぶ予定です。限定版の特典も気になる… #{n % 7}日目",
+            "favorite_count": (n * 17) % 50,
+            "retweet_count": (n * 7) % 12,
+            "reply_count": n % 5,
+            "quote_count": n % 3,
+        }
+        for n in range(limit)
+    ])
+
+
+FAKE_TOOL_DESCRIPTIONS = {
+    get_all_categories: "List all product categories",
+    get_products: "List all products (optionally filter by category)",
+    get_product_detail: "Get product detail by product_id",
+    get_game_products: "List all game products",
+    get_inventory_status: "Get inventory status for a product",
+    get_customer_orders: "List all orders for a customer",
+    get_order_details: "Get order details for an order",
+    get_shipping_status: "Get shipping status for a user's order",
+    get_all_users: "List all users",
+    get_total_sales: "指定期間の売上合計を取得する",
+    get_daily_order_counts: "指定期間の日別受注数を取得する",
+    get_daily_tweet_counts: "日別のツイート数を取得する",
+    get_top_users_by_tweet_count: "ユーザー別のツイート数上位を取得する",
+    get_top_hashtags: "ハッシュタグの出現頻度上位を取得する",
+    get_language_distribution: "言語ごとのツイート数を集計する",
+    get_hourly_tweet_distribution: "時間帯別のツイート数を取得する",
+    get_daily_average_engagement: "日別の平均いいね・リプライ・リツイート数を取得する",
+    get_product_mentions_count: "product_name 別のツイート数を集計する",
+    search_tweets_by_hashtag: "特定のハッシュタグを含むツイートを検索する",
+}
+
+
+# The ``tags=`` of each tool in backend_services/mcp_service.py
+FAKE_TOOL_TAGS = {
+    get_all_categories: "catalog",
+    get_products: "catalog",
+    get_product_detail: "catalog",
+    get_game_products: "catalog",
+    get_inventory_status: "catalog",
+    get_customer_orders: "billing",
+    get_order_details: "billing",
+    get_shipping_status: "billing",
+    get_all_users: "billing",
+    get_total_sales: "billing",
+    get_daily_order_counts: "billing",
+    get_daily_tweet_counts: "social",
+    get_top_users_by_tweet_count: "social",
+    get_top_hashtags: "social",
+    get_language_distribution: "social",
+    get_hourly_tweet_distribution: "social",
+    get_daily_average_engagement: "social",
+    get_product_mentions_count: "social",
+    search_tweets_by_hashtag: "social",
+}
+
+
+class FakeMcpTool(FunctionTool):
+    """A FunctionTool carrying the MCP tool metadata an MCP adapter has (``_tool``), FastMCP tags included."""
+
+    def __init__(self, fn: Any, description: str) -> None:
+        from mcp.types import Tool as McpTool
+
+        super().__init__(fn, description=description)
+        self._tool = McpTool(
+            name=self.name,
+            description=description,
+            inputSchema=dict(self.schema.get("parameters") or {"type": "object"}),
+            _meta={"_fastmcp": {"tags": [FAKE_TOOL_TAGS[fn]]}},
+        )
+
+
+_fake_tools: List[FunctionTool] = []
+
+
+def fake_mcp_tools() -> List[FunctionTool]:
+    # Created once per process and shared by all sessions, like ToolCatalog's adapters
+    if not _fake_tools:
+        _fake_tools.extend(FakeMcpTool(fn, description) for fn, description in FAKE_TOOL_DESCRIPTIONS.items())
+    return list(_fake_tools)
+
+
+def offline_agent_class(agent_cls: Type[Any], llm_latency_seconds: float = 0.0) -> Type[Any]:
+    """Subclass of an agent module's ``Agent`` wired to the scripted model and fake tools."""
+
+    class OfflineAgent(agent_cls):  # type: ignore[misc, valid-type]
+        async def load_tools(self) -> List[Any]:
+            return self.wrap_tools(fake_mcp_tools())
+
+        def create_model_client(self, role: Optional[str] = None) -> UsageTrackingChatCompletionClient:
+            return UsageTrackingChatCompletionClient(
+                CancellableChatCompletionClient(ScriptedChatCompletionClient(llm_latency_seconds), self.cancellation_token),
+                self.llm_usage,
+            )
+
+    OfflineAgent.__name__ = OfflineAgent.__qualname__ = f"Offline{agent_cls.__name__}"
+    OfflineAgent.__module__ = agent_cls.__module__
+    return OfflineAgent
@@ -0,0 +1,213 @@
+"""
+LLM rate limiter benchmark (autogen/llm_rate_limiter.py) against a local
+Azure OpenAI compatible endpoint with a quota: ``--rpm`` requests and
+``--tpm`` tokens per minute, enforced like Azure over 10 second windows,
+answering 429 with Retry-After when they are exceeded and after
+``--llm-latency`` otherwise.
+
+Load, for ``--seconds`` per mode, through AzureOpenAIChatCompletionClient:
+``--interactive`` users sending a call every ``--think`` seconds and
+``--background`` loops (jobs, batch evaluation) sending calls back to back.
+Modes:
+
+- sdk: no limiter, the openai SDK retries each 429 on its own (as before)
+- reactive: shared limiter without a configured quota, pausing on 429s
+- quota: shared limiter with LLM_RATE_LIMIT_RPM/TPM at ``--quota-share`` of the quota
+
+Reported per mode: successful calls per second, 429s returned by the
+endpoint, failed calls, and call latency (p50/p95/p99, including waiting
+and retries) per priority.
+
+Usage (from agentic_ai/):
+    python benchmarks/rate_limit_benchmark.py
+    python benchmarks/rate_limit_benchmark.py --rpm 120 --interactive 4 --background 8 --seconds 60
+"""
+import argparse
+import asyncio
+import json
+import math
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from startup_benchmark import free_port, wait_for  # noqa: E402
+
+PROMPT = "顧客 251 の直近の注文と配送状況を教えてください。" * 20
+WINDOW_SECONDS = 10
+
+
+def serve_fake_endpoint(port: int, rpm: float, tpm: float, llm_latency: float) -> None:
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    from autogen.tokens import count_tokens
+
+    window = {"start": time.monotonic(), "requests": 0, "tokens": 0}
+    stats = {"ok": 0, "throttled": 0}
+    limit_requests = rpm * WINDOW_SECONDS / 60
+    limit_tokens = tpm * WINDOW_SECONDS / 60
+
+    async def chat_completions(request):
+        body = await request.json()
+        prompt_tokens = sum(count_tokens(str(m.get("content", ""))) for m in body["messages"])
+        now = time.monotonic()
+        if now - window["start"] >= WINDOW_SECONDS:
+            window.update(start=now, requests=0, tokens=0)
+        if window["requests"] + 1 > limit_requests or window["tokens"] + prompt_tokens > limit_tokens:
+            stats["throttled"] += 1
+            retry_after = window["start"] + WINDOW_SECONDS - now
+            return JSONResponse(
+                {"error": {"code": "429", "message": "Requests to the ChatCompletions_Create Operation have exceeded the rate limit."}},
+                status_code=429,
+                headers={"retry-after": str(math.ceil(retry_after)), "retry-after-ms": str(int(retry_after * 1000))},
+            )
+        window["requests"] += 1
+        window["tokens"] += prompt_tokens
+        await asyncio.sleep(llm_latency)
+        stats["ok"] += 1
+        return JSONResponse({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "gpt-4o-2024-08-06",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "了解しました。"}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 10, "total_tokens": prompt_tokens + 10},
+        })
+
+    async def read_stats(request):
+        return JSONResponse(stats)
+
+    async def reset_stats(request):
+        stats.update(ok=0, throttled=0)
+        return JSONResponse(stats)
+
+    app = Starlette(routes=[
+        Route("/openai/deployments/{deployment}/chat/completions", chat_completions, methods=["POST"]),
+        Route("/stats", read_stats),
+        Route("/stats/reset", reset_stats, methods=["POST"]),
+    ])
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, math.ceil(len(values) * p) - 1))]
+
+
+async def run_mode(mode: str, args: argparse.Namespace, port: int) -> Dict[str, Any]:
+    from autogen_core.models import UserMessage
+    from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
+
+    from autogen.llm_rate_limiter import LlmRateLimiter, RateLimitedChatCompletionClient
+
+    inner = AzureOpenAIChatCompletionClient(
+        api_key="fake",
+        azure_endpoint=f"http://127.0.0.1:{port}",
+        api_version="2025-01-01-preview",
+        azure_deployment="gpt-4o",
+        model="gpt-4o",
+        **({} if mode == "sdk" else {"max_retries": 0}),
+    )
+    clients = {"interactive": inner, "background": inner}
+    if mode != "sdk":
+        # The deployment quota (or a little below, --quota-share) with one second of burst
+        quota = {"rpm": args.rpm * args.quota_share, "tpm": args.tpm * args.quota_share} if mode == "quota" else {}
+        limiter = LlmRateLimiter("gpt-4o", burst_seconds=1, **quota)
+        clients = {p: RateLimitedChatCompletionClient(inner, limiter, priority=p, expected_completion_tokens=10) for p in clients}
+
+    latencies: Dict[str, List[float]] = {"interactive": [], "background": []}
+    failures: Dict[str, int] = {"interactive": 0, "background": 0}
+    start_at = time.perf_counter()
+    stop_at = start_at + args.seconds
+
+    async def caller(priority: str, think: float) -> None:
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                await clients[priority].create([UserMessage(content=PROMPT, source="user")])
+                latencies[priority].append(time.perf_counter() - start)
+            except Exception:
+                failures[priority] += 1
+            await asyncio.sleep(think)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as http:
+        await http.post("/stats/reset")
+        await asyncio.gather(
+            *(caller("interactive", args.think) for _ in range(args.interactive)),
+            *(caller("background", 0) for _ in range(args.background)),
+        )
+        elapsed = time.perf_counter() - start_at
+        server = (await http.get("/stats")).json()
+    await inner.close()
+
+    return {
+        "calls_per_second": sum(len(v) for v in latencies.values()) / elapsed,
+        "throttled_429": server["throttled"],
+        "failed": failures,
+        "latency": {
+            p: {"calls": len(v), "p50": percentile(v, 0.5), "p95": percentile(v, 0.95), "p99": percentile(v, 0.99)}
+            for p, v in latencies.items()
+        },
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, __file__, "--serve-fake", str(port), "--rpm", str(args.rpm), "--tpm", str(args.tpm),
+         "--llm-latency", str(args.llm_latency)],
+    )
+    report: Dict[str, Dict[str, Any]] = {}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            wait_for(client, "/stats", time.perf_counter(), server)
+        for mode in args.modes:
+            report[mode] = await run_mode(mode, args, port)
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(
+        f"quota {args.rpm:.0f} RPM / {args.tpm:.0f} TPM, {args.interactive} interactive users (think {args.think}s), "
+        f"{args.background} background loops, {args.seconds}s per mode"
+    )
+    header = f"{'mode':<10}{'calls/s':>9}{'429s':>7}{'failed':>8}  {'priority':<12}{'calls':>7}{'p50 s':>8}{'p95 s':>8}{'p99 s':>8}"
+    print(header)
+    print("-" * len(header))
+    for mode, r in report.items():
+        for n, (priority, lat) in enumerate(r["latency"].items()):
+            lead = f"{mode:<10}{r['calls_per_second']:>9.2f}{r['throttled_429']:>7}{sum(r['failed'].values()):>8}" if n == 0 else " " * 34
+            print(f"{lead}  {priority:<12}{lat['calls']:>7}{lat['p50']:>8.2f}{lat['p95']:>8.2f}{lat['p99']:>8.2f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpm", type=float, default=120, help="requests per minute of the fake deployment")
+    parser.add_argument("--tpm", type=float, default=60000, help="tokens per minute of the fake deployment")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per accepted completion")
+    parser.add_argument("--interactive", type=int, default=4, help="interactive users")
+    parser.add_argument("--think", type=float, default=2.0, help="seconds between an interactive user's calls")
+    parser.add_argument("--background", type=int, default=6, help="background loops calling back to back")
+    parser.add_argument("--seconds", type=float, default=60, help="load duration per mode")
+    parser.add_argument("--quota-share", type=float, default=1.0, help="LLM_RATE_LIMIT_RPM/TPM as a share of the quota (quota mode)")
+    parser.add_argument("--modes", nargs="+", default=["sdk", "reactive", "quota"])
+    parser.add_argument("--output", help="write the raw results as JSON")
+    parser.add_argument("--serve-fake", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve_fake:
+        serve_fake_endpoint(args.serve_fake, args.rpm, args.tpm, args.llm_latency)
+    else:
+        asyncio.run(main(args))
@@ -0,0 +1,138 @@
+"""
+Per-session setup benchmark: what building a session's team costs when
+``--sessions`` sessions (default 1,000) are alive at once in one worker,
+with team templates (TEAM_TEMPLATES=on, see autogen/team_template.py) and
+without (TEAM_TEMPLATES=off, every session rebuilds everything).
+
+For each module a seed session runs one offline turn (scripted model, fake
+tools; see benchmarks/offline.py) and its saved state is copied to every
+benchmark session, so ``setup()`` also restores state with ``load_state``
+as a returning session does. Reported per session:
+
+- setup time (median and p95 of ``Agent(store, id)`` + ``setup()``),
+- memory retained while all sessions are alive (tracemalloc, separate pass
+  so tracing does not skew the timings).
+
+Usage (from agentic_ai/):
+    python benchmarks/session_setup_benchmark.py
+    python benchmarks/session_setup_benchmark.py --sessions 200 --module autogen.multi_agent.handoff_multi_domain_agent
+"""
+import argparse
+import asyncio
+import gc
+import importlib
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("MCP_SERVER_URI", "http://offline")
+os.environ.setdefault("STATE_STORE_BACKEND", "memory")
+os.environ.setdefault("TRACING", "off")
+
+from offline import offline_agent_class  # noqa: E402
+
+from autogen.state_store import InMemoryStateStore  # noqa: E402
+
+MODULES = [
+    "autogen.single_agent.loop_agent",
+    "autogen.multi_agent.reflection_agent",
+    "autogen.multi_agent.handoff_multi_domain_agent",
+    "autogen.multi_agent.collaborative_multi_agent_round_robin",
+    "autogen.multi_agent.collaborative_multi_agent_selector_group",
+    "autogen.multi_agent.collaborative_multi_agent_graphflow",
+]
+PROMPT = "顧客 251 の注文一覧と、ゲームカテゴリの製品を教えて"
+
+
+async def seeded_store(agent_cls: Any, sessions: int) -> InMemoryStateStore:
+    store = InMemoryStateStore()
+    await agent_cls(store, "seed").chat_async(PROMPT)
+    # Copy every key of the seed session (state snapshot parts, history chunks)
+    seed_keys = store.keys("seed")
+    for i in range(sessions):
+        for key in seed_keys:
+            store.set(f"s{i}" + key[len("seed"):], store.get(key), group=f"s{i}")
+    return store
+
+
+async def setup_sessions(agent_cls: Any, store: InMemoryStateStore, sessions: int) -> List[Any]:
+    agents = []
+    for i in range(sessions):
+        agent = agent_cls(store, f"s{i}")
+        await agent.setup()
+        agents.append(agent)
+    return agents
+
+
+async def measure(agent_cls: Any, sessions: int) -> Dict[str, float]:
+    store = await seeded_store(agent_cls, sessions)
+    # Warm this mode's per-process caches as the lifespan warm-up would
+    await agent_cls(InMemoryStateStore(), "__warmup__").setup()
+
+    gc.collect()
+    times = []
+    agents = []
+    for i in range(sessions):
+        start = time.perf_counter()
+        agent = agent_cls(store, f"s{i}")
+        await agent.setup()
+        times.append(time.perf_counter() - start)
+        agents.append(agent)
+    del agents
+    gc.collect()
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    agents = await setup_sessions(agent_cls, store, sessions)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del agents
+    gc.collect()
+
+    times.sort()
+    return {
+        "setup_ms_median": statistics.median(times) * 1000,
+        "setup_ms_p95": times[int(len(times) * 0.95) - 1] * 1000,
+        "setup_s_total": sum(times),
+        "memory_kb_per_session": retained / sessions / 1024,
+        "memory_mb_total": retained / 1024 / 1024,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    report: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for module in args.module or MODULES:
+        agent_cls = offline_agent_class(importlib.import_module(module).Agent)
+        report[module] = {}
+        for mode in ("off", "on"):
+            os.environ["TEAM_TEMPLATES"] = mode
+            report[module][mode] = await measure(agent_cls, args.sessions)
+
+    print(f"per-session setup with {args.sessions} sessions alive (offline, state restored)")
+    header = f"{'module':<44}{'templates':>10}{'median ms':>11}{'p95 ms':>9}{'total s':>9}{'KB/session':>12}{'total MB':>10}"
+    print(header)
+    print("-" * len(header))
+    for module, modes in report.items():
+        for mode, r in modes.items():
+            print(
+                f"{module.rsplit('.', 1)[-1]:<44}{mode:>10}{r['setup_ms_median']:>11.2f}{r['setup_ms_p95']:>9.2f}"
+                f"{r['setup_s_total']:>9.2f}{r['memory_kb_per_session']:>12.1f}{r['memory_mb_total']:>10.1f}"
+            )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"sessions": args.sessions, "results": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", action="append", help="agent module (repeatable; default: all six)")
+    parser.add_argument("--sessions", type=int, default=1000, help="sessions alive at once")
+    parser.add_argument("--output", help="write the raw results as JSON")
+    asyncio.run(main(parser.parse_args()))
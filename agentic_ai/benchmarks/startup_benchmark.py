@@ -0,0 +1,199 @@
+"""
+Startup benchmark for backend.py: time-to-ready and first-request latency
+with the lazy start (WARMUP=off, every cost paid by the first request) and
+the lifespan warm-up (WARMUP=on).
+
+Runs local stand-ins for the two external services, each adding
+``--network-latency`` to every HTTP request in place of DNS/TLS/RTT:
+
+- an MCP SSE server exposing the fake tools of ``benchmarks/offline.py``,
+- an Azure OpenAI compatible endpoint answering every chat completion
+  with a final answer after ``--llm-latency``.
+
+Then starts backend.py under uvicorn ``--runs`` times per mode and
+measures from process start: live (/healthz answers), ready (/readyz
+answers 200), the first and second /chat latency after that, and the time
+a SIGTERM takes to shut the worker down.
+
+Usage (from agentic_ai/):
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --module autogen.multi_agent.handoff_multi_domain_agent --network-latency 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+METRICS = ["live_seconds", "ready_seconds", "first_request_seconds", "second_request_seconds", "shutdown_seconds"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve_stubs(port: int, network_latency: float, llm_latency: float) -> None:
+    import uvicorn
+    from mcp.server.fastmcp import FastMCP
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Mount, Route
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from offline import FAKE_TOOL_DESCRIPTIONS
+
+    mcp = FastMCP("Contoso stub", log_level="WARNING")
+    for fn, description in FAKE_TOOL_DESCRIPTIONS.items():
+        mcp.add_tool(fn, description=description)
+
+    async def chat_completions(request):
+        body = await request.json()
+        await asyncio.sleep(llm_latency)
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in body["messages"]) // 2
+        return JSONResponse({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "gpt-4o-2024-08-06",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "TERMINATE: ご質問ありがとうございます。結果をまとめました。"},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 20, "total_tokens": prompt_tokens + 20},
+        })
+
+    async def models(request):
+        return JSONResponse({"object": "list", "data": []})
+
+    class NetworkLatency:
+        def __init__(self, app):
+            self.app = app
+
+        async def __call__(self, scope, receive, send):
+            if scope["type"] == "http":
+                await asyncio.sleep(network_latency)
+            await self.app(scope, receive, send)
+
+    app = Starlette(routes=[
+        Route("/openai/deployments/{deployment}/chat/completions", chat_completions, methods=["POST"]),
+        Route("/openai/models", models),
+        Mount("/", app=mcp.sse_app()),
+    ])
+    uvicorn.run(NetworkLatency(app), host="127.0.0.1", port=port, log_level="warning")
+
+
+def wait_for(client: httpx.Client, url: str, start: float, process: subprocess.Popen, timeout: float = 120.0) -> float:
+    while time.perf_counter() - start < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"process exited with {process.returncode} before {url} answered")
+        try:
+            if client.get(url).status_code == 200:
+                return time.perf_counter() - start
+        except httpx.TransportError:
+            pass
+        time.sleep(0.02)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+
+def run_backend(module: str, warmup: bool, stub_port: int, prompt: str) -> Dict[str, Any]:
+    port = free_port()
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(ROOT),
+        "AGENT_MODULE": module,
+        "WARMUP": "on" if warmup else "off",
+        "MCP_SERVER_URI": f"http://127.0.0.1:{stub_port}/sse",
+        "AZURE_OPENAI_ENDPOINT": f"http://127.0.0.1:{stub_port}",
+        "AZURE_OPENAI_API_KEY": "stub",
+        "AZURE_OPENAI_API_VERSION": "2025-01-01-preview",
+        "AZURE_OPENAI_CHAT_DEPLOYMENT": "gpt-4o",
+        "OPENAI_MODEL_NAME": "gpt-4o",
+        "STATE_STORE_BACKEND": "memory",
+        "LLM_CACHE_MODE": "passthrough",
+        "TRACING": "off",
+    }
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "applications.backend:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+    result: Dict[str, Any] = {}
+    try:
+        with httpx.Client(base_url=base, timeout=120) as client:
+            result["live_seconds"] = wait_for(client, "/healthz", start, process)
+            result["ready_seconds"] = wait_for(client, "/readyz", start, process)
+            for n, key in enumerate(("first_request_seconds", "second_request_seconds")):
+                t = time.perf_counter()
+                response = client.post("/chat", json={"session_id": f"startup-{n}", "prompt": prompt})
+                response.raise_for_status()
+                result[key] = time.perf_counter() - t
+            result["readiness"] = client.get("/readyz").json()
+    finally:
+        t = time.perf_counter()
+        process.send_signal(signal.SIGTERM)
+        result["exit_code"] = process.wait(timeout=60)
+        result["shutdown_seconds"] = time.perf_counter() - t
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="autogen.single_agent.loop_agent")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--network-latency", type=float, default=0.05, help="seconds added to every stub HTTP request")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds per stub chat completion")
+    parser.add_argument("--prompt", default="顧客 251 の注文一覧を見せて")
+    parser.add_argument("--output", help="write the raw results as JSON")
+    parser.add_argument("--serve-stubs", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_stubs:
+        serve_stubs(args.serve_stubs, args.network_latency, args.llm_latency)
+        return
+
+    stub_port = free_port()
+    stubs = subprocess.Popen(
+        [sys.executable, __file__, "--serve-stubs", str(stub_port),
+         "--network-latency", str(args.network_latency), "--llm-latency", str(args.llm_latency)],
+    )
+    report: Dict[str, List[Dict[str, Any]]] = {}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{stub_port}") as client:
+            wait_for(client, "/openai/models", time.perf_counter(), stubs)
+        for mode, warmup in (("WARMUP=off", False), ("WARMUP=on", True)):
+            report[mode] = [run_backend(args.module, warmup, stub_port, args.prompt) for _ in range(args.runs)]
+    finally:
+        stubs.terminate()
+        stubs.wait()
+
+    print(f"{args.module}: median of {args.runs} runs (network latency {args.network_latency}s, LLM latency {args.llm_latency}s)")
+    header = f"{'mode':<12}" + "".join(f"{m:>24}" for m in METRICS)
+    print(header)
+    print("-" * len(header))
+    for mode, runs in report.items():
+        print(f"{mode:<12}" + "".join(f"{statistics.median(r[m] for r in runs):>24.3f}" for m in METRICS))
+    steps = report["WARMUP=on"][-1]["readiness"]["steps"]
+    print("\nwarm-up steps (last run): " + ", ".join(f"{name} {step.get('seconds')}s" for name, step in steps.items()))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"module": args.module, "network_latency": args.network_latency, "llm_latency": args.llm_latency, "runs": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
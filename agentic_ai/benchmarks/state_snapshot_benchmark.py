@@ -0,0 +1,156 @@
+"""
+Compare full-state persistence with checkpoint + delta snapshots.
+
+Simulates a SelectorGroupChat-shaped team state over a long session and
+reports, per turn, the time to save and restore the state and the bytes
+written to the session store: the pickled size of every ``store.set``
+payload of the turn (what the sqlite and redis stores write).
+
+Usage (from agentic_ai/):
+    python benchmarks/state_snapshot_benchmark.py --turns 50
+"""
+import argparse
+import copy
+import datetime
+import pickle
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from autogen.state_snapshot import StateSnapshotter
+from autogen.state_store import InMemoryStateStore
+
+AGENTS = ["AnalysisPlanningAgent", "CRMBillingAgent", "ProductPromotionsAgent"]
+MESSAGES_PER_TURN = 6
+
+
+def _text(rng: random.Random, n: int) -> str:
+    words = ["請求", "注文", "customer", "invoice", "プロモーション", "割引", "在庫", "order", "total", "分析"]
+    return " ".join(rng.choice(words) for _ in range(n))
+
+
+def _thread_message(rng: random.Random, source: str) -> dict:
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "source": source,
+        "models_usage": {"prompt_tokens": rng.randint(500, 4000), "completion_tokens": rng.randint(20, 400)},
+        "metadata": {},
+        "created_at": datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc),
+        "content": _text(rng, rng.randint(40, 160)),
+        "type": "TextMessage",
+    }
+
+
+def simulate_states(turns: int, seed: int = 0):
+    """Yield the team state after each turn."""
+    rng = random.Random(seed)
+    state = {
+        "type": "TeamState",
+        "version": "1.0.0",
+        "agent_states": {
+            name: {
+                "type": "ChatAgentContainerState",
+                "version": "1.0.0",
+                "agent_state": {"type": "AssistantAgentState", "version": "1.0.0", "llm_context": {"messages": []}},
+                "message_buffer": [],
+            }
+            for name in AGENTS
+        },
+    }
+    state["agent_states"]["SelectorGroupChatManager"] = {
+        "type": "SelectorManagerState",
+        "version": "1.0.0",
+        "message_thread": [],
+        "current_turn": 0,
+        "previous_speaker": None,
+    }
+    for turn in range(turns):
+        state = copy.deepcopy(state)
+        manager = state["agent_states"]["SelectorGroupChatManager"]
+        manager["message_thread"].append(_thread_message(rng, "user"))
+        for _ in range(MESSAGES_PER_TURN):
+            speaker = rng.choice(AGENTS)
+            message = _thread_message(rng, speaker)
+            manager["message_thread"].append(message)
+            for name in AGENTS:
+                context = state["agent_states"][name]["agent_state"]["llm_context"]["messages"]
+                kind = "AssistantMessage" if name == speaker else "UserMessage"
+                context.append({"content": message["content"], "source": speaker, "type": kind})
+        manager["current_turn"] = turn + 1
+        manager["previous_speaker"] = speaker
+        yield state
+
+
+class CountingStore(InMemoryStateStore):
+    """Counts the pickled bytes of every ``set``, as a durable store would write them."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.bytes_written = 0
+
+    def set(self, key: str, value: object, group: Optional[str] = None) -> None:
+        self.bytes_written += len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        super().set(key, value, group)
+
+    def take(self) -> int:
+        written, self.bytes_written = self.bytes_written, 0
+        return written
+
+
+def run(turns: int, checkpoint_interval: int) -> None:
+    snapshotter = StateSnapshotter(checkpoint_interval=checkpoint_interval)
+    full_store, delta_store = CountingStore(), CountingStore()
+    head, previous = None, None
+    totals = {"full": [0.0, 0.0, 0], "delta": [0.0, 0.0, 0]}
+
+    print(f"{'turn':>4} | {'full save ms':>12} {'restore ms':>10} {'bytes':>9} | {'delta save ms':>13} {'restore ms':>10} {'bytes':>9}")
+    for turn, state in enumerate(simulate_states(turns), start=1):
+        # Baseline: the whole state is re-serialised and re-stored every turn.
+        start = time.perf_counter()
+        blob = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        full_save = time.perf_counter() - start
+        full_store.set("session", state)
+        start = time.perf_counter()
+        pickle.loads(blob)
+        full_load = time.perf_counter() - start
+        full_bytes = full_store.take()
+
+        start = time.perf_counter()
+        head, _ = snapshotter.save(delta_store, "session", head, previous, state)
+        delta_save = time.perf_counter() - start
+        written = delta_store.take()
+        start = time.perf_counter()
+        _, restored = snapshotter.load(delta_store, "session")
+        delta_load = time.perf_counter() - start
+        assert restored == state, f"round-trip mismatch at turn {turn}"
+        previous = state
+
+        for key, values in (("full", (full_save, full_load, full_bytes)), ("delta", (delta_save, delta_load, written))):
+            for i, value in enumerate(values):
+                totals[key][i] += value
+
+        if turn in (1, 10, 25) or turn == turns or turn % 10 == 0:
+            print(
+                f"{turn:>4} | {full_save * 1e3:>12.2f} {full_load * 1e3:>10.2f} {full_bytes:>9} | "
+                f"{delta_save * 1e3:>13.2f} {delta_load * 1e3:>10.2f} {written:>9}"
+            )
+
+    print("-" * 80)
+    for key in ("full", "delta"):
+        save, load, written = totals[key]
+        print(
+            f"{key:>5}: save {save * 1e3 / turns:.2f} ms/turn, restore {load * 1e3 / turns:.2f} ms/turn, "
+            f"{written / turns / 1024:.1f} KiB/turn, {written / 1024:.1f} KiB total written"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--checkpoint-interval", type=int, default=10)
+    args = parser.parse_args()
+    run(args.turns, args.checkpoint_interval)
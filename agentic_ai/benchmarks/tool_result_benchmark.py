@@ -0,0 +1,131 @@
+"""
+Tool result shaping benchmark (autogen/tool_results.py).
+
+1. Per tool: tokens of the raw result of every fake MCP tool of
+   ``benchmarks/offline.py`` (the tweet tools answer over a year-long
+   corpus) against the shaped result at ``--budget``, and the shaping time.
+2. End to end: offline turns of each agent module on prompts that hit the
+   large tools, with TOOL_RESULT_SHAPING=off and on: prompt tokens per turn
+   (the shaped result is resent on every later LLM call of the turn) and
+   the tokens the shaper reports as saved.
+
+Usage (from agentic_ai/):
+    python benchmarks/tool_result_benchmark.py
+    python benchmarks/tool_result_benchmark.py --budget 500 --module autogen.multi_agent.handoff_multi_domain_agent
+"""
+import argparse
+import asyncio
+import importlib
+import inspect
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("MCP_SERVER_URI", "http://offline")
+os.environ.setdefault("TRACING", "off")
+
+from offline import FAKE_TOOL_DESCRIPTIONS, offline_agent_class  # noqa: E402
+
+from autogen.state_store import InMemoryStateStore  # noqa: E402
+from autogen.tokens import count_tokens  # noqa: E402
+from autogen.tool_results import ToolResultShaper  # noqa: E402
+
+MODULES = [
+    "autogen.single_agent.loop_agent",
+    "autogen.multi_agent.reflection_agent",
+    "autogen.multi_agent.handoff_multi_domain_agent",
+    "autogen.multi_agent.collaborative_multi_agent_round_robin",
+    "autogen.multi_agent.collaborative_multi_agent_selector_group",
+    "autogen.multi_agent.collaborative_multi_agent_graphflow",
+]
+PROMPTS = [
+    "日別のツイート数の推移を教えて",
+    "#ゲーム を含むツイートを探して、反応の多い投稿をまとめて",
+    "日別のエンゲージメントの推移を分析して",
+]
+SAMPLE_ARGUMENTS = {"hashtag": "ゲーム", "start_date": "2025-06-01", "end_date": "2025-06-30"}
+
+
+async def per_tool(budget: int, runs: int) -> List[Dict[str, Any]]:
+    rows = []
+    for fn in FAKE_TOOL_DESCRIPTIONS:
+        parameters = inspect.signature(fn).parameters
+        args = {name: SAMPLE_ARGUMENTS.get(name, 1) for name, p in parameters.items() if p.default is inspect.Parameter.empty}
+        raw = await fn(**args)
+        shaper = ToolResultShaper(budget=budget)
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            shaped = shaper.shape(fn.__name__, raw)
+            times.append(time.perf_counter() - start)
+        raw_tokens = count_tokens(raw)
+        shaped_tokens = raw_tokens if shaped is None else count_tokens(shaped)
+        rows.append({
+            "tool": fn.__name__,
+            "raw_tokens": raw_tokens,
+            "shaped_tokens": shaped_tokens,
+            "shaped": shaped is not None,
+            "shape_ms": statistics.median(times) * 1000,
+            "rows_shown": json.loads(shaped).get("rows_shown") if shaped and shaped.startswith("{") else None,
+        })
+    return rows
+
+
+async def end_to_end(modules: List[str]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    report: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for module in modules:
+        agent_cls = offline_agent_class(importlib.import_module(module).Agent)
+        report[module] = {}
+        for mode in ("off", "on"):
+            os.environ["TOOL_RESULT_SHAPING"] = mode
+            turns = []
+            for n, prompt in enumerate(PROMPTS):
+                agent = agent_cls(InMemoryStateStore(), f"{mode}-{n}")
+                await agent.chat_async(prompt)
+                turns.append(agent.last_turn_stats)
+            report[module][mode] = {
+                "prompt_tokens": statistics.mean(t.prompt_tokens for t in turns),
+                "tool_result_tokens_saved": statistics.mean(t.tool_result_tokens_saved for t in turns),
+                "llm_calls": statistics.mean(t.llm_calls for t in turns),
+                "latency_seconds": statistics.mean(t.latency_seconds for t in turns),
+            }
+    return report
+
+
+async def main(args: argparse.Namespace) -> None:
+    os.environ["TOOL_RESULT_TOKEN_BUDGET"] = str(args.budget)
+    tools = await per_tool(args.budget, args.runs)
+    turns = await end_to_end(args.module or MODULES)
+
+    print(f"per tool result (budget {args.budget} tokens)")
+    print(f"{'tool':<32}{'raw tokens':>12}{'shaped':>10}{'saved %':>9}{'rows shown':>12}{'shape ms':>10}")
+    for r in tools:
+        saved = 100 * (1 - r["shaped_tokens"] / r["raw_tokens"]) if r["raw_tokens"] else 0
+        shown = "" if r["rows_shown"] is None else str(r["rows_shown"])
+        print(f"{r['tool']:<32}{r['raw_tokens']:>12}{r['shaped_tokens']:>10}{saved:>9.0f}{shown:>12}{r['shape_ms'] if r['shaped'] else 0:>10.2f}")
+
+    print(f"\nper turn, mean of {len(PROMPTS)} prompts hitting the large tools (offline)")
+    print(f"{'module':<44}{'shaping':>8}{'prompt tokens':>15}{'saved (shaper)':>16}{'llm calls':>11}{'latency s':>11}")
+    for module, modes in turns.items():
+        for mode, r in modes.items():
+            print(
+                f"{module.rsplit('.', 1)[-1]:<44}{mode:>8}{r['prompt_tokens']:>15.0f}{r['tool_result_tokens_saved']:>16.0f}"
+                f"{r['llm_calls']:>11.1f}{r['latency_seconds']:>11.3f}"
+            )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"budget": args.budget, "tools": tools, "turns": turns}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", action="append", help="agent module (repeatable; default: all six)")
+    parser.add_argument("--budget", type=int, default=1000, help="TOOL_RESULT_TOKEN_BUDGET")
+    parser.add_argument("--runs", type=int, default=5, help="shaping repetitions per tool for the timing")
+    parser.add_argument("--output", help="write the raw results as JSON")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Import the local ``autogen`` package (agentic_ai/autogen), as the apps do when run from agentic_ai/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,49 @@
+"""
+Resuming batch runs (run from agentic_ai/: python -m pytest tests).
+"""
+import asyncio
+from types import SimpleNamespace
+from typing import List, Tuple
+
+from autogen.batch_eval import STAT_FIELDS, run_batch
+from autogen.chat_history import append_history
+from autogen.state_store import InMemoryStateStore
+
+
+def fake_turn_runner(store: InMemoryStateStore, calls: List[Tuple[str, str]]):
+    """Answers with the number of turns the session has seen, kept in ``store`` like an agent's chat history."""
+
+    async def run(session_id: str, prompt: str, timeout: float):
+        calls.append((session_id, prompt))
+        meta = append_history(store, session_id, [{"role": "user", "content": prompt}])
+        stats = SimpleNamespace(latency_seconds=0.0, **{field: 0 for field in STAT_FIELDS})
+        agent = SimpleNamespace(last_turn_stats=stats, last_turn_aborted=None)
+        return agent, f"turn {meta['length']}"
+
+    return run
+
+
+def test_resume_replays_turns_the_store_lost(tmp_path):
+    output = tmp_path / "results.jsonl"
+    items = [{"id": str(i), "session_id": "s", "prompt": p} for i, p in enumerate(["a", "b", "c"])]
+    calls: List[Tuple[str, str]] = []
+
+    # First run interrupted after one turn
+    asyncio.run(run_batch(items[:1], fake_turn_runner(InMemoryStateStore(), calls), output, store=InMemoryStateStore()))
+    # Resumed with a fresh in-memory store: turn "a" is replayed, unrecorded
+    store = InMemoryStateStore()
+    summary = asyncio.run(run_batch(items, fake_turn_runner(store, calls), output, store=store))
+    assert calls == [("s", "a"), ("s", "a"), ("s", "b"), ("s", "c")]
+    assert summary["ok"] == 3
+    answers = [line for line in output.read_text().splitlines()]
+    assert len(answers) == 3 and '"turn 3"' in answers[-1]
+
+
+def test_resume_keeps_state_the_store_still_has(tmp_path):
+    output = tmp_path / "results.jsonl"
+    items = [{"id": str(i), "session_id": "s", "prompt": p} for i, p in enumerate(["a", "b"])]
+    calls: List[Tuple[str, str]] = []
+    store = InMemoryStateStore()
+    asyncio.run(run_batch(items[:1], fake_turn_runner(store, calls), output, store=store))
+    asyncio.run(run_batch(items, fake_turn_runner(store, calls), output, store=store))
+    assert calls == [("s", "a"), ("s", "b")]
@@ -0,0 +1,74 @@
+"""
+/history versions and ETags (run from agentic_ai/: python -m pytest tests).
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("MCP_SERVER_URI", "http://localhost:8000/sse")  # never contacted
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "applications"))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import backend  # noqa: E402
+from autogen.chat_history import CHUNK_SIZE, append_history, read_history  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    return TestClient(backend.app)
+
+
+def append(session_id, *contents):
+    # What BaseAgent.append_to_chat_history stores for a turn
+    append_history(backend.SESSION_STORE, session_id, [{"role": "user", "content": c} for c in contents])
+
+
+def test_unchanged_history_reads_only_its_version(client, monkeypatch):
+    append("h1", "a", "b")
+    first = client.get("/history/h1")
+    assert first.json()["total"] == 2 and first.json()["version"] == 1
+
+    read = []
+    get = backend.SESSION_STORE.get
+    monkeypatch.setattr(backend.SESSION_STORE, "get", lambda key, default=None: read.append(key) or get(key, default))
+    cached = client.get("/history/h1", headers={"If-None-Match": first.headers["ETag"]})
+    assert cached.status_code == 304
+    assert read == ["h1_chat_meta"]
+
+
+def test_etag_covers_the_page_and_every_turn(client):
+    append("h2", "a", "b")
+    etag = client.get("/history/h2").headers["ETag"]
+    assert client.get("/history/h2", params={"since": 1}, headers={"If-None-Match": etag}).status_code == 200
+    assert client.get("/history/h2", params={"limit": 1}, headers={"If-None-Match": etag}).status_code == 200
+    append("h2", "c")
+    assert client.get("/history/h2", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_reset_starts_a_new_generation(client):
+    append("h3", "a", "b", "c")
+    before = client.get("/history/h3").json()
+    client.post("/reset_session", json={"session_id": "h3"})
+    append("h3", "x", "y", "z")
+    after = client.get("/history/h3").json()
+    # Same length and version, but a client holding the old messages can tell
+    assert (after["total"], after["version"]) == (before["total"], before["version"])
+    assert after["generation"] != before["generation"]
+
+
+def test_page_reads_only_the_chunks_it_covers(client, monkeypatch):
+    contents = [str(i) for i in range(3 * CHUNK_SIZE + 5)]
+    for start in range(0, len(contents), 7):  # turns of a few messages each
+        append("h4", *contents[start : start + 7])
+    assert read_history(backend.SESSION_STORE, "h4") == [{"role": "user", "content": c} for c in contents]
+
+    read = []
+    get = backend.SESSION_STORE.get
+    monkeypatch.setattr(backend.SESSION_STORE, "get", lambda key, default=None: read.append(key) or get(key, default))
+    page = client.get("/history/h4", params={"since": CHUNK_SIZE + 10, "limit": CHUNK_SIZE}).json()
+    assert [m["content"] for m in page["history"]] == contents[CHUNK_SIZE + 10 : 2 * CHUNK_SIZE + 10]
+    assert page["total"] == len(contents) and page["next_index"] == 2 * CHUNK_SIZE + 10
+    assert read == ["h4_chat_meta", "h4_chat_history:1", "h4_chat_history:2"]
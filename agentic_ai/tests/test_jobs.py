@@ -0,0 +1,111 @@
+"""
+JobManager with several workers sharing one store (run from agentic_ai/: python -m pytest tests).
+"""
+import asyncio
+import logging
+from typing import Any, List
+
+from autogen.jobs import CANCELLED, FAILED, QUEUED, RUNNING, SUCCEEDED, JobContext, JobManager
+from autogen.state_store import InMemoryStateStore, SqliteStateStore
+
+
+def test_pending_jobs_run_once_across_workers(tmp_path):
+    path = str(tmp_path / "state.db")
+    runs: List[str] = []
+
+    async def runner(ctx: JobContext) -> str:
+        runs.append(ctx.job["id"])
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        first = JobManager(SqliteStateStore(path), runner, rescan_interval=0.05)
+        second = JobManager(SqliteStateStore(path), runner, rescan_interval=0.05)
+        # Submitted on both workers before either runs anything: no pending entry is lost
+        ids = [m.submit(prompt=str(i))["id"] for i in range(3) for m in (first, second)]
+        first.store.flush()
+        second.store.flush()
+        assert len(second.store.keys("jobs:pending:")) == 6
+        # Both workers restart and find all six pending jobs
+        restarted = [JobManager(SqliteStateStore(path), runner, rescan_interval=0.05) for _ in range(2)]
+        for manager in restarted:
+            await manager.start()
+        for _ in range(100):
+            if all(restarted[0].get(i)["status"] == SUCCEEDED for i in ids):
+                break
+            await asyncio.sleep(0.05)
+        for manager in restarted:
+            await manager.stop()
+        assert sorted(runs) == sorted(ids)
+        assert restarted[0].store.keys("jobs:pending:") == []
+
+    asyncio.run(scenario())
+
+
+def test_interrupted_job_is_retried_then_failed(tmp_path):
+    path = str(tmp_path / "state.db")
+
+    async def hang(ctx: JobContext) -> None:
+        await asyncio.sleep(60)
+
+    async def scenario():
+        manager = JobManager(SqliteStateStore(path), hang, max_attempts=2, rescan_interval=0.05)
+        await manager.start()
+        job_id = manager.submit(prompt="x")["id"]
+        for attempt in (1, 2):
+            await asyncio.sleep(0.1)
+            assert manager.get(job_id)["status"] == RUNNING and manager.get(job_id)["attempts"] == attempt
+            await manager.stop()  # releases the lease: the job is left running
+            manager = JobManager(SqliteStateStore(path), hang, max_attempts=2, rescan_interval=0.05)
+            await manager.start()
+        await asyncio.sleep(0.1)
+        await manager.stop()
+        job = manager.get(job_id)
+        assert job["status"] == FAILED and job["attempts"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_cancel_reaches_the_worker_running_the_job(tmp_path):
+    path = str(tmp_path / "state.db")
+    started = []
+
+    async def runner(ctx: JobContext) -> None:
+        cancelled = asyncio.Event()
+        ctx.on_cancel(cancelled.set)
+        started.append(ctx.job["id"])
+        await asyncio.wait_for(cancelled.wait(), 5)
+        raise RuntimeError("aborted")
+
+    async def scenario():
+        worker = JobManager(SqliteStateStore(path), runner, rescan_interval=0.05)
+        api = JobManager(SqliteStateStore(path), runner, workers=0, rescan_interval=0.05)
+        await worker.start()
+        job_id = worker.submit(prompt="x")["id"]
+        await asyncio.sleep(0.1)
+        assert started == [job_id]
+        assert (await api.cancel(job_id))["status"] == RUNNING  # held by the other worker
+        await asyncio.sleep(0.3)
+        await worker.stop()
+        assert api.get(job_id)["status"] == CANCELLED
+
+        # A job nobody runs yet is cancelled directly
+        queued = api.submit(prompt="y")
+        assert queued["status"] == QUEUED
+        assert (await api.cancel(queued["id"]))["status"] == CANCELLED
+
+    asyncio.run(scenario())
+
+
+def test_non_durable_store_warns(caplog):
+    async def runner(ctx: JobContext) -> Any:
+        return None
+
+    async def scenario():
+        manager = JobManager(InMemoryStateStore(), runner, workers=0)
+        with caplog.at_level(logging.WARNING):
+            await manager.start()
+        await manager.stop()
+
+    asyncio.run(scenario())
+    assert "non-durable store" in caplog.text
@@ -0,0 +1,57 @@
+"""
+LLM response cache (run from agentic_ai/: python -m pytest tests).
+"""
+import sqlite3
+import time
+
+import pytest
+from autogen_core.models import CreateResult, RequestUsage
+
+from autogen.llm_cache import LlmResponseCache, create_cached_model_client
+
+
+def result(text: str) -> CreateResult:
+    return CreateResult(finish_reason="stop", content=text, usage=RequestUsage(prompt_tokens=10, completion_tokens=1), cached=False)
+
+
+def stored_bytes(path: str) -> int:
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+
+def test_running_size_tracks_puts_replacements_and_evictions(tmp_path):
+    path = str(tmp_path / "llm_cache.db")
+    # Room for "b" and the three "c"s, not for "a" too
+    limit = len(result("y" * 100).model_dump_json()) + 3 * len(result("z" * 200).model_dump_json())
+    first = LlmResponseCache(path, max_bytes=limit)
+    second = LlmResponseCache(path, max_bytes=limit)  # another worker on the same file
+    first.put("a", result("x" * 100))
+    second.put("b", result("y" * 100))
+    first.put("a", result("x" * 300))  # replaced
+    assert first.size() == second.size() == stored_bytes(path)
+    time.sleep(0.01)
+    assert second.get("b") is not None  # now more recent than "a"
+    for i in range(3):
+        first.put(f"c{i}", result("z" * 200))
+    assert first.size() == stored_bytes(path) <= limit
+    assert second.get("a") is None and second.get("b") is not None
+    first.close()
+    second.close()
+
+
+def test_size_of_a_file_written_before_the_running_total(tmp_path):
+    path = str(tmp_path / "llm_cache.db")
+    cache = LlmResponseCache(path)
+    cache.put("a", result("x" * 100))
+    cache.close()
+    with sqlite3.connect(path) as conn:
+        conn.execute("DROP TABLE totals")
+    reopened = LlmResponseCache(path)
+    assert reopened.size() == stored_bytes(path) > 0
+    reopened.close()
+
+
+def test_unknown_mode_is_rejected(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_MODE", "recrod")
+    with pytest.raises(ValueError, match="LLM_CACHE_MODE"):
+        create_cached_model_client(lambda: None)
@@ -0,0 +1,325 @@
+"""
+Session store behaviour shared by the backends (run from agentic_ai/: python -m pytest tests).
+RedisStateStore runs against ``FakeRedis``, a minimal in-process stand-in for
+the part of the redis-py API the store uses.
+"""
+import re
+import time
+import asyncio
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pytest
+
+from autogen.state_snapshot import SnapshotHead, StateSnapshotter
+from autogen.state_store import PINNED, InMemoryStateStore, RedisStateStore, SqliteStateStore, StoreLease
+
+
+class FakeRedis:
+    """Single-process stand-in for ``redis.Redis``: bytes values or sets with optional expiry."""
+
+    def __init__(self) -> None:
+        self.data: Dict[str, Tuple[Any, Optional[float]]] = {}
+
+    def _live(self, key: str) -> Optional[bytes]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._live(key)
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None, px: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        if nx and self._live(key) is not None:
+            return None
+        ttl = ex if ex is not None else (px / 1000 if px is not None else None)
+        self.data[key] = (value, time.monotonic() + ttl if ttl else None)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def expire(self, key: str, seconds: int) -> bool:
+        value = self._live(key)
+        if value is None:
+            return False
+        self.data[key] = (value, time.monotonic() + seconds)
+        return True
+
+    def sadd(self, key: str, *members: str) -> int:
+        value = self._live(key) or set()
+        self.data[key] = (value | set(members), self.data.get(key, (None, None))[1])
+        return len(set(members) - value)
+
+    def smembers(self, key: str) -> set:
+        return {member.encode() for member in self._live(key) or set()}
+
+    def srem(self, key: str, *members: str) -> int:
+        value = self._live(key) or set()
+        self.data[key] = (value - set(members), self.data[key][1])
+        return len(value & set(members))
+
+    def scan_iter(self, match: str = "*", count: Optional[int] = None) -> Iterator[bytes]:
+        # Redis glob: * and ? wildcards, backslash escapes
+        regex = "".join(
+            ".*" if part == "*" else "." if part == "?" else re.escape(part[-1])
+            for part in re.findall(r"\\.|.", match)
+        )
+        return iter([key.encode() for key in list(self.data) if re.fullmatch(regex, key) and self._live(key) is not None])
+
+    def eval(self, script: str, numkeys: int, key: str, value: bytes, *args: Any) -> int:
+        # The two compare-and-act scripts of RedisStateStore
+        if self._live(key) != value:
+            return 0
+        if "PEXPIRE" in script:
+            self.data[key] = (value, time.monotonic() + int(args[0]) / 1000)
+            return 1
+        return self.delete(key)
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client: FakeRedis) -> None:
+        self.client = client
+        self.ops: List[Tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name: str) -> Any:
+        # Queue any client command for ``execute``
+        def queue(*args: Any, **kwargs: Any) -> "FakePipeline":
+            self.ops.append((name, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self) -> List[Any]:
+        results = [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.ops]
+        self.ops = []
+        return results
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = InMemoryStateStore()
+    elif request.param == "sqlite":
+        store = SqliteStateStore(str(tmp_path / "state.db"))
+    else:
+        store = RedisStateStore(FakeRedis())
+    yield store
+    store.close()
+
+
+def test_get_set_delete(store):
+    assert store.get("a") is None
+    assert "a" not in store
+    store["a"] = {"messages": [1, 2]}
+    assert store["a"] == {"messages": [1, 2]}
+    store.flush()
+    assert store.get("a") == {"messages": [1, 2]}
+    del store["a"]
+    assert store.get("a", "gone") == "gone"
+    store.flush()
+    with pytest.raises(KeyError):
+        store["a"]
+
+
+def test_redis_writes_are_batched_and_prefixed():
+    client = FakeRedis()
+    store = RedisStateStore(client, prefix="test:", flush_interval=60)
+    store.set("s1", [1])
+    store.set("s1", [1, 2])
+    assert client.data == {}  # buffered until the flush
+    assert store.get("s1") == [1, 2]  # but read back by this worker
+    store.flush()
+    assert list(client.data) == ["test:s1"]
+    # Another worker sharing the client sees the flushed value
+    assert RedisStateStore(client, prefix="test:").get("s1") == [1, 2]
+    store.delete("s1")
+    store.flush()
+    assert client.data == {}
+    store.close()
+
+
+def test_redis_ttl():
+    client = FakeRedis()
+    store = RedisStateStore(client, ttl_seconds=30)
+    store.set("s1", "x")
+    store.flush()
+    _, expires_at = client.data["agent_state:s1"]
+    assert expires_at is not None and expires_at - time.monotonic() == pytest.approx(30, abs=1)
+    store.close()
+
+
+def test_sqlite_evicts_least_recently_used(tmp_path):
+    store = SqliteStateStore(str(tmp_path / "state.db"), max_entries=2, flush_interval=60)
+    store.set("old", 1)
+    store.flush()
+    time.sleep(0.01)
+    store.set("new", 2)
+    store.flush()
+    time.sleep(0.01)
+    assert store.get("old") == 1  # read: now more recent than "new"
+    store.flush()
+    time.sleep(0.01)
+    store.set("newest", 3)
+    store.flush()
+    assert store.get("old") == 1
+    assert store.get("new") is None
+    assert store.get("newest") == 3
+    store.close()
+
+
+def test_memory_evicts_least_recently_used():
+    store = InMemoryStateStore(max_entries=2)
+    store.set("old", 1)
+    store.set("new", 2)
+    store.get("old")
+    store.set("newest", 3)
+    assert store.get("old") == 1 and store.get("new") is None and store.get("newest") == 3
+
+
+def write_session(store, session_id):
+    snapshotter = StateSnapshotter(checkpoint_interval=10)
+    head, previous = None, None
+    for turn in range(3):
+        state = {"messages": [f"message {i}" * 20 for i in range(turn + 1)]}
+        head, _ = snapshotter.save(store, session_id, head, previous, state)
+        previous = state
+    store.set(f"{session_id}_chat_history", ["hi"], group=session_id)
+    store.flush()
+    return snapshotter, state
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_sessions_are_evicted_whole(backend, tmp_path):
+    if backend == "memory":
+        store = InMemoryStateStore(max_entries=2)
+    else:
+        store = SqliteStateStore(str(tmp_path / "state.db"), max_entries=2, flush_interval=60)
+    store.set("job:1", {"status": "queued"}, group=PINNED)
+    snapshotter, state = write_session(store, "s1")
+    time.sleep(0.01)
+    write_session(store, "s2")
+    time.sleep(0.01)
+    # A read of any key keeps the whole session in use
+    assert store.get("s1:checkpoint:" + store.get("s1").generation) is not None
+    store.flush()
+    time.sleep(0.01)
+    write_session(store, "s3")
+    assert snapshotter.load(store, "s1")[1] == state
+    assert store.keys("s2") == []
+    assert store.get("job:1") == {"status": "queued"}  # pinned: outside the bound
+    store.close()
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_ttl_expires_idle_sessions_whole(backend, tmp_path):
+    if backend == "memory":
+        store = InMemoryStateStore(ttl_seconds=0.3)
+    else:
+        store = SqliteStateStore(str(tmp_path / "state.db"), ttl_seconds=0.3, flush_interval=60)
+    store.set("job:1", True, group=PINNED)
+    write_session(store, "s1")
+    keys = sorted(store.keys("s1"))
+    for _ in range(3):
+        time.sleep(0.15)
+        assert store.get("s1_chat_history") == ["hi"]  # reads restart the expiry
+        store.flush()
+    assert sorted(store.keys("s1")) == keys
+    time.sleep(0.35)
+    store.flush()
+    assert store.keys("s1") == [] and store.get("s1") is None
+    assert store.get("job:1") is True
+    store.close()
+
+
+def test_redis_group_expires_from_its_last_write():
+    client = FakeRedis()
+    store = RedisStateStore(client, ttl_seconds=30)
+    store.set("s1:checkpoint:a", "x", group="s1")
+    store.set("job:1", True, group=PINNED)
+    store.flush()
+    client.data["agent_state:s1:checkpoint:a"] = ("x", time.monotonic() + 5)
+    store.set("s1", "head", group="s1")
+    store.flush()
+    for key in ("agent_state:s1", "agent_state:s1:checkpoint:a"):
+        assert client.data[key][1] - time.monotonic() == pytest.approx(30, abs=1)
+    assert client.data["agent_state:job:1"][1] is None
+    assert sorted(store.keys()) == ["job:1", "s1", "s1:checkpoint:a"]
+    store.close()
+
+
+def test_keys(store):
+    store.set("s1", 1)
+    store.set("s1:checkpoint:a", 2)
+    store.set("s1:delta:a:0", 3)
+    store.set("s10:checkpoint:b", 4)
+    store.flush()
+    store.set("s1:delta:a:1", 5)  # still buffered in the durable stores
+    store.delete("s1:delta:a:0")
+    assert sorted(store.keys("s1:")) == ["s1:checkpoint:a", "s1:delta:a:1"]
+    assert len(store.keys()) == 4
+
+
+def test_snapshot_parts_are_stored_under_their_own_keys(store):
+    snapshotter = StateSnapshotter(checkpoint_interval=3)
+    head, previous = None, None
+    for turn in range(5):
+        state = {"messages": [f"message {i}" * 20 for i in range(turn + 1)]}
+        head, written = snapshotter.save(store, "s1", head, previous, state)
+        previous = state
+        assert isinstance(store.get("s1"), SnapshotHead)
+        assert snapshotter.load(store, "s1")[1] == state
+    # turn 3 started a new checkpoint and removed the first generation
+    assert len(store.keys("s1:checkpoint:")) == 1
+    assert len(store.keys("s1:delta:")) == len(head.delta_bytes) == 1
+    snapshotter.delete(store, "s1")
+    assert store.get("s1") is None and store.keys("s1") == []
+
+
+def test_atomic_add_refresh_delete(store):
+    assert store.add("lock", "a", ttl_seconds=0.2)
+    assert not store.add("lock", "b", ttl_seconds=0.2)
+    assert store.refresh_if("lock", "a", 0.2)
+    assert not store.refresh_if("lock", "b", 0.2)
+    assert not store.delete_if("lock", "b")
+    assert store.delete_if("lock", "a")
+    assert store.add("lock", "b", ttl_seconds=0.05)
+    time.sleep(0.1)
+    assert not store.refresh_if("lock", "b", 0.2)  # expired
+    assert store.add("lock", "c")
+
+
+def test_sqlite_add_is_atomic_across_connections(tmp_path):
+    path = str(tmp_path / "state.db")
+    workers = [SqliteStateStore(path) for _ in range(4)]
+    assert [w.add("claim", i, ttl_seconds=60) for i, w in enumerate(workers)] == [True, False, False, False]
+    assert workers[3].get("claim") == 0
+    for w in workers:
+        w.close()
+
+
+def test_lease_is_exclusive_and_flushes_on_release(tmp_path):
+    path = str(tmp_path / "state.db")
+    first, second = SqliteStateStore(path, flush_interval=60), SqliteStateStore(path, flush_interval=60)
+
+    async def scenario():
+        lease = StoreLease(first, "s1_turn_lock", ttl_seconds=0.3)
+        assert lease.try_acquire()
+        other = StoreLease(second, "s1_turn_lock", ttl_seconds=0.3)
+        assert not await other.acquire(timeout=0.5)  # renewed while held
+        first.set("s1", "written under the lease")
+        await lease.release()
+        assert await other.acquire(timeout=0.5)
+        assert second.get("s1") == "written under the lease"
+        await other.release()
+
+    asyncio.run(scenario())
+    first.close()
+    second.close()
@@ -0,0 +1,70 @@
+"""
+In-flight sharing of ToolCallCache (run from agentic_ai/: python -m pytest tests).
+"""
+import asyncio
+
+import pytest
+
+from autogen.tool_cache import ToolCallCache
+
+
+def test_cancelling_the_first_caller_keeps_the_shared_call():
+    async def scenario():
+        cache = ToolCallCache()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "rows"
+
+        owner = asyncio.ensure_future(cache.call("get_orders", {"id": 1}, fetch))
+        await asyncio.sleep(0)
+        joiner = asyncio.ensure_future(cache.call("get_orders", {"id": 1}, fetch))
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        assert await joiner == "rows"
+        assert owner.cancelled() and calls == [1]
+        assert await cache.call("get_orders", {"id": 1}, fetch) == "rows" and calls == [1]
+
+    asyncio.run(scenario())
+
+
+def test_call_is_cancelled_with_its_last_caller():
+    async def scenario():
+        cache = ToolCallCache()
+        cancelled = asyncio.Event()
+
+        async def fetch():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        caller = asyncio.ensure_future(cache.call("get_orders", {}, fetch))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        await asyncio.sleep(0)
+        assert len(cache) == 0 and not cache._inflight
+
+    asyncio.run(scenario())
+
+
+def test_failures_reach_every_caller_and_are_not_cached():
+    async def scenario():
+        cache = ToolCallCache()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("MCP server down")
+
+        results = await asyncio.gather(*(cache.call("get_orders", {}, fail) for _ in range(2)), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert cache.misses == 1 and len(cache) == 0
+        with pytest.raises(RuntimeError):
+            await cache.call("get_orders", {}, fail)
+        assert cache.misses == 2
+
+    asyncio.run(scenario())
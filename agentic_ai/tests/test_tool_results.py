@@ -0,0 +1,68 @@
+"""
+Rows kept for get_tool_result_rows (run from agentic_ai/: python -m pytest tests).
+"""
+import asyncio
+import json
+import re
+
+from autogen_core import CancellationToken
+
+from autogen.state_store import SqliteStateStore
+from autogen.tool_results import ResultRowsTool, ToolResultShaper, delete_tool_results
+
+ROWS = json.dumps([{"date": f"2025-06-{d:02d}", "count": d * 10} for d in range(1, 31)] * 10)
+
+
+def shaped_result_id(shaper: ToolResultShaper) -> str:
+    shaped = shaper.shape("get_daily_tweet_counts", ROWS)
+    return re.search(r'result_id=\\"(\w+)\\"', shaped).group(1)
+
+
+def fetch(shaper: ToolResultShaper, result_id: str) -> dict:
+    tool = ResultRowsTool(shaper)
+    return json.loads(asyncio.run(tool.run_json({"result_id": result_id}, CancellationToken())))
+
+
+def test_rows_are_kept_with_the_session(tmp_path):
+    path = str(tmp_path / "state.db")
+    worker = SqliteStateStore(path)
+    result_id = shaped_result_id(ToolResultShaper(budget=200, store=worker, session_id="s1"))
+    worker.flush()
+    # Another worker (or a restarted one) serves the pointer of the session's history
+    other = SqliteStateStore(path)
+    assert fetch(ToolResultShaper(budget=200, store=other, session_id="s1"), result_id)["rows_total"] == 300
+    # Other sessions cannot read it
+    assert "error" in fetch(ToolResultShaper(budget=200, store=other, session_id="s2"), result_id)
+    delete_tool_results(other, "s1")
+    assert "error" in fetch(ToolResultShaper(budget=200, store=other, session_id="s1"), result_id)
+    worker.close()
+    other.close()
+
+
+def test_only_the_latest_results_are_kept(tmp_path):
+    store = SqliteStateStore(str(tmp_path / "state.db"))
+    shaper = ToolResultShaper(budget=200, store=store, session_id="s1", max_results=2)
+    first, second, third = (shaped_result_id(shaper) for _ in range(3))
+    assert len({first, second, third}) == 3
+    assert "error" in fetch(shaper, first)
+    assert fetch(shaper, third)["rows_total"] == 300
+    assert len(store.keys("s1:tool_result:")) == 2
+    store.close()
+
+
+def test_fetch_tool_only_with_shaping(monkeypatch):
+    from autogen_core.tools import FunctionTool
+
+    from autogen.tool_results import FETCH_TOOL_NAME, create_tool_result_shaper, shape_tools
+
+    async def get_orders() -> str:
+        return ROWS
+
+    tools = [FunctionTool(get_orders, description="orders")]
+    monkeypatch.setenv("TOOL_RESULT_SHAPING", "off")
+    assert shape_tools(tools, create_tool_result_shaper()) == tools
+    monkeypatch.setenv("TOOL_RESULT_SHAPING", "on")
+    shaped = shape_tools(tools, create_tool_result_shaper())
+    assert [t.name for t in shaped] == ["get_orders", FETCH_TOOL_NAME]
+    assert shaped[1].schema["parameters"]["required"] == ["result_id"]
+    assert shape_tools([], create_tool_result_shaper()) == []
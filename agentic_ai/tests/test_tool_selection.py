@@ -0,0 +1,41 @@
+"""
+Tool selection by the domain tags in the MCP tool metadata (run from agentic_ai/: python -m pytest tests).
+"""
+from autogen_core.tools import FunctionTool
+from mcp.types import Tool as McpTool
+
+from autogen.tool_selection import select_tools, tool_domains
+
+
+def get_orders(customer_id: str) -> str:
+    return "[]"
+
+
+def get_products() -> str:
+    return "[]"
+
+
+def get_rows(result_id: str) -> str:
+    return "[]"
+
+
+def mcp_tool(fn, meta):
+    tool = FunctionTool(fn, description=fn.__name__)
+    tool._tool = McpTool(name=tool.name, inputSchema={"type": "object"}, _meta=meta)
+    return tool
+
+
+def test_tools_are_selected_by_their_published_tags():
+    orders = mcp_tool(get_orders, {"_fastmcp": {"tags": ["billing"]}})
+    products = mcp_tool(get_products, {"_fastmcp": {"tags": ["catalog"]}})
+    assert tool_domains(orders) == {"billing"}
+    assert select_tools([orders, products], ["billing"]) == [orders]
+    assert select_tools([orders, products], ["catalog", "billing"]) == [orders, products]
+
+
+def test_untagged_tools_go_to_every_agent():
+    orders = mcp_tool(get_orders, {"_fastmcp": {"tags": ["billing"]}})
+    untagged = mcp_tool(get_products, None)
+    rows = FunctionTool(get_rows, description="rows")
+    assert tool_domains(untagged) == set() and tool_domains(rows) == set()
+    assert select_tools([orders, untagged, rows], ["catalog"]) == [untagged, rows]
@@ -0,0 +1,92 @@
+"""TurnScheduler admission and per-session serialization (run from agentic_ai/: python -m pytest tests)."""
+import asyncio
+
+import pytest
+
+from autogen.state_store import SqliteStateStore
+from autogen.turn_scheduler import TurnRejectedError, TurnScheduler
+
+
+def test_turns_of_a_session_run_one_at_a_time():
+    scheduler = TurnScheduler(max_concurrent=4)
+    running, overlaps = set(), []
+
+    async def turn(session_id: str) -> None:
+        async with scheduler.turn(session_id):
+            overlaps.append(session_id in running)
+            running.add(session_id)
+            await asyncio.sleep(0.01)
+            running.discard(session_id)
+
+    async def scenario():
+        await asyncio.gather(*(turn(s) for s in ["a", "a", "b", "a", "b"]))
+
+    asyncio.run(scenario())
+    assert overlaps == [False] * 5
+
+
+def test_workers_sharing_a_durable_store_serialize_a_session(tmp_path):
+    # Two workers: separate schedulers and store connections on one database
+    path = str(tmp_path / "state.db")
+    stores = [SqliteStateStore(path), SqliteStateStore(path)]
+    schedulers = [TurnScheduler(store=store, session_lock_ttl=1.0) for store in stores]
+    active, overlaps = [0], []
+
+    async def turn(scheduler: TurnScheduler) -> None:
+        async with scheduler.turn("s1"):
+            active[0] += 1
+            overlaps.append(active[0] > 1)
+            await asyncio.sleep(0.05)
+            active[0] -= 1
+
+    async def scenario():
+        await asyncio.gather(*(turn(schedulers[i % 2]) for i in range(6)))
+
+    asyncio.run(scenario())
+    assert overlaps == [False] * 6
+    for store in stores:
+        store.close()
+
+
+def test_session_locked_elsewhere_is_rejected_after_the_queue_timeout(tmp_path):
+    path = str(tmp_path / "state.db")
+    store, other = SqliteStateStore(path), SqliteStateStore(path)
+    assert other.add("s1_turn_lock", "another worker", ttl_seconds=60)
+    scheduler = TurnScheduler(store=store, queue_timeout=0.2)
+
+    async def scenario():
+        async with scheduler.turn("s1"):
+            pass
+
+    with pytest.raises(TurnRejectedError) as rejected:
+        asyncio.run(scenario())
+    assert rejected.value.reason == "session_locked"
+    assert scheduler.running == 0
+    store.close()
+    other.close()
+
+
+def test_turn_learns_its_session_lock_was_taken_over(tmp_path):
+    path = str(tmp_path / "state.db")
+    store, other = SqliteStateStore(path), SqliteStateStore(path)
+    scheduler = TurnScheduler(store=store, session_lock_ttl=0.3)
+    aborted = []
+
+    async def scenario():
+        async with scheduler.turn("s1"):
+            lease = scheduler.lease("s1")
+            lease.on_lost(lambda: aborted.append("session_lock_lost"))
+            assert not lease.lost
+            # Another worker takes the lock over (e.g. after this one stalled past its expiry)
+            other.delete("s1_turn_lock")
+            other.flush()
+            assert other.add("s1_turn_lock", "another worker", ttl_seconds=60)
+            await asyncio.sleep(0.2)
+            assert lease.lost
+        assert scheduler.lease("s1") is None
+
+    asyncio.run(scenario())
+    assert aborted == ["session_lock_lost"]
+    assert other.get("s1_turn_lock") == "another worker"  # not released by the old holder
+    store.close()
+    other.close()